@@ -0,0 +1,67 @@
+"""
+Run the benchmark suite and compare it with the stored baseline.
+
+    python -m benchmarks           # fail if any benchmark got slower than the threshold
+    python -m benchmarks --save    # replace the baseline with the current results
+
+Other arguments are passed on to pytest. Baselines are stored per machine
+type, so a baseline recorded on one kind of machine is not compared with
+results from another. Each machine type keeps a single baseline file.
+"""
+import glob
+import os
+import sys
+
+import pytest
+from pytest_benchmark.utils import get_machine_id
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+BASELINE_NAME = "baseline"
+BASELINE_ID = "0001"
+BASELINE_FILE = f"{BASELINE_ID}_{BASELINE_NAME}.json"
+# Fail when a benchmark's median time grows by more than this
+REGRESSION_THRESHOLD = "median:25%"
+
+
+def replaceBaseline(saved: bool) -> None:
+    """
+    Keep a single baseline file per machine type. pytest-benchmark numbers
+    every saved run, so the run just saved is moved over the old baseline,
+    or discarded if the suite failed.
+
+    Args:
+        saved (bool): Whether the run completed and should become the baseline.
+    """
+    machineDir = os.path.join(BASELINE_DIR, get_machine_id())
+    baseline = os.path.join(machineDir, BASELINE_FILE)
+    runs = sorted(glob.glob(os.path.join(machineDir, f"*_{BASELINE_NAME}.json")))
+    if saved and runs and runs[-1] != baseline:
+        os.replace(runs[-1], baseline)
+    for path in runs:
+        if path != baseline and os.path.exists(path):
+            os.remove(path)
+
+
+def main(args):
+    options = [
+        os.path.dirname(__file__),
+        "-q",
+        f"--benchmark-storage={BASELINE_DIR}",
+        "--benchmark-columns=min,median,max,rounds",
+        "--benchmark-sort=name",
+    ]
+    if "--save" in args:
+        args = [arg for arg in args if arg != "--save"]
+        options.append(f"--benchmark-save={BASELINE_NAME}")
+        status = pytest.main(options + args)
+        replaceBaseline(status == 0)
+        return status
+    options += [
+        f"--benchmark-compare={BASELINE_ID}",
+        f"--benchmark-compare-fail={REGRESSION_THRESHOLD}",
+    ]
+    return pytest.main(options + args)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
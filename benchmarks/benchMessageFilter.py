@@ -0,0 +1,72 @@
+"""
+Measure how many messages per second on_message can get through.
+
+Most messages the bot sees do not mention it, so they should be rejected
+before any work is done on their content. Commands are routed without
+running them, to time the parsing and dispatch alone.
+
+Run from the repository root with:
+
+    python -m benchmarks.benchMessageFilter
+"""
+import asyncio
+import time
+from unittest.mock import Mock
+
+import discord
+
+from src.commandRegistry import PrefixCommand
+from src.tourneyBot import DudeBot
+
+BOT_ID = 1
+MESSAGE_COUNT = 200_000
+CHAT = "just some ordinary chat in a busy channel, nothing to see here " * 4
+
+
+def makeMessage(content, mentionIds):
+    message = Mock(spec=discord.Message)
+    message.content = content
+    message.mentions = [Mock(id=mentionId) for mentionId in mentionIds]
+    message.author = Mock(id=2)
+    return message
+
+
+async def noop(message, args):
+    pass
+
+
+async def measure(client, message):
+    start = time.perf_counter()
+    for _ in range(MESSAGE_COUNT):
+        await client.on_message(message)
+    return MESSAGE_COUNT / (time.perf_counter() - start)
+
+
+async def run():
+    client = DudeBot()
+    client.bot_id = BOT_ID
+    # Swap the real handlers for no-ops so only routing is timed
+    for command in client.commands.commands:
+        client.commands._names[command.name] = PrefixCommand(
+            command.name, noop, max_args=command.max_args
+        )
+
+    cases = [
+        ("no mentions", makeMessage(CHAT, [])),
+        ("other user mentioned", makeMessage(f"<@3> {CHAT}", [3])),
+        ("unknown command", makeMessage(f"<@{BOT_ID}> {CHAT}", [BOT_ID])),
+        ("help", makeMessage(f"<@{BOT_ID}> help", [BOT_ID])),
+        ("create 3", makeMessage(f"<@{BOT_ID}> create 3", [BOT_ID])),
+    ]
+    print(f"{'message':>22} {'messages/s':>12}")
+    for label, message in cases:
+        rate = await measure(client, message)
+        print(f"{label:>22} {rate:>12,.0f}")
+
+
+def main():
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
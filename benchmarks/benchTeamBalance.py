@@ -0,0 +1,49 @@
+"""
+Measure rating-balanced team creation time and quality against lobby size.
+
+Run from the repository root with:
+
+    python -m benchmarks.benchTeamBalance
+"""
+import random
+import time
+
+from src.tournament import BALANCE_PASSES, balanceTeams, teamSizes, teamSpread
+
+PLAYER_COUNTS = [8, 12, 16, 32, 64, 128, 256, 512]
+TEAM_SIZE = 3
+REPEATS = 5
+
+
+def main():
+    rng = random.Random(0)
+    print(f"refinement passes: {BALANCE_PASSES}")
+    print(
+        f"{'players':>8} {'best ms':>9} {'worst ms':>9} {'spread':>8} {'random spread':>14}"
+    )
+    for count in PLAYER_COUNTS:
+        players = list(range(count))
+        ratings = {player: rng.gauss(1000, 300) for player in players}
+        sizes = teamSizes(count, TEAM_SIZE)
+
+        timings = []
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            teams = balanceTeams(players, ratings, sizes)
+            timings.append(time.perf_counter() - start)
+
+        shuffled = rng.sample(players, count)
+        randomTeams = []
+        offset = 0
+        for size in sizes:
+            randomTeams.append(shuffled[offset : offset + size])
+            offset += size
+
+        print(
+            f"{count:>8} {min(timings) * 1000:>9.2f} {max(timings) * 1000:>9.2f} "
+            f"{teamSpread(teams, ratings):>8.1f} {teamSpread(randomTeams, ratings):>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
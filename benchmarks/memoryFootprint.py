@@ -0,0 +1,131 @@
+"""
+Measure the memory used to cache a large guild with and without low-memory mode.
+
+Each mode loads a synthetic guild into a fresh process, the same way
+discord.py does on GUILD_CREATE, and reports how much its RSS grows.
+
+Run from the repository root with:
+
+    python -m benchmarks.memoryFootprint
+"""
+import gc
+import multiprocessing
+import resource
+import sys
+
+MEMBER_COUNT = 50_000
+VOICE_MEMBER_COUNT = 20
+ROLE_COUNT = 10
+
+
+def guildPayload(memberCount, voiceMemberCount):
+    """
+    Build a GUILD_CREATE payload for a guild with a few members in voice.
+    """
+    guild_id = 1
+    members = [
+        {
+            "user": {
+                "id": str(100 + i),
+                "username": f"member{i}",
+                "discriminator": "0",
+                "global_name": f"Member {i}",
+                "avatar": None,
+            },
+            "nick": f'First{i} "member{i}" L',
+            "roles": [str(10 + i % ROLE_COUNT)],
+            "joined_at": "2024-01-01T00:00:00+00:00",
+            "deaf": False,
+            "mute": False,
+            "flags": 0,
+        }
+        for i in range(memberCount)
+    ]
+    return {
+        "id": str(guild_id),
+        "name": "Synthetic",
+        "member_count": memberCount,
+        "roles": [
+            {
+                "id": str(guild_id),
+                "name": "@everyone",
+                "permissions": "0",
+                "position": 0,
+            }
+        ]
+        + [
+            {
+                "id": str(10 + i),
+                "name": f"role{i}",
+                "permissions": "0",
+                "position": i + 1,
+            }
+            for i in range(ROLE_COUNT)
+        ],
+        "channels": [
+            {
+                "id": "2",
+                "type": 2,
+                "name": "voice",
+                "position": 0,
+                "bitrate": 64000,
+                "user_limit": 0,
+            }
+        ],
+        "members": members,
+        "voice_states": [
+            {
+                "user_id": str(100 + i),
+                "channel_id": "2",
+                "session_id": str(i),
+                "deaf": False,
+                "mute": False,
+                "self_deaf": False,
+                "self_mute": False,
+                "suppress": False,
+            }
+            for i in range(voiceMemberCount)
+        ],
+    }
+
+
+def currentRss():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        # Not Linux; fall back to the peak, in bytes on macOS
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure(lowMemory, results):
+    import discord
+
+    from src.tourneyBot import DudeBot
+
+    client = DudeBot(low_memory=lowMemory)
+    payload = guildPayload(MEMBER_COUNT, VOICE_MEMBER_COUNT)
+    gc.collect()
+    before = currentRss()
+    guild = discord.Guild(data=payload, state=client._connection)
+    gc.collect()
+    results.put((len(guild.members), currentRss() - before))
+
+
+def main():
+    context = multiprocessing.get_context("spawn")
+    print(f"guild with {MEMBER_COUNT} members, {VOICE_MEMBER_COUNT} in voice")
+    print(f"{'mode':>10} {'cached':>8} {'RSS growth MB':>14}")
+    for label, lowMemory in (("default", False), ("low", True)):
+        results = context.Queue()
+        process = context.Process(target=measure, args=(lowMemory, results))
+        process.start()
+        process.join()
+        if process.exitcode != 0:
+            sys.exit(f"{label} measurement failed")
+        cached, growth = results.get()
+        print(f"{label:>10} {cached:>8} {growth / 2**20:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+pytest-benchmark suite for tournament generation and the bot's handlers.
+
+These are not collected by a plain `python -m pytest`. Run them against the
+stored baseline, failing on regressions, with:
+
+    python -m benchmarks
+
+and replace the baseline after an intended change with:
+
+    python -m benchmarks --save
+"""
+import asyncio
+import itertools
+import random
+from unittest.mock import AsyncMock, Mock
+
+import discord
+import pytest
+
+from src.bracket import createBracket, formatMatches
+from src.compute import InlineCompute
+from src.player import Player, playerNames
+from src.ratings import RATING_PERIOD, rateHistory
+from src.sessionRegistry import TournamentSession
+from src.tournament import teamCreator, teamSizes, tournamentGenerator
+from src.tourneyBot import DudeBot, formatTeams
+
+PLAYER_COUNTS = [8, 64, 512, 2048, 10000]
+BOT_ID = 1
+
+
+def makePlayers(count):
+    return [Player(i, f"Player{i}") for i in range(count)]
+
+
+def makeTeams(count):
+    players = list(range(count))
+    teams, start = [], 0
+    for size in teamSizes(count, 2 if count == 8 else 3):
+        teams.append(players[start : start + size])
+        start += size
+    return teams
+
+
+def makeMember(player):
+    member = Mock(spec=discord.Member)
+    member.name = player.name
+    member.id = player.id
+    return member
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def client(loop):
+    client = DudeBot(compute=InlineCompute())
+    client.bot_id = BOT_ID
+    return client
+
+
+@pytest.mark.parametrize("count", PLAYER_COUNTS)
+def test_team_creator(benchmark, count):
+    players = list(range(count))
+    benchmark(teamCreator, players)
+
+
+@pytest.mark.parametrize("count", PLAYER_COUNTS)
+def test_team_creator_balanced(benchmark, count):
+    rng = random.Random(0)
+    players = list(range(count))
+    ratings = {player: rng.gauss(1000, 300) for player in players}
+    benchmark(teamCreator, players, None, ratings)
+
+
+@pytest.mark.parametrize("count", PLAYER_COUNTS)
+def test_tournament_generator(benchmark, count):
+    teams = makeTeams(count)
+    benchmark(tournamentGenerator, teams)
+
+
+@pytest.mark.parametrize("count", PLAYER_COUNTS)
+def test_format_teams(benchmark, count):
+    teams = makeTeams(count)
+    names = playerNames(makePlayers(count))
+    benchmark(formatTeams, teams, names)
+
+
+@pytest.mark.parametrize("count", PLAYER_COUNTS)
+def test_single_elimination_bracket(benchmark, count):
+    teams = makeTeams(count)
+    benchmark(lambda: formatMatches(createBracket(teams)))
+
+
+@pytest.mark.parametrize("tournaments", [10, 100, 1000])
+def test_rate_history(benchmark, tournaments):
+    # Weekly 12 player tournaments from a pool of 200, each a 2v2 single elimination
+    rng = random.Random(0)
+    periods = []
+    for week in range(tournaments):
+        players = rng.sample(range(200), 12)
+        teams = [players[i : i + 2] for i in range(0, 12, 2)]
+        periods.append(
+            (week * RATING_PERIOD, [[teams[i], teams[i + 1]] for i in range(0, 6, 2)])
+        )
+    benchmark(rateHistory, periods)
+
+
+@pytest.mark.parametrize("count", PLAYER_COUNTS)
+def test_on_message_create(benchmark, client, loop, count):
+    message = Mock(spec=discord.Message)
+    message.mentions = [Mock(id=BOT_ID)]
+    message.content = f"<@{BOT_ID}> create"
+    message.guild = Mock(id=1)
+    message.author = Mock(spec=discord.Member)
+    message.author.voice.channel.members = [
+        makeMember(player) for player in makePlayers(count)
+    ]
+    message.channel = AsyncMock()
+    message.channel.id = 2
+    message.channel.send.return_value = Mock(id=3, add_reaction=AsyncMock())
+    # A new author each time, so the create cooldown never applies
+    authors = itertools.count()
+
+    def create():
+        message.author.id = next(authors)
+        loop.run_until_complete(client.on_message(message))
+
+    benchmark(create)
+
+
+def test_on_message_ignored(benchmark, client, loop):
+    message = Mock(spec=discord.Message)
+    message.mentions = []
+    message.content = "just chatting " * 100
+    benchmark(lambda: loop.run_until_complete(client.on_message(message)))
+
+
+@pytest.mark.parametrize("count", PLAYER_COUNTS)
+def test_on_raw_reaction_add_reroll(benchmark, client, loop, count):
+    players = makePlayers(count)
+    session = TournamentSession(
+        guild_id=1,
+        channel_id=2,
+        message_id=3,
+        creator_id=4,
+        players=players,
+        teams=makeTeams(count),
+    )
+    client.sessions.add(session)
+    message = AsyncMock()
+    message.id = 3
+    message.channel.id = 2
+    message.channel.get_partial_message = Mock(return_value=message)
+    client.get_partial_messageable = Mock(return_value=message.channel)
+    payload = Mock(spec=discord.RawReactionActionEvent)
+    payload.guild_id, payload.channel_id, payload.message_id = 1, 2, 3
+    payload.user_id = 4
+    payload.emoji = discord.PartialEmoji(name="🔁")
+
+    benchmark(lambda: loop.run_until_complete(client.on_raw_reaction_add(payload)))
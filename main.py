@@ -1,7 +1,33 @@
 from src.tourneyBot import DudeBot
+from src.storage import SQLiteStorage
+from src.sharding import launch
+from src.compute import ExecutorCompute
 import os
+import sys
 from dotenv import load_dotenv
 
-load_dotenv()
-client = DudeBot()
-client.run(os.getenv("DISCORD_TOKEN"))
+if __name__ == "__main__":
+    load_dotenv()
+    db_path = os.getenv("TOURNEYBOT_DB", "tourneybot.db")
+    options = {
+        "low_memory": os.getenv("TOURNEYBOT_LOW_MEMORY") == "1",
+        "use_buttons": os.getenv("TOURNEYBOT_BUTTONS") == "1",
+        # "thread" (the default) or "process"
+        "compute": ExecutorCompute(kind=os.getenv("TOURNEYBOT_COMPUTE", "thread")),
+    }
+    if os.getenv("TOURNEYBOT_METRICS_PORT"):
+        # Served at http://127.0.0.1:<port>/metrics
+        options["metrics_port"] = int(os.getenv("TOURNEYBOT_METRICS_PORT"))
+    if os.getenv("TOURNEYBOT_SHARDS"):
+        # Spread the shards across worker processes sharing the database
+        sys.exit(
+            launch(
+                os.getenv("DISCORD_TOKEN"),
+                int(os.getenv("TOURNEYBOT_SHARDS")),
+                int(os.getenv("TOURNEYBOT_PROCESSES", "1")),
+                db_path,
+                **options,
+            )
+        )
+    client = DudeBot(storage=SQLiteStorage(db_path), **options)
+    client.run(os.getenv("DISCORD_TOKEN"))
@@ -0,0 +1,520 @@
+import math
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Dict, List, Mapping, Optional, Sequence, Set, Tuple, Type
+
+from src.tournament import InvalidTournamentException, formatTeam
+
+# Stand-in for a missing opponent; a team drawn against BYE advances automatically
+BYE = -1
+
+WINNER = "winner"
+LOSER = "loser"
+
+# Where a match slot gets its team from: (WINNER or LOSER, source match id)
+Source = Tuple[str, int]
+
+
+class Match:
+    """
+    A single game between two teams.
+
+    Attributes:
+        id (int): The position of the match in its bracket.
+        stage (str): The part of the bracket the match belongs to, e.g. "winners" or "losers".
+        round (int): The round of the stage the match is played in, starting at 1.
+        sides (list[Optional[int]]): The two team indices, BYE, or None while still undecided.
+        winner (Optional[int]): The winning team index once the match is decided.
+        loser (Optional[int]): The losing team index once the match is decided.
+        scores (Optional[tuple[int, int]]): The reported scores, in the same order as sides.
+    """
+
+    __slots__ = ("id", "stage", "round", "sides", "winner", "loser", "scores")
+
+    def __init__(self, id: int, stage: str, round: int, sides: Sequence[Optional[int]]):
+        self.id = id
+        self.stage = stage
+        self.round = round
+        self.sides: List[Optional[int]] = list(sides)
+        self.winner: Optional[int] = None
+        self.loser: Optional[int] = None
+        self.scores: Optional[Tuple[int, int]] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.sides[0] is not None and self.sides[1] is not None
+
+    @property
+    def done(self) -> bool:
+        return self.winner is not None
+
+    @property
+    def is_bye(self) -> bool:
+        return BYE in self.sides
+
+
+class Bracket(ABC):
+    """
+    Base class for tournament brackets.
+
+    Matches are created up front or round by round by subclasses. Reporting a
+    result only touches the matches fed by the one that finished, so finding
+    the next games to play never regenerates the bracket.
+
+    Attributes:
+        teams (list[list[int]]): The teams in seed order, as lists of player IDs.
+        matches (list[Match]): Every match created so far, indexed by match id.
+        wins (list[int]): Matches won per team, excluding byes.
+        losses (list[int]): Matches lost per team, excluding byes.
+        results (list[tuple]): Reported results in order, as (match id, winner, scores).
+    """
+
+    format = ""
+
+    def __init__(self, teams: List[List[int]]):
+        if len(teams) < 2:
+            raise InvalidTournamentException("Need at least 2 teams for a bracket")
+        self.teams = teams
+        self.matches: List[Match] = []
+        self.wins = [0] * len(teams)
+        self.losses = [0] * len(teams)
+        self.results: List[Tuple[int, int, Optional[Tuple[int, int]]]] = []
+        self._feeds: Dict[int, List[Tuple[int, int, str]]] = defaultdict(list)
+        # Matches with both teams known and no result yet, in creation order
+        self._pending: Dict[int, Match] = {}
+
+    @property
+    @abstractmethod
+    def champion(self) -> Optional[int]:
+        """The index of the winning team once the bracket is finished."""
+
+    @property
+    def finished(self) -> bool:
+        return self.champion is not None
+
+    def pending_matches(self) -> List[Match]:
+        """
+        Get the matches that can be played now.
+
+        Returns:
+            list[Match]: Matches with both teams decided and no result yet.
+        """
+        return list(self._pending.values())
+
+    def report_result(
+        self, match_id: int, winner: int, scores: Optional[Tuple[int, int]] = None
+    ) -> List[Match]:
+        """
+        Record the result of a match and advance the teams.
+
+        Args:
+            match_id (int): The ID of the match.
+            winner (int): The index of the winning team.
+            scores (Optional[tuple[int, int]]): The scores, in the same order as the match sides.
+
+        Returns:
+            list[Match]: The matches that became playable as a result.
+
+        Raises:
+            InvalidTournamentException: If the match is not awaiting a result or the team is not playing in it.
+        """
+        if match_id not in self._pending:
+            raise InvalidTournamentException("Match is not awaiting a result")
+        match = self._pending[match_id]
+        if winner not in match.sides:
+            raise InvalidTournamentException("Team is not playing in this match")
+
+        before = set(self._pending)
+        self.results.append((match_id, winner, scores))
+        self._complete(match, winner, scores)
+        return [m for m_id, m in self._pending.items() if m_id not in before]
+
+    def _add_match(
+        self,
+        stage: str,
+        round: int,
+        sides: Sequence[Optional[int]] = (None, None),
+        sources: Sequence[Optional[Source]] = (None, None),
+    ) -> Match:
+        match = Match(len(self.matches), stage, round, sides)
+        self.matches.append(match)
+        for slot, source in enumerate(sources):
+            if source is not None:
+                outcome, source_id = source
+                self._feeds[source_id].append((match.id, slot, outcome))
+        self._on_ready(match)
+        return match
+
+    def _on_ready(self, match: Match) -> None:
+        if not match.ready:
+            return
+        if match.is_bye:
+            # Byes resolve immediately; two byes produce a bye
+            winner = match.sides[1] if match.sides[0] == BYE else match.sides[0]
+            assert winner is not None
+            self._complete(match, winner, None)
+        else:
+            self._pending[match.id] = match
+
+    def _complete(
+        self, match: Match, winner: int, scores: Optional[Tuple[int, int]]
+    ) -> None:
+        loser = match.sides[1] if match.sides[0] == winner else match.sides[0]
+        assert loser is not None
+        match.winner = winner
+        match.loser = loser
+        match.scores = scores
+        self._pending.pop(match.id, None)
+        if winner != BYE and loser != BYE:
+            self.wins[winner] += 1
+            self.losses[loser] += 1
+
+        for target_id, slot, outcome in self._feeds.pop(match.id, ()):
+            target = self.matches[target_id]
+            target.sides[slot] = winner if outcome == WINNER else loser
+            self._on_ready(target)
+        self._on_match_complete(match)
+
+    def _on_match_complete(self, match: Match) -> None:
+        pass
+
+
+def seedOrder(size: int) -> List[int]:
+    """
+    Get the standard bracket order of seeds, so top seeds meet as late as possible.
+
+    Args:
+        size (int): The number of bracket slots, a power of two.
+
+    Returns:
+        list[int]: Zero-based seeds in slot order, e.g. [0, 3, 1, 2] for four slots.
+    """
+    order = [0]
+    while len(order) < size:
+        slots = len(order) * 2
+        order = [seed for top in order for seed in (top, slots - 1 - top)]
+    return order
+
+
+class SingleEliminationBracket(Bracket):
+    """
+    A knockout bracket. Missing slots in the first round are filled with byes
+    for the top seeds.
+
+    Attributes:
+        rounds (list[list[Match]]): The matches of each round.
+        final (Match): The match deciding the champion.
+    """
+
+    format = "single"
+
+    def __init__(self, teams: List[List[int]]):
+        super().__init__(teams)
+        self.final = self._build_elimination("winners")
+        self._seed_first_round()
+
+    @property
+    def champion(self) -> Optional[int]:
+        return self.final.winner
+
+    def _build_elimination(self, stage: str) -> Match:
+        # Every round is created before seeding so byes can advance straight
+        # into later rounds
+        rounds = math.ceil(math.log2(len(self.teams)))
+        self.rounds: List[List[Match]] = [
+            [self._add_match(stage, 1) for _ in range(1 << (rounds - 1))]
+        ]
+        for round in range(2, rounds + 1):
+            previous = self.rounds[-1]
+            self.rounds.append(
+                [
+                    self._add_match(
+                        stage,
+                        round,
+                        sources=(
+                            (WINNER, previous[i].id),
+                            (WINNER, previous[i + 1].id),
+                        ),
+                    )
+                    for i in range(0, len(previous), 2)
+                ]
+            )
+        return self.rounds[-1][0]
+
+    def _seed_first_round(self) -> None:
+        order = seedOrder(2 * len(self.rounds[0]))
+        for i, match in enumerate(self.rounds[0]):
+            match.sides = [
+                seed if seed < len(self.teams) else BYE
+                for seed in (order[2 * i], order[2 * i + 1])
+            ]
+            self._on_ready(match)
+
+
+class DoubleEliminationBracket(SingleEliminationBracket):
+    """
+    A bracket where teams are only knocked out after their second loss.
+
+    Losers of each winners round drop into the losers bracket, and the
+    winners and losers champions meet in the grand final. If the losers
+    champion wins it, the winners champion has only lost once, so the two
+    play a reset match that decides the champion.
+
+    Attributes:
+        losers_rounds (list[list[Match]]): The matches of each losers bracket round.
+        final (Match): The grand final, or the reset match once it is needed.
+    """
+
+    format = "double"
+
+    def __init__(self, teams: List[List[int]]):
+        Bracket.__init__(self, teams)
+        winners_final = self._build_elimination("winners")
+        self.losers_rounds: List[List[Match]] = []
+
+        # Losers of the first winners round play each other
+        dropped: List[Source] = [(LOSER, match.id) for match in self.rounds[0]]
+        if len(dropped) == 1:
+            losers_champion = dropped[0]
+        else:
+            self._add_losers_round(
+                [(dropped[i], dropped[i + 1]) for i in range(0, len(dropped), 2)]
+            )
+            for winners_round in self.rounds[1:]:
+                # Survivors face the teams dropping from the next winners round,
+                # in reverse order to avoid immediate rematches
+                survivors = [(WINNER, match.id) for match in self.losers_rounds[-1]]
+                dropped = [(LOSER, match.id) for match in reversed(winners_round)]
+                self._add_losers_round(list(zip(survivors, dropped)))
+                if len(survivors) > 1:
+                    survivors = [(WINNER, match.id) for match in self.losers_rounds[-1]]
+                    self._add_losers_round(
+                        [
+                            (survivors[i], survivors[i + 1])
+                            for i in range(0, len(survivors), 2)
+                        ]
+                    )
+            losers_champion = (WINNER, self.losers_rounds[-1][0].id)
+
+        self.final = self._add_match(
+            "final", 1, sources=((WINNER, winners_final.id), losers_champion)
+        )
+        self._seed_first_round()
+
+    def _add_losers_round(self, pairs: List[Tuple[Source, Source]]) -> None:
+        round = len(self.losers_rounds) + 1
+        self.losers_rounds.append(
+            [self._add_match("losers", round, sources=pair) for pair in pairs]
+        )
+
+    def _on_match_complete(self, match: Match) -> None:
+        if match is self.final and match.round == 1 and match.winner == match.sides[1]:
+            self.final = self._add_match("final", 2, sides=match.sides)
+
+
+class RoundBasedBracket(Bracket):
+    """
+    Base class for brackets that pair the next round once every match of the
+    current round has a result.
+
+    Attributes:
+        total_rounds (int): The number of rounds to play.
+        round (int): The round currently being played.
+    """
+
+    def __init__(self, teams: List[List[int]], total_rounds: int):
+        super().__init__(teams)
+        self.total_rounds = total_rounds
+        self.round = 0
+        self._pairing = False
+
+    @property
+    def champion(self) -> Optional[int]:
+        if self._pending or self.round < self.total_rounds:
+            return None
+        return max(range(len(self.teams)), key=lambda team: (self.wins[team], -team))
+
+    def _next_round(self) -> None:
+        self.round += 1
+        # Byes complete while the round is being paired, which must not
+        # trigger pairing the round after it
+        self._pairing = True
+        self._pair_round()
+        self._pairing = False
+        if not self._pending and self.round < self.total_rounds:
+            self._next_round()
+
+    @abstractmethod
+    def _pair_round(self) -> None:
+        """Create the matches of the current round."""
+
+    def _on_match_complete(self, match: Match) -> None:
+        if not self._pairing and not self._pending and self.round < self.total_rounds:
+            self._next_round()
+
+
+class RoundRobinBracket(RoundBasedBracket):
+    """
+    Every team plays every other team once, one round at a time. With an odd
+    number of teams one team sits out each round.
+    """
+
+    format = "roundrobin"
+
+    def __init__(self, teams: List[List[int]]):
+        seeds: List[int] = list(range(len(teams)))
+        if len(seeds) % 2:
+            seeds.append(BYE)
+        super().__init__(teams, len(seeds) - 1)
+        # Circle method: keep the first seed fixed and rotate the rest
+        self._rotation = seeds
+        self._next_round()
+
+    def _pair_round(self) -> None:
+        seeds = self._rotation
+        for i in range(len(seeds) // 2):
+            self._add_match("main", self.round, (seeds[i], seeds[-1 - i]))
+        self._rotation = [seeds[0], seeds[-1]] + seeds[1:-1]
+
+
+class SwissBracket(RoundBasedBracket):
+    """
+    A fixed number of rounds where teams with similar records are paired
+    against opponents they have not played yet. Points are updated as
+    results come in, so pairing a round only sorts the current standings.
+
+    Attributes:
+        points (list[int]): Points per team, one per win or bye.
+    """
+
+    format = "swiss"
+
+    def __init__(self, teams: List[List[int]], rounds: Optional[int] = None):
+        super().__init__(teams, rounds or math.ceil(math.log2(len(teams))))
+        self.points = [0] * len(teams)
+        self._played: Set[Tuple[int, int]] = set()
+        self._had_bye: Set[int] = set()
+        self._next_round()
+
+    @property
+    def champion(self) -> Optional[int]:
+        if self._pending or self.round < self.total_rounds:
+            return None
+        return max(range(len(self.teams)), key=lambda team: (self.points[team], -team))
+
+    def _pair_round(self) -> None:
+        ranked = sorted(
+            range(len(self.teams)), key=lambda team: (-self.points[team], team)
+        )
+
+        if len(ranked) % 2:
+            # The lowest ranked team that has not had a bye sits out
+            bye_team = next(
+                (t for t in reversed(ranked) if t not in self._had_bye), ranked[-1]
+            )
+            ranked.remove(bye_team)
+            self._had_bye.add(bye_team)
+            self._add_match("main", self.round, (bye_team, BYE))
+
+        while ranked:
+            team = ranked.pop(0)
+            opponent = next(
+                (
+                    other
+                    for other in ranked
+                    if (min(team, other), max(team, other)) not in self._played
+                ),
+                ranked[0],
+            )
+            ranked.remove(opponent)
+            self._add_match("main", self.round, (team, opponent))
+
+    def _on_match_complete(self, match: Match) -> None:
+        assert match.winner is not None
+        if match.winner != BYE:
+            self.points[match.winner] += 1
+        if not match.is_bye:
+            a, b = match.sides
+            assert a is not None and b is not None
+            self._played.add((min(a, b), max(a, b)))
+        super()._on_match_complete(match)
+
+
+BRACKET_TYPES: Tuple[Type[Bracket], ...] = (
+    SingleEliminationBracket,
+    DoubleEliminationBracket,
+    RoundRobinBracket,
+    SwissBracket,
+)
+BRACKET_FORMATS = {bracket.format: bracket for bracket in BRACKET_TYPES}
+
+
+def createBracket(teams: List[List[int]], format: str = "single") -> Bracket:
+    """
+    Create a bracket of the given format.
+
+    Args:
+        teams (list[list[int]]): The teams in seed order, as lists of player IDs.
+        format (str): One of "single", "double", "roundrobin" or "swiss".
+
+    Returns:
+        Bracket: The new bracket.
+
+    Raises:
+        InvalidTournamentException: If the format is unknown or there are too few teams.
+    """
+    if format not in BRACKET_FORMATS:
+        raise InvalidTournamentException(f"Unknown bracket format: {format}")
+    return BRACKET_FORMATS[format](teams)
+
+
+def restoreBracket(
+    teams: List[List[int]], format: str, results: List[Sequence]
+) -> Bracket:
+    """
+    Rebuild a bracket by replaying its reported results.
+
+    Args:
+        teams (list[list[int]]): The teams in seed order, as lists of player IDs.
+        format (str): The bracket format.
+        results (list[Sequence]): The bracket's results, as stored from Bracket.results.
+
+    Returns:
+        Bracket: A bracket in the same state as the original.
+    """
+    bracket = createBracket(teams, format)
+    for match_id, winner, scores in results:
+        bracket.report_result(
+            match_id, winner, (scores[0], scores[1]) if scores is not None else None
+        )
+    return bracket
+
+
+def formatMatches(
+    bracket: Bracket,
+    matches: Optional[List[Match]] = None,
+    names: Optional[Mapping[int, str]] = None,
+) -> str:
+    """
+    Render matches as one "Team A vs Team B" line each.
+
+    Args:
+        bracket (Bracket): The bracket the matches belong to.
+        matches (Optional[list[Match]]): The matches to render. Defaults to the pending matches.
+        names (Optional[Mapping[int, str]]): Player names by ID, used to render the teams.
+
+    Returns:
+        str: The rendered matches.
+    """
+    if matches is None:
+        matches = bracket.pending_matches()
+    lines = []
+    for match in matches:
+        home, away = (
+            formatTeam(bracket.teams[side], names)
+            if side is not None and side != BYE
+            else "BYE"
+            for side in match.sides
+        )
+        lines.append(f"Match {match.id + 1}: {home} vs {away}")
+    return "\n".join(lines)
@@ -0,0 +1,213 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import discord
+
+Handler = Callable[[discord.Message, List[str]], Awaitable[Any]]
+
+
+class CommandUsageException(Exception):
+    pass
+
+
+class PrefixCommand:
+    """
+    A command invoked by mentioning the bot, e.g. "@TourneyBot create 3".
+
+    Attributes:
+        name (str): The command's name.
+        handler (Callable): Called with the message and the command's arguments.
+        aliases (Tuple[str, ...]): Other names the command can be invoked by.
+        min_args (int): The minimum number of arguments.
+        max_args (int): The maximum number of arguments.
+        cooldown (float): Seconds a user must wait between uses of the command.
+        usage (str): The command's arguments, as shown in error messages.
+        description (str): A one line description for help messages.
+    """
+
+    __slots__ = (
+        "name",
+        "handler",
+        "aliases",
+        "min_args",
+        "max_args",
+        "cooldown",
+        "usage",
+        "description",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        handler: Handler,
+        aliases: Iterable[str] = (),
+        min_args: int = 0,
+        max_args: int = 0,
+        cooldown: float = 0.0,
+        usage: str = "",
+        description: str = "",
+    ):
+        self.name = name
+        self.handler = handler
+        self.aliases = tuple(aliases)
+        self.min_args = min_args
+        self.max_args = max_args
+        self.cooldown = cooldown
+        self.usage = usage
+        self.description = description
+
+    @property
+    def signature(self) -> str:
+        return f"{self.name} {self.usage}".rstrip()
+
+
+class CommandRegistry:
+    """
+    Routes bot mentions to registered commands.
+
+    Commands and their aliases share one dict, so a message is routed with a
+    single lookup once its command name has been split off. Only as much of
+    the message as the command accepts is split.
+
+    Attributes:
+        commands (List[PrefixCommand]): The registered commands, in registration order.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.commands: List[PrefixCommand] = []
+        self._clock = clock
+        self._names: Dict[str, PrefixCommand] = {}
+        # (command name, user ID) -> time the user may next use the command
+        self._cooldowns: "OrderedDict[Tuple[str, Any], float]" = OrderedDict()
+
+    def add(self, command: PrefixCommand) -> PrefixCommand:
+        """
+        Register a command under its name and aliases.
+
+        Args:
+            command (PrefixCommand): The command to register.
+
+        Returns:
+            PrefixCommand: The registered command.
+
+        Raises:
+            ValueError: If the name or an alias is already taken.
+        """
+        names = [command.name, *command.aliases]
+        for name in names:
+            if name.lower() in self._names:
+                raise ValueError(f"Command name already registered: {name}")
+        for name in names:
+            self._names[name.lower()] = command
+        self.commands.append(command)
+        return command
+
+    def get(self, name: str) -> Optional[PrefixCommand]:
+        """
+        Look up a command by name or alias.
+
+        Args:
+            name (str): The name, in any case.
+
+        Returns:
+            Optional[PrefixCommand]: The command, or None if there is no such command.
+        """
+        return self._names.get(name.lower())
+
+    def parse(self, content: str) -> Optional[Tuple[PrefixCommand, List[str]]]:
+        """
+        Split a message addressed to the bot into a command and its arguments.
+
+        Args:
+            content (str): The message content, starting with the bot's mention.
+
+        Returns:
+            Optional[Tuple[PrefixCommand, List[str]]]: The command and its arguments,
+                or None if the message does not name a command.
+
+        Raises:
+            CommandUsageException: If the command is given the wrong number of arguments.
+        """
+        # The mention, the command name and everything after it
+        parts = content.split(None, 2)
+        if len(parts) < 2:
+            return None
+        command = self._names.get(parts[1].lower())
+        if command is None:
+            return None
+
+        # Split one extra argument at most, which is enough to reject long inputs
+        args = parts[2].split(None, command.max_args) if len(parts) > 2 else []
+        if not command.min_args <= len(args) <= command.max_args:
+            raise CommandUsageException(f"Usage: {command.signature}")
+        return command, args
+
+    def check_cooldown(self, command: PrefixCommand, user_id: Any) -> None:
+        """
+        Record a use of a command, unless the user is still on cooldown.
+
+        Args:
+            command (PrefixCommand): The command being used.
+            user_id (Any): The ID of the user using it.
+
+        Raises:
+            CommandUsageException: If the user used the command too recently.
+        """
+        if command.cooldown <= 0:
+            return
+        now = self._clock()
+        key = (command.name, user_id)
+        ready_at = self._cooldowns.get(key, 0.0)
+        if ready_at > now:
+            raise CommandUsageException(
+                f"Slow down! Try {command.name} again in {math.ceil(ready_at - now)}s."
+            )
+
+        self._cooldowns.pop(key, None)
+        self._cooldowns[key] = now + command.cooldown
+        # Entries are roughly ordered by expiry, so drop expired ones from the front
+        while self._cooldowns:
+            oldest_key, oldest_ready_at = next(iter(self._cooldowns.items()))
+            if oldest_ready_at > now:
+                break
+            del self._cooldowns[oldest_key]
+
+    def reset_cooldown(self, command: PrefixCommand, user_id: Any) -> None:
+        """
+        Forget a user's last use of a command, so they can use it again at once.
+
+        Args:
+            command (PrefixCommand): The command.
+            user_id (Any): The ID of the user.
+        """
+        self._cooldowns.pop((command.name, user_id), None)
+
+    async def dispatch(self, message: discord.Message) -> bool:
+        """
+        Run the command named in a message addressed to the bot.
+
+        A use that the handler rejects with a CommandUsageException does not
+        count towards the command's cooldown.
+
+        Args:
+            message (discord.Message): The message, starting with the bot's mention.
+
+        Returns:
+            bool: True if the message named a command and it was run.
+
+        Raises:
+            CommandUsageException: If the command was used incorrectly or too often.
+        """
+        parsed = self.parse(message.content)
+        if parsed is None:
+            return False
+        command, args = parsed
+        self.check_cooldown(command, message.author.id)
+        try:
+            await command.handler(message, args)
+        except CommandUsageException:
+            self.reset_cooldown(command, message.author.id)
+            raise
+        return True
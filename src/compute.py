@@ -0,0 +1,124 @@
+import asyncio
+import concurrent.futures
+import functools
+import multiprocessing
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Seconds a computation may take before the command gives up on it
+DEFAULT_COMPUTE_TIMEOUT = 10.0
+DEFAULT_MAX_WORKERS = 2
+
+
+class ComputeTimeoutException(Exception):
+    pass
+
+
+class ComputeBackend(ABC):
+    """
+    Runs CPU-heavy tournament computations, such as team balancing, so they
+    don't block the event loop.
+
+    Attributes:
+        timeout (Optional[float]): Seconds a computation may take, or None for no limit.
+    """
+
+    def __init__(self, timeout: Optional[float] = DEFAULT_COMPUTE_TIMEOUT):
+        self.timeout = timeout
+
+    @abstractmethod
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run a function and wait for its result.
+
+        Args:
+            func (Callable): The function. Must be picklable for process pools.
+            *args: Passed on to func.
+            **kwargs: Passed on to func.
+
+        Returns:
+            The function's result.
+
+        Raises:
+            ComputeTimeoutException: If the function did not finish within the timeout.
+        """
+
+    def close(self) -> None:
+        """
+        Release any workers held by the backend.
+        """
+
+
+class InlineCompute(ComputeBackend):
+    """
+    Runs computations directly on the event loop. Only suitable for small
+    inputs and tests; the timeout is not enforced.
+    """
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return func(*args, **kwargs)
+
+
+class ExecutorCompute(ComputeBackend):
+    """
+    Runs computations in a thread or process pool.
+
+    Threads are cheap to start but share the GIL with the event loop, so a
+    pure Python computation still slows the loop down a little. Processes
+    keep the loop completely free, at the cost of pickling the arguments and
+    results.
+
+    A computation that times out or whose caller is cancelled is cancelled
+    too if it has not started. A computation that is already running is
+    left to finish in the background, since neither threads nor pool
+    processes can be interrupted, and its result is discarded.
+
+    Attributes:
+        kind (str): "thread" or "process".
+        max_workers (int): The number of computations that can run at once.
+        timeout (Optional[float]): Seconds a computation may take, or None for no limit.
+    """
+
+    def __init__(
+        self,
+        kind: str = "thread",
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        timeout: Optional[float] = DEFAULT_COMPUTE_TIMEOUT,
+    ):
+        super().__init__(timeout)
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown compute backend: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self._executor: Optional[concurrent.futures.Executor] = None
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        future = asyncio.get_running_loop().run_in_executor(
+            self._get_executor(), functools.partial(func, *args, **kwargs)
+        )
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            raise ComputeTimeoutException(
+                f"Gave up after {self.timeout:g} seconds"
+            ) from None
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> concurrent.futures.Executor:
+        # Created on first use so importing or constructing the bot stays cheap
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    self.max_workers, thread_name_prefix="compute"
+                )
+        return self._executor
@@ -0,0 +1,144 @@
+from typing import Any, Dict, FrozenSet, Iterable, Optional
+
+import discord
+
+
+class GuildConfig:
+    """
+    Role settings for a single guild.
+
+    Attributes:
+        guild_id (int): The ID of the guild.
+        admin_role_ids (FrozenSet[int]): Roles allowed to use admin commands.
+        setup_role_id (Optional[int]): The role given to members awaiting set up.
+    """
+
+    __slots__ = ("guild_id", "admin_role_ids", "setup_role_id")
+
+    def __init__(
+        self,
+        guild_id: int,
+        admin_role_ids: Iterable[int],
+        setup_role_id: Optional[int],
+    ):
+        self.guild_id = guild_id
+        self.admin_role_ids: FrozenSet[int] = frozenset(admin_role_ids)
+        self.setup_role_id = setup_role_id
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "guild_id": self.guild_id,
+            "admin_role_ids": sorted(self.admin_role_ids),
+            "setup_role_id": self.setup_role_id,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "GuildConfig":
+        return cls(data["guild_id"], data["admin_role_ids"], data["setup_role_id"])
+
+
+class GuildConfigCache:
+    """
+    Per-guild role settings.
+
+    Guilds without their own settings use the defaults. Admin and setup
+    checks compare the member's current roles, as sent with each event or
+    interaction, against the guild's role ID sets, so role changes apply
+    immediately.
+
+    Attributes:
+        default_admin_role_ids (FrozenSet[int]): Admin roles for guilds without their own settings.
+        default_setup_role_id (Optional[int]): Setup role for guilds without their own settings.
+    """
+
+    def __init__(
+        self,
+        default_admin_role_ids: Iterable[int],
+        default_setup_role_id: Optional[int],
+    ):
+        self.default_admin_role_ids: FrozenSet[int] = frozenset(default_admin_role_ids)
+        self.default_setup_role_id = default_setup_role_id
+        self._configs: Dict[int, GuildConfig] = {}
+
+    def get(self, guild_id: int) -> GuildConfig:
+        """
+        Get a guild's role settings.
+
+        Args:
+            guild_id (int): The ID of the guild.
+
+        Returns:
+            GuildConfig: The guild's settings, or the defaults if it has none.
+        """
+        config = self._configs.get(guild_id)
+        if config is None:
+            config = GuildConfig(
+                guild_id, self.default_admin_role_ids, self.default_setup_role_id
+            )
+        return config
+
+    def set(self, config: GuildConfig) -> None:
+        """
+        Replace a guild's role settings.
+
+        Args:
+            config (GuildConfig): The new settings.
+        """
+        self._configs[config.guild_id] = config
+
+    def is_admin(self, member: discord.Member) -> bool:
+        """
+        Check whether a member may use admin commands.
+
+        Args:
+            member (discord.Member): The member.
+
+        Returns:
+            bool: True if the member has one of the guild's admin roles.
+        """
+        admin_role_ids = self.get(member.guild.id).admin_role_ids
+        return any(role.id in admin_role_ids for role in member.roles)
+
+    def has_setup_role(self, member: discord.Member) -> bool:
+        """
+        Check whether a member is still awaiting set up.
+
+        Args:
+            member (discord.Member): The member.
+
+        Returns:
+            bool: True if the member has the guild's setup role.
+        """
+        setup_role_id = self.get(member.guild.id).setup_role_id
+        return setup_role_id is not None and any(
+            role.id == setup_role_id for role in member.roles
+        )
+
+    def setup_role(self, guild: discord.Guild) -> Optional[discord.Role]:
+        """
+        Get a guild's setup role.
+
+        Args:
+            guild (discord.Guild): The guild.
+
+        Returns:
+            Optional[discord.Role]: The role, or None if it is not configured or no longer exists.
+        """
+        setup_role_id = self.get(guild.id).setup_role_id
+        return guild.get_role(setup_role_id) if setup_role_id is not None else None
+
+    def remove_role(self, guild_id: int, role_id: int) -> None:
+        """
+        Drop a deleted role from a guild's settings.
+
+        Args:
+            guild_id (int): The ID of the guild.
+            role_id (int): The ID of the deleted role.
+        """
+        config = self._configs.get(guild_id)
+        if config is not None:
+            self._configs[guild_id] = GuildConfig(
+                guild_id,
+                config.admin_role_ids - {role_id},
+                None if config.setup_role_id == role_id else config.setup_role_id,
+            )
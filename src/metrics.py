@@ -0,0 +1,417 @@
+import asyncio
+import bisect
+import functools
+import re
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+from aiohttp import web
+import discord
+from discord import app_commands
+
+# Upper bounds, in seconds, of the latency histogram buckets
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_LAG_INTERVAL = 0.5
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Path segments that vary per request and would make a label per message
+_SNOWFLAKE = re.compile(r"/\d{15,}")
+_REACTION = re.compile(r"/reactions/[^/]+")
+_TOKEN = re.compile(r"/[A-Za-z0-9_\-.]{40,}")
+
+
+def routeTemplate(path: str) -> str:
+    """
+    Turn a Discord API path into a route label, e.g.
+    /api/v10/channels/123/messages becomes /channels/{id}/messages.
+
+    Args:
+        path (str): The request path.
+
+    Returns:
+        str: The path with IDs, interaction tokens and emojis replaced by placeholders.
+    """
+    path = path.split("/api/v", 1)[-1]
+    path = path[path.find("/") :] if "/" in path else path
+    path = _REACTION.sub("/reactions/{emoji}", path)
+    path = _SNOWFLAKE.sub("/{id}", path)
+    return _TOKEN.sub("/{token}", path)
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self, bucket_count: int):
+        self.counts = [0] * bucket_count
+        self.total = 0.0
+        self.count = 0
+
+
+class Metrics:
+    """
+    Counters, gauges and latency histograms, rendered in the Prometheus text format.
+
+    Attributes:
+        buckets (Tuple[float, ...]): Upper bounds of the histogram buckets, in seconds.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._gauges: Dict[str, Dict[Labels, float]] = {}
+        self._gauge_callbacks: Dict[str, Callable[[], float]] = {}
+        self._histograms: Dict[str, Dict[Labels, _Histogram]] = {}
+
+    def describe(self, name: str, kind: str, help: str) -> None:
+        """
+        Set a metric's type and help text.
+
+        Args:
+            name (str): The metric's name.
+            kind (str): "counter", "gauge" or "histogram".
+            help (str): A one line description.
+        """
+        self._help[name] = (kind, help)
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1.0) -> None:
+        """
+        Add to a counter.
+
+        Args:
+            name (str): The counter's name.
+            labels (Labels): The counter's labels, as (name, value) pairs.
+            value (float): The amount to add.
+        """
+        series = self._counters.setdefault(name, {})
+        series[labels] = series.get(labels, 0.0) + value
+
+    def set(self, name: str, value: float, labels: Labels = ()) -> None:
+        """
+        Set a gauge.
+
+        Args:
+            name (str): The gauge's name.
+            value (float): The gauge's value.
+            labels (Labels): The gauge's labels, as (name, value) pairs.
+        """
+        self._gauges.setdefault(name, {})[labels] = value
+
+    def gauge_callback(self, name: str, callback: Callable[[], float]) -> None:
+        """
+        Register a gauge whose value is read when the metrics are rendered.
+
+        Args:
+            name (str): The gauge's name.
+            callback (Callable[[], float]): Returns the gauge's current value.
+        """
+        self._gauge_callbacks[name] = callback
+
+    def observe(self, name: str, value: float, labels: Labels = ()) -> None:
+        """
+        Record a value in a histogram.
+
+        Args:
+            name (str): The histogram's name.
+            value (float): The value, usually a duration in seconds.
+            labels (Labels): The histogram's labels, as (name, value) pairs.
+        """
+        series = self._histograms.setdefault(name, {})
+        histogram = series.get(labels)
+        if histogram is None:
+            histogram = series[labels] = _Histogram(len(self.buckets))
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            histogram.counts[index] += 1
+        histogram.total += value
+        histogram.count += 1
+
+    def value(self, name: str, labels: Labels = ()) -> float:
+        """
+        Read a counter or gauge.
+
+        Args:
+            name (str): The metric's name.
+            labels (Labels): The metric's labels.
+
+        Returns:
+            float: The current value, or 0 if it has not been recorded.
+        """
+        if name in self._gauge_callbacks:
+            return self._gauge_callbacks[name]()
+        for metrics in (self._counters, self._gauges):
+            if name in metrics:
+                return metrics[name].get(labels, 0.0)
+        histogram = self._histograms.get(name, {}).get(labels)
+        return histogram.count if histogram is not None else 0.0
+
+    def time_coroutine(
+        self,
+        duration_name: str,
+        errors_name: str,
+        labels: Labels,
+        func: Callable[..., Any],
+    ) -> Callable[..., Any]:
+        """
+        Wrap a coroutine function so each call is timed and failures are counted.
+
+        Args:
+            duration_name (str): The histogram for call durations.
+            errors_name (str): The counter for calls that raise.
+            labels (Labels): Labels for both metrics.
+            func (Callable): The coroutine function.
+
+        Returns:
+            Callable: The wrapped function.
+        """
+
+        @functools.wraps(func)
+        async def timed(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                self.inc(errors_name, labels)
+                raise
+            finally:
+                self.observe(duration_name, time.perf_counter() - start, labels)
+
+        return timed
+
+    def http_trace(self) -> aiohttp.TraceConfig:
+        """
+        Build an aiohttp trace config counting and timing HTTP requests by route.
+
+        Returns:
+            aiohttp.TraceConfig: Pass to discord.Client as http_trace.
+        """
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(
+            session: aiohttp.ClientSession,
+            context: SimpleNamespace,
+            params: aiohttp.TraceRequestStartParams,
+        ) -> None:
+            context.start = time.perf_counter()
+
+        async def on_request_end(
+            session: aiohttp.ClientSession,
+            context: SimpleNamespace,
+            params: aiohttp.TraceRequestEndParams,
+        ) -> None:
+            labels = (
+                ("method", params.method),
+                ("route", routeTemplate(params.url.path)),
+            )
+            status = params.response.status
+            self.inc(
+                "tourneybot_discord_requests_total", labels + (("status", str(status)),)
+            )
+            if status >= 400:
+                self.inc("tourneybot_discord_request_failures_total", labels)
+            self.observe(
+                "tourneybot_discord_request_duration_seconds",
+                time.perf_counter() - context.start,
+                labels,
+            )
+
+        async def on_request_exception(
+            session: aiohttp.ClientSession,
+            context: SimpleNamespace,
+            params: aiohttp.TraceRequestExceptionParams,
+        ) -> None:
+            labels = (
+                ("method", params.method),
+                ("route", routeTemplate(params.url.path)),
+            )
+            self.inc("tourneybot_discord_request_failures_total", labels)
+
+        trace.on_request_start.append(on_request_start)  # type: ignore[arg-type]
+        trace.on_request_end.append(on_request_end)  # type: ignore[arg-type]
+        trace.on_request_exception.append(on_request_exception)  # type: ignore[arg-type]
+        return trace
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics.
+        """
+        lines: List[str] = []
+
+        def header(name: str, default_kind: str) -> None:
+            kind, help = self._help.get(name, (default_kind, ""))
+            if help:
+                lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for name, series in sorted(self._counters.items()):
+            header(name, "counter")
+            for labels, value in series.items():
+                lines.append(f"{name}{_formatLabels(labels)} {value:g}")
+
+        gauges = {name: dict(series) for name, series in self._gauges.items()}
+        for name, callback in self._gauge_callbacks.items():
+            gauges.setdefault(name, {})[()] = callback()
+        for name, series in sorted(gauges.items()):
+            header(name, "gauge")
+            for labels, value in series.items():
+                lines.append(f"{name}{_formatLabels(labels)} {value:g}")
+
+        for name, histograms in sorted(self._histograms.items()):
+            header(name, "histogram")
+            for labels, histogram in histograms.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets, histogram.counts):
+                    cumulative += count
+                    bucket = labels + (("le", f"{bound:g}"),)
+                    lines.append(f"{name}_bucket{_formatLabels(bucket)} {cumulative}")
+                bucket = labels + (("le", "+Inf"),)
+                lines.append(f"{name}_bucket{_formatLabels(bucket)} {histogram.count}")
+                lines.append(f"{name}_sum{_formatLabels(labels)} {histogram.total:g}")
+                lines.append(f"{name}_count{_formatLabels(labels)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _formatLabels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (key, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+class MetricsCommandTree(app_commands.CommandTree):
+    """
+    A command tree that times slash commands and counts their failures.
+
+    Attributes:
+        metrics (Metrics): Where the timings are recorded.
+    """
+
+    def __init__(self, client: discord.Client, metrics: Metrics, **kwargs: Any):
+        super().__init__(client, **kwargs)
+        self.metrics = metrics
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        interaction.extras["metrics_start"] = time.perf_counter()
+        return True
+
+    async def on_error(
+        self, interaction: discord.Interaction, error: app_commands.AppCommandError
+    ) -> None:
+        self.record(interaction, failed=True)
+        await super().on_error(interaction, error)
+
+    def record(self, interaction: discord.Interaction, failed: bool = False) -> None:
+        """
+        Record how long a command took.
+
+        Args:
+            interaction (discord.Interaction): The command's interaction.
+            failed (bool): Whether the command raised.
+        """
+        start = interaction.extras.get("metrics_start")
+        command = interaction.command
+        labels = (("command", command.qualified_name if command else "unknown"),)
+        if failed:
+            self.metrics.inc("tourneybot_command_errors_total", labels)
+        if start is not None:
+            self.metrics.observe(
+                "tourneybot_command_duration_seconds",
+                time.perf_counter() - start,
+                labels,
+            )
+
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop wakes up from a sleep, which is how long
+    something blocked it.
+
+    Attributes:
+        metrics (Metrics): Where the lag is recorded.
+        interval (float): Seconds between measurements.
+    """
+
+    def __init__(self, metrics: Metrics, interval: float = DEFAULT_LAG_INTERVAL):
+        self.metrics = metrics
+        self.interval = interval
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    def start(self) -> None:
+        """
+        Start measuring. Must be called from the event loop.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stop measuring.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(time.perf_counter() - start - self.interval, 0.0)
+            self.metrics.set("tourneybot_event_loop_last_lag_seconds", lag)
+            self.metrics.observe("tourneybot_event_loop_lag_seconds", lag)
+
+
+class MetricsServer:
+    """
+    Serves the metrics over HTTP at /metrics.
+
+    Attributes:
+        metrics (Metrics): The metrics to serve.
+        host (str): The address to listen on.
+        port (int): The port to listen on, or 0 for any free port.
+    """
+
+    def __init__(self, metrics: Metrics, port: int, host: str = "127.0.0.1"):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    async def start(self) -> None:
+        """
+        Start listening.
+        """
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        if self.port == 0:
+            # Listening on any free port; report which one was picked
+            self.port = self._runner.addresses[0][1]
+
+    async def stop(self) -> None:
+        """
+        Stop listening.
+        """
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        return web.Response(
+            text=self.metrics.render(), content_type="text/plain", charset="utf-8"
+        )
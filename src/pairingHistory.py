@@ -0,0 +1,138 @@
+import time
+from collections import OrderedDict
+from itertools import combinations
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# A pair's weight halves every week, so last week's partners count half as much
+DEFAULT_HALF_LIFE = 7 * 24 * 60 * 60
+# Enough for a few hundred guilds with regular tournaments
+DEFAULT_MAX_PAIRS = 100000
+# Pairs that have faded below this are forgotten
+MIN_PAIR_WEIGHT = 0.05
+
+# A pair of teammates within a guild: (guild_id, *pairKey(a, b))
+GuildPairKey = Tuple[int, int, int]
+
+
+def pairKey(a: int, b: int) -> Tuple[int, int]:
+    """
+    Order a pair of players so each pair has a single key.
+
+    Args:
+        a (int): A player ID.
+        b (int): Another player ID.
+
+    Returns:
+        Tuple[int, int]: The two IDs in sorted order.
+    """
+    return (a, b) if a < b else (b, a)
+
+
+class PairingHistory:
+    """
+    How often players have been teammates in each guild's confirmed tournaments.
+
+    Each pair of teammates has a weight that goes up by one every time they are
+    on a team together and halves every half life. Weights are decayed lazily
+    when a pair is read or updated, so recording a tournament only touches the
+    pairs in it. Pairs are kept in order of their last update, which makes
+    forgetting faded pairs and capping the number of pairs cheap.
+
+    Attributes:
+        half_life (float): Seconds after which a pair's weight has halved.
+        max_pairs (int): The maximum number of pairs kept across all guilds.
+    """
+
+    def __init__(
+        self,
+        half_life: float = DEFAULT_HALF_LIFE,
+        max_pairs: int = DEFAULT_MAX_PAIRS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.half_life = half_life
+        self.max_pairs = max_pairs
+        self._clock = clock
+        # (guild_id, a, b) -> (weight, time of last update)
+        self._pairs: "OrderedDict[GuildPairKey, Tuple[float, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._pairs)
+
+    def _decayed(self, entry: Tuple[float, float], now: float) -> float:
+        weight, updated = entry
+        return weight * 0.5 ** ((now - updated) / self.half_life)
+
+    def record_teams(self, guild_id: int, teams: Iterable[List[int]]) -> None:
+        """
+        Record the teams of a confirmed tournament.
+
+        Args:
+            guild_id (int): The ID of the guild the tournament was played in.
+            teams (Iterable[List[int]]): The tournament's teams.
+        """
+        now = self._clock()
+        for team in teams:
+            for a, b in combinations(team, 2):
+                key = (guild_id, *pairKey(a, b))
+                entry = self._pairs.get(key)
+                weight = self._decayed(entry, now) if entry is not None else 0.0
+                self._pairs[key] = (weight + 1.0, now)
+                self._pairs.move_to_end(key)
+        self.evict_faded()
+        while len(self._pairs) > self.max_pairs:
+            self._pairs.popitem(last=False)
+
+    def pair_counts(
+        self, guild_id: int, players: Iterable[int]
+    ) -> Dict[Tuple[int, int], float]:
+        """
+        Get the weights of every recent pair among a set of players.
+
+        Args:
+            guild_id (int): The ID of the guild.
+            players (Iterable[int]): The IDs of the players about to be put in teams.
+
+        Returns:
+            Dict[Tuple[int, int], float]: Weights keyed by pairKey, for pairs that
+                have been teammates recently.
+        """
+        now = self._clock()
+        present = set(players)
+        # Look up every pair of players, or scan the stored pairs when there
+        # are fewer of those
+        if len(present) * (len(present) - 1) // 2 <= len(self._pairs):
+            keys: Iterable[GuildPairKey] = (
+                (guild_id, a, b) for a, b in combinations(sorted(present), 2)
+            )
+        else:
+            keys = [
+                key
+                for key in self._pairs
+                if key[0] == guild_id and key[1] in present and key[2] in present
+            ]
+        counts = {}
+        for key in keys:
+            entry = self._pairs.get(key)
+            if entry is not None:
+                weight = self._decayed(entry, now)
+                if weight >= MIN_PAIR_WEIGHT:
+                    counts[(key[1], key[2])] = weight
+        return counts
+
+    def evict_faded(self) -> int:
+        """
+        Forget pairs whose weight has faded below MIN_PAIR_WEIGHT.
+
+        Returns:
+            int: The number of pairs forgotten.
+        """
+        now = self._clock()
+        evicted = 0
+        # Pairs are ordered by last update, so stop at the first live one
+        while self._pairs:
+            key, entry = next(iter(self._pairs.items()))
+            if self._decayed(entry, now) >= MIN_PAIR_WEIGHT:
+                break
+            del self._pairs[key]
+            evicted += 1
+        return evicted
@@ -0,0 +1,64 @@
+from typing import Any, Dict, Iterable, List, Sequence
+
+import discord
+
+from src.tournament import DEFAULT_RATING
+
+
+class Player:
+    """
+    A player taking part in a tournament.
+
+    Tournaments identify players by member ID, so a renamed member or two
+    members with the same name are still told apart. Names are only used to
+    render teams and matches.
+
+    Attributes:
+        id (int): The member's ID.
+        name (str): The member's name when the tournament was created.
+        rating (float): The player's rating.
+    """
+
+    __slots__ = ("id", "name", "rating")
+
+    def __init__(self, id: int, name: str, rating: float = DEFAULT_RATING):
+        self.id = id
+        self.name = name
+        self.rating = rating
+
+    @classmethod
+    def from_member(
+        cls, member: discord.abc.User, rating: float = DEFAULT_RATING
+    ) -> "Player":
+        return cls(member.id, member.name, rating)
+
+    def to_list(self) -> List[Any]:
+        return [self.id, self.name, self.rating]
+
+    @classmethod
+    def from_list(cls, data: Sequence[Any]) -> "Player":
+        return cls(data[0], data[1], data[2])
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Player):
+            return NotImplemented
+        return (self.id, self.name, self.rating) == (other.id, other.name, other.rating)
+
+    def __hash__(self) -> int:
+        return hash(self.id)
+
+    def __repr__(self) -> str:
+        return f"Player({self.id!r}, {self.name!r}, {self.rating!r})"
+
+
+def playerNames(players: Iterable[Player]) -> Dict[int, str]:
+    """
+    Build the lookup used to render a tournament's teams.
+
+    Args:
+        players (Iterable[Player]): The tournament's players.
+
+    Returns:
+        Dict[int, str]: Player names by ID.
+    """
+    return {player.id: player.name for player in players}
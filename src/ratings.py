@@ -0,0 +1,360 @@
+import math
+import time
+from collections import defaultdict
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from src.tournament import DEFAULT_RATING
+
+# Glicko deviation of a player who has never played
+DEFAULT_DEVIATION = 350.0
+# Keeps regular players' ratings responsive
+MIN_DEVIATION = 30.0
+# A player's deviation grows for every period they do not play
+RATING_PERIOD = 7 * 24 * 60 * 60
+# An established player's deviation of 50 returns to the default after about two years away
+DEVIATION_GROWTH = math.sqrt((DEFAULT_DEVIATION**2 - 50.0**2) / 104)
+GLICKO_Q = math.log(10) / 400
+
+# A match result: [the winning team's player IDs, the losing team's player IDs]
+TeamResult = Sequence[Sequence[int]]
+
+
+class Rating:
+    """
+    A player's Glicko rating.
+
+    Attributes:
+        rating (float): The rating.
+        deviation (float): How uncertain the rating is, as its standard deviation.
+        updated (float): Unix timestamp of the rating period the rating was last updated in.
+    """
+
+    __slots__ = ("rating", "deviation", "updated")
+
+    def __init__(
+        self,
+        rating: float = DEFAULT_RATING,
+        deviation: float = DEFAULT_DEVIATION,
+        updated: float = 0.0,
+    ):
+        self.rating = rating
+        self.deviation = deviation
+        self.updated = updated
+
+    def at(self, now: float) -> "Rating":
+        """
+        Get the rating as of a later time, its deviation grown for the periods without play.
+
+        Args:
+            now (float): A Unix timestamp.
+
+        Returns:
+            Rating: The rating at that time.
+        """
+        periods = max(0.0, now - self.updated) / RATING_PERIOD
+        deviation = min(
+            DEFAULT_DEVIATION,
+            math.sqrt(self.deviation**2 + DEVIATION_GROWTH**2 * periods),
+        )
+        return Rating(self.rating, deviation, self.updated)
+
+    def to_dict(self, guild_id: int, player_id: int) -> Dict[str, Any]:
+        return {
+            "guild_id": guild_id,
+            "player_id": player_id,
+            "rating": self.rating,
+            "deviation": self.deviation,
+            "updated": self.updated,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Rating":
+        return cls(data["rating"], data["deviation"], data["updated"])
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Rating):
+            return NotImplemented
+        return (self.rating, self.deviation, self.updated) == (
+            other.rating,
+            other.deviation,
+            other.updated,
+        )
+
+    def __repr__(self) -> str:
+        return f"Rating({self.rating!r}, {self.deviation!r}, {self.updated!r})"
+
+
+def glickoG(deviation: float) -> float:
+    """
+    Glicko's weighting of a game by how uncertain the opponent's rating is.
+
+    Args:
+        deviation (float): The opponent's deviation.
+
+    Returns:
+        float: 1 for a certain rating, falling towards 0 as the deviation grows.
+    """
+    return 1 / math.sqrt(1 + 3 * GLICKO_Q**2 * deviation**2 / math.pi**2)
+
+
+def teamAverage(ratings: Sequence[Rating]) -> Tuple[float, float]:
+    """
+    Combine a team's ratings into one opponent.
+
+    Args:
+        ratings (Sequence[Rating]): The ratings of the team's players.
+
+    Returns:
+        Tuple[float, float]: The mean rating, and the root mean square deviation.
+    """
+    count = len(ratings)
+    return (
+        sum(rating.rating for rating in ratings) / count,
+        math.sqrt(sum(rating.deviation**2 for rating in ratings) / count),
+    )
+
+
+def ratePeriod(
+    ratings: Mapping[int, Rating],
+    results: Sequence[TeamResult],
+    now: float,
+    perPlayer: bool = True,
+) -> Dict[int, Rating]:
+    """
+    Update ratings with the results of one rating period, e.g. a tournament.
+
+    Every game is rated against the ratings from before the period, so the
+    results can be applied in a single pass and their order does not matter.
+    Each player's opponent in a game is the other team's average.
+
+    Args:
+        ratings (Mapping[int, Rating]): Ratings by player ID. Players without one start
+            at DEFAULT_RATING.
+        results (Sequence[TeamResult]): The period's match results.
+        now (float): Unix timestamp of the period.
+        perPlayer (bool): Whether a player's expected score comes from their own rating.
+            Otherwise it comes from their team's average, so teammates' ratings move
+            by the same amount for the same deviation.
+
+    Returns:
+        Dict[int, Rating]: The new ratings of every player who played.
+    """
+    current = {
+        player: ratings[player].at(now) if player in ratings else Rating(updated=now)
+        for result in results
+        for team in result
+        for player in team
+    }
+    # One row per player per game: (player, own rating, opponent rating,
+    # opponent deviation, score)
+    rows: List[Tuple[int, float, float, float, float]] = []
+    for winners, losers in results:
+        averages = [
+            teamAverage([current[player] for player in team])
+            for team in (winners, losers)
+        ]
+        for side, (team, score) in enumerate(((winners, 1.0), (losers, 0.0))):
+            opponent, opponentDeviation = averages[1 - side]
+            own = averages[side][0]
+            for player in team:
+                rows.append(
+                    (
+                        player,
+                        current[player].rating if perPlayer else own,
+                        opponent,
+                        opponentDeviation,
+                        score,
+                    )
+                )
+
+    weights = [glickoG(row[3]) for row in rows]
+    expected = [
+        1 / (1 + 10 ** (-weight * (row[1] - row[2]) / 400))
+        for row, weight in zip(rows, weights)
+    ]
+    variance: Dict[int, float] = defaultdict(float)
+    improvement: Dict[int, float] = defaultdict(float)
+    for row, weight, expect in zip(rows, weights, expected):
+        variance[row[0]] += weight**2 * expect * (1 - expect)
+        improvement[row[0]] += weight * (row[4] - expect)
+
+    updated = {}
+    for player, total in variance.items():
+        rating = current[player]
+        precision = 1 / rating.deviation**2 + GLICKO_Q**2 * total
+        updated[player] = Rating(
+            rating.rating + GLICKO_Q / precision * improvement[player],
+            max(MIN_DEVIATION, math.sqrt(1 / precision)),
+            now,
+        )
+    return updated
+
+
+def rateHistory(
+    periods: Iterable[Tuple[float, Sequence[TeamResult]]], perPlayer: bool = True
+) -> Dict[int, Rating]:
+    """
+    Recompute ratings from scratch over a full history of rating periods.
+
+    Args:
+        periods (Iterable[Tuple[float, Sequence[TeamResult]]]): (timestamp, results) for
+            each period, oldest first.
+        perPlayer (bool): Passed on to ratePeriod.
+
+    Returns:
+        Dict[int, Rating]: The final rating of every player in the history.
+    """
+    ratings: Dict[int, Rating] = {}
+    for now, results in periods:
+        ratings.update(ratePeriod(ratings, results, now, perPlayer))
+    return ratings
+
+
+class RatingBook:
+    """
+    Player ratings in each guild, cached from storage.
+
+    Ratings are looked up a lobby at a time. Players whose ratings were
+    looked up but who have none are remembered too, so creating another
+    tournament with the same players does not query storage again.
+
+    Attributes:
+        per_player (bool): Passed on to ratePeriod.
+    """
+
+    def __init__(self, per_player: bool = True, clock: Callable[[], float] = time.time):
+        self.per_player = per_player
+        self._clock = clock
+        # guild_id -> player_id -> rating, or None if the player is unrated
+        self._ratings: Dict[int, Dict[int, Optional[Rating]]] = {}
+
+    def unknown(self, guild_id: int, player_ids: Iterable[int]) -> List[int]:
+        """
+        Get the players whose ratings have not been loaded.
+
+        Args:
+            guild_id (int): The ID of the guild.
+            player_ids (Iterable[int]): The players' IDs.
+
+        Returns:
+            List[int]: The IDs missing from the cache.
+        """
+        guild = self._ratings.get(guild_id, {})
+        return [player_id for player_id in player_ids if player_id not in guild]
+
+    def load(
+        self, guild_id: int, player_ids: Iterable[int], stored: Mapping[int, Rating]
+    ) -> None:
+        """
+        Cache players' stored ratings.
+
+        Ratings already in the cache are kept, since they are at least as recent.
+
+        Args:
+            guild_id (int): The ID of the guild.
+            player_ids (Iterable[int]): The IDs that were looked up.
+            stored (Mapping[int, Rating]): The ratings found, by player ID.
+        """
+        guild = self._ratings.setdefault(guild_id, {})
+        for player_id in player_ids:
+            if guild.get(player_id) is None:
+                guild[player_id] = stored.get(player_id)
+
+    def get(self, guild_id: int, player_id: int) -> Optional[Rating]:
+        """
+        Get a player's rating as of now.
+
+        Args:
+            guild_id (int): The ID of the guild.
+            player_id (int): The player's ID.
+
+        Returns:
+            Optional[Rating]: The rating, or None if the player is unrated or not loaded.
+        """
+        rating = self._ratings.get(guild_id, {}).get(player_id)
+        return rating.at(self._clock()) if rating is not None else None
+
+    def ratings(self, guild_id: int, player_ids: Iterable[int]) -> Dict[int, float]:
+        """
+        Get the ratings to balance teams with.
+
+        Args:
+            guild_id (int): The ID of the guild.
+            player_ids (Iterable[int]): The players' IDs.
+
+        Returns:
+            Dict[int, float]: Ratings by player ID, for the rated players only.
+        """
+        guild = self._ratings.get(guild_id, {})
+        rated = {}
+        for player_id in player_ids:
+            rating = guild.get(player_id)
+            if rating is not None:
+                rated[player_id] = rating.rating
+        return rated
+
+    def apply_period(
+        self,
+        guild_id: int,
+        results: Sequence[TeamResult],
+        now: Optional[float] = None,
+    ) -> Dict[int, Rating]:
+        """
+        Rate a finished tournament.
+
+        The players' ratings must have been loaded.
+
+        Args:
+            guild_id (int): The ID of the guild.
+            results (Sequence[TeamResult]): The tournament's match results.
+            now (Optional[float]): Unix timestamp of the period. Defaults to now.
+
+        Returns:
+            Dict[int, Rating]: The new ratings of the players who played.
+        """
+        guild = self._ratings.setdefault(guild_id, {})
+        known = {}
+        for result in results:
+            for team in result:
+                for player_id in team:
+                    rating = guild.get(player_id)
+                    if rating is not None:
+                        known[player_id] = rating
+        updated = ratePeriod(
+            known,
+            results,
+            self._clock() if now is None else now,
+            self.per_player,
+        )
+        guild.update(updated)
+        return updated
+
+    def replace_guild(self, guild_id: int, ratings: Mapping[int, Rating]) -> None:
+        """
+        Replace a guild's ratings, e.g. with ones recomputed by rateHistory.
+
+        Args:
+            guild_id (int): The ID of the guild.
+            ratings (Mapping[int, Rating]): Every rated player's rating. Players left out
+                are unrated.
+        """
+        self._ratings[guild_id] = dict(ratings)
+
+    def forget_guild(self, guild_id: int) -> None:
+        """
+        Drop a guild's cached ratings, e.g. when the bot leaves it.
+
+        Args:
+            guild_id (int): The ID of the guild.
+        """
+        self._ratings.pop(guild_id, None)
@@ -0,0 +1,135 @@
+from typing import Any, Dict, Iterable, List
+
+import discord
+
+# Discord's limits on what a single message can carry
+EMBED_DESCRIPTION_LIMIT = 4096
+EMBED_TOTAL_LIMIT = 6000  # across every embed in the message
+EMBEDS_PER_MESSAGE = 10
+# Room kept on each page for its "Page N of M" footer
+FOOTER_RESERVE = 32
+# Descriptions are wrapped in a code block so names render as typed
+CODE_BLOCK_OVERHEAD = len("```\n\n```")
+# Seconds the page buttons keep working after the last use
+PAGE_TIMEOUT = 15 * 60
+EMBED_COLOUR = discord.Colour.blurple()
+
+
+def packLines(lines: Iterable[str], limit: int) -> List[str]:
+    """
+    Join lines into as few chunks as possible without exceeding a size limit.
+
+    Lines are never reordered, and a line is only split if it is longer than
+    the limit on its own.
+
+    Args:
+        lines (Iterable[str]): The lines to pack.
+        limit (int): The maximum number of characters in a chunk, including newlines.
+
+    Returns:
+        List[str]: The chunks, each a newline-separated run of lines.
+    """
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for line in lines:
+        pieces = [line[i : i + limit] for i in range(0, len(line), limit)] or [""]
+        for piece in pieces:
+            extra = len(piece) + (1 if current else 0)
+            if current and size + extra > limit:
+                chunks.append("\n".join(current))
+                current = []
+                extra = len(piece)
+                size = 0
+            current.append(piece)
+            size += extra
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def renderPages(title: str, lines: List[str]) -> List[List[discord.Embed]]:
+    """
+    Render lines as embeds, packed into as few messages as Discord's limits allow.
+
+    Each page is the list of embeds for one message. A page holds up to
+    EMBED_TOTAL_LIMIT characters, which takes two embeds since a single
+    description is limited to EMBED_DESCRIPTION_LIMIT. The first embed of
+    each page carries the title, and the last one a page footer when there
+    is more than one page.
+
+    Args:
+        title (str): The title of the output.
+        lines (List[str]): The lines to render, e.g. one per team or match.
+
+    Returns:
+        List[List[discord.Embed]]: The pages, each sendable as one message.
+    """
+    pageLimit = (
+        EMBED_TOTAL_LIMIT - len(title) - FOOTER_RESERVE - 2 * CODE_BLOCK_OVERHEAD
+    )
+    embedLimit = EMBED_DESCRIPTION_LIMIT - CODE_BLOCK_OVERHEAD
+    chunks = packLines(lines, pageLimit) or [""]
+    pages = []
+    for number, chunk in enumerate(chunks, start=1):
+        embeds = [
+            discord.Embed(description=f"```\n{part}\n```", colour=EMBED_COLOUR)
+            for part in packLines(chunk.split("\n"), embedLimit)
+        ]
+        embeds[0].title = title
+        if len(chunks) > 1:
+            embeds[-1].set_footer(text=f"Page {number} of {len(chunks)}")
+        pages.append(embeds)
+    return pages
+
+
+class PageView(discord.ui.View):
+    """
+    Buttons to flip between the pages of a message.
+
+    Attributes:
+        pages (List[List[discord.Embed]]): The pages, as returned by renderPages.
+        page (int): The index of the page currently shown.
+    """
+
+    def __init__(self, pages: List[List[discord.Embed]], timeout: float = PAGE_TIMEOUT):
+        super().__init__(timeout=timeout)
+        self.pages = pages
+        self.page = 0
+
+    async def show(self, interaction: discord.Interaction, page: int):
+        """
+        Show a page in place of the current one.
+
+        Args:
+            interaction (discord.Interaction): The button interaction.
+            page (int): The index of the page, wrapping around at either end.
+        """
+        self.page = page % len(self.pages)
+        await interaction.response.edit_message(embeds=self.pages[self.page], view=self)
+
+    @discord.ui.button(emoji="◀️", style=discord.ButtonStyle.secondary)
+    async def previous(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ):
+        await self.show(interaction, self.page - 1)
+
+    @discord.ui.button(emoji="▶️", style=discord.ButtonStyle.secondary)
+    async def next(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, self.page + 1)
+
+
+def pageMessage(pages: List[List[discord.Embed]]) -> Dict[str, Any]:
+    """
+    Build the keyword arguments for sending rendered pages as one message.
+
+    Args:
+        pages (List[List[discord.Embed]]): The pages, as returned by renderPages.
+
+    Returns:
+        Dict[str, Any]: The first page's embeds, and page buttons if there are more pages.
+    """
+    message: Dict[str, Any] = {"embeds": pages[0]}
+    if len(pages) > 1:
+        message["view"] = PageView(pages)
+    return message
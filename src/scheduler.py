@@ -0,0 +1,287 @@
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+import discord
+
+# Lower values are sent first
+PRIORITY_INTERACTION = 0
+PRIORITY_DEFAULT = 1
+PRIORITY_BACKGROUND = 2
+
+# discord.py enforces Discord's exact per-bucket limits; these caps bound how
+# much work is handed to it so queued high priority actions can overtake
+DEFAULT_BUCKET_CONCURRENCY = 4
+DEFAULT_MAX_IN_FLIGHT = 40
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_RETRY_AFTER = 1.0
+
+Action = Callable[[], Awaitable[Any]]
+
+
+class _Entry:
+    __slots__ = (
+        "action",
+        "priority",
+        "future",
+        "enqueued",
+        "coalesce_key",
+        "started",
+        "retries",
+    )
+
+    def __init__(
+        self,
+        action: Action,
+        priority: int,
+        future: "asyncio.Future[Any]",
+        coalesce_key: Optional[Hashable],
+    ):
+        self.action = action
+        self.priority = priority
+        self.future = future
+        self.enqueued = time.monotonic()
+        self.coalesce_key = coalesce_key
+        self.started = False
+        self.retries = 0
+
+
+class _Bucket:
+    __slots__ = ("queue", "pending", "active", "paused_until", "resume_scheduled")
+
+    def __init__(self):
+        # Heap of (priority, sequence, entry); entries may appear more than
+        # once after being promoted, so started entries are skipped
+        self.queue: List[Tuple[int, int, _Entry]] = []
+        self.pending: Dict[Hashable, _Entry] = {}
+        self.active = 0
+        self.paused_until = 0.0
+        self.resume_scheduled = False
+
+
+class SchedulerStats:
+    """
+    Counters describing the scheduler's queues.
+
+    Attributes:
+        submitted (int): Actions submitted.
+        coalesced (int): Actions merged into an action already waiting in the queue.
+        completed (int): Actions that finished successfully.
+        failed (int): Actions that raised.
+        rate_limited (int): Times a bucket was paused after a 429 response.
+        total_wait (float): Seconds actions spent queued, summed.
+        max_wait (float): The longest time an action spent queued.
+    """
+
+    __slots__ = (
+        "submitted",
+        "coalesced",
+        "completed",
+        "failed",
+        "rate_limited",
+        "total_wait",
+        "max_wait",
+    )
+
+    def __init__(self):
+        self.submitted = 0
+        self.coalesced = 0
+        self.completed = 0
+        self.failed = 0
+        self.rate_limited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def mean_wait(self) -> float:
+        started = self.completed + self.failed
+        return self.total_wait / started if started else 0.0
+
+
+class OutboundScheduler:
+    """
+    Queues outbound Discord API actions per rate limit bucket.
+
+    Each bucket runs a bounded number of actions at once, in priority order,
+    and the whole scheduler caps the number of requests in flight. Actions
+    submitted with a coalesce key replace, or are merged into, an action with
+    the same key that has not started yet, so e.g. several edits to one
+    message result in one request.
+    A bucket that receives a 429 response is paused for the retry period and
+    the action is retried.
+
+    Attributes:
+        bucket_concurrency (int): The maximum number of actions running per bucket.
+        max_in_flight (int): The maximum number of actions running overall.
+        stats (SchedulerStats): Counters for submitted, coalesced and completed actions.
+    """
+
+    def __init__(
+        self,
+        bucket_concurrency: int = DEFAULT_BUCKET_CONCURRENCY,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+    ):
+        self.bucket_concurrency = bucket_concurrency
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.stats = SchedulerStats()
+        self._buckets: Dict[Hashable, _Bucket] = {}
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        # Buckets waiting for a global slot, by the priority of their next action
+        self._waiting: List[Tuple[int, int, Hashable]] = []
+
+    def queue_depth(self, bucket: Optional[Hashable] = None) -> int:
+        """
+        Count the actions waiting to start.
+
+        Args:
+            bucket (Optional[Hashable]): Only count this bucket. Defaults to all buckets.
+
+        Returns:
+            int: The number of queued actions.
+        """
+        if bucket is not None:
+            state = self._buckets.get(bucket)
+            return self._depth(state) if state is not None else 0
+        return sum(self._depth(state) for state in self._buckets.values())
+
+    async def submit(
+        self,
+        bucket: Hashable,
+        action: Action,
+        priority: int = PRIORITY_DEFAULT,
+        coalesce_key: Optional[Hashable] = None,
+        merge: Optional[Callable[[Any, Any], Action]] = None,
+    ) -> Any:
+        """
+        Queue an action and wait for its result.
+
+        Args:
+            bucket (Hashable): The rate limit bucket the action's request falls into.
+            action (Callable[[], Awaitable]): Makes the request. Called once the action is scheduled.
+            priority (int): One of the PRIORITY_ constants; lower runs first.
+            coalesce_key (Optional[Hashable]): Identifies actions that supersede each other. If a
+                queued action has the same key, it is replaced by this one and both callers get
+                this action's result.
+            merge (Optional[Callable[[Action, Action], Action]]): Combines the queued action with
+                this one when they are coalesced, e.g. to keep the changes made by both edits.
+                Defaults to keeping only this action.
+
+        Returns:
+            Any: The action's result.
+        """
+        self.stats.submitted += 1
+        state = self._buckets.get(bucket)
+        if state is None:
+            state = self._buckets[bucket] = _Bucket()
+
+        existing = state.pending.get(coalesce_key) if coalesce_key is not None else None
+        if existing is not None:
+            self.stats.coalesced += 1
+            existing.action = (
+                merge(existing.action, action) if merge is not None else action
+            )
+            if priority < existing.priority:
+                existing.priority = priority
+                heapq.heappush(state.queue, (priority, next(self._sequence), existing))
+            self._pump(bucket)
+            return await asyncio.shield(existing.future)
+
+        entry = _Entry(
+            action, priority, asyncio.get_running_loop().create_future(), coalesce_key
+        )
+        if coalesce_key is not None:
+            state.pending[coalesce_key] = entry
+        heapq.heappush(state.queue, (priority, next(self._sequence), entry))
+        self._pump(bucket)
+        return await asyncio.shield(entry.future)
+
+    def _depth(self, state: _Bucket) -> int:
+        return len({id(entry) for _, _, entry in state.queue if not entry.started})
+
+    def _pump(self, bucket: Hashable) -> None:
+        state = self._buckets[bucket]
+        now = time.monotonic()
+        if state.paused_until > now:
+            if not state.resume_scheduled:
+                state.resume_scheduled = True
+                asyncio.get_running_loop().call_later(
+                    state.paused_until - now, self._resume, bucket
+                )
+            return
+
+        while state.queue and state.active < self.bucket_concurrency:
+            priority, _, entry = state.queue[0]
+            if entry.started or priority != entry.priority:
+                heapq.heappop(state.queue)
+                continue
+            if self._in_flight >= self.max_in_flight:
+                heapq.heappush(self._waiting, (priority, next(self._sequence), bucket))
+                return
+            heapq.heappop(state.queue)
+            self._start(bucket, state, entry)
+
+        if not state.queue and not state.active:
+            del self._buckets[bucket]
+
+    def _resume(self, bucket: Hashable) -> None:
+        state = self._buckets.get(bucket)
+        if state is not None:
+            state.resume_scheduled = False
+            self._pump(bucket)
+
+    def _start(self, bucket: Hashable, state: _Bucket, entry: _Entry) -> None:
+        entry.started = True
+        if entry.coalesce_key is not None:
+            state.pending.pop(entry.coalesce_key, None)
+        wait = time.monotonic() - entry.enqueued
+        self.stats.total_wait += wait
+        self.stats.max_wait = max(self.stats.max_wait, wait)
+        state.active += 1
+        self._in_flight += 1
+        asyncio.ensure_future(self._run(bucket, state, entry))
+
+    async def _run(self, bucket: Hashable, state: _Bucket, entry: _Entry) -> None:
+        try:
+            result = await entry.action()
+        except discord.HTTPException as e:
+            if e.status == 429 and entry.retries < self.max_retries:
+                # Pause the whole bucket and put the action back in the queue
+                self.stats.rate_limited += 1
+                retry_after = getattr(e, "retry_after", None) or DEFAULT_RETRY_AFTER
+                state.paused_until = max(
+                    state.paused_until, time.monotonic() + retry_after
+                )
+                entry.retries += 1
+                entry.started = False
+                if entry.coalesce_key is not None:
+                    state.pending.setdefault(entry.coalesce_key, entry)
+                heapq.heappush(
+                    state.queue, (entry.priority, next(self._sequence), entry)
+                )
+            else:
+                self.stats.failed += 1
+                entry.future.set_exception(e)
+        except Exception as e:
+            self.stats.failed += 1
+            entry.future.set_exception(e)
+        else:
+            self.stats.completed += 1
+            entry.future.set_result(result)
+        finally:
+            state.active -= 1
+            self._in_flight -= 1
+            self._release()
+            if self._buckets.get(bucket) is state:
+                self._pump(bucket)
+
+    def _release(self) -> None:
+        # Hand the freed global slot to the highest priority waiting bucket
+        while self._waiting and self._in_flight < self.max_in_flight:
+            _, _, bucket = heapq.heappop(self._waiting)
+            if bucket in self._buckets:
+                self._pump(bucket)
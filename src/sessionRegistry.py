@@ -0,0 +1,335 @@
+import asyncio
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.bracket import Bracket, restoreBracket
+from src.player import Player
+from src.tournament import newSeed, sessionRng
+
+# Defaults sized so a single process can hold a few hundred live tournaments
+DEFAULT_MAX_SESSIONS = 1000
+DEFAULT_IDLE_TIMEOUT = 60 * 60
+
+SessionKey = Tuple[int, int, int]
+
+
+class TournamentSession:
+    """
+    State for a single tournament being organised in a channel.
+
+    Attributes:
+        guild_id (int): The ID of the guild the tournament belongs to (0 for DMs).
+        channel_id (int): The ID of the channel the team message was posted in.
+        message_id (int): The ID of the team message users react to.
+        creator_id (int): The ID of the user who created the tournament.
+        players (list[Player]): The players taking part in the tournament.
+        teams (list[list[int]]): The teams currently on offer, as lists of player IDs.
+        seed (int): The seed the tournament's teams are drawn from.
+        draw (int): How many times the teams have been rerolled. The current teams can be
+            recreated with replayTeams(player_ids, seed, draw, team_size, pair_counts, ratings).
+        team_size (Optional[int]): The team size the tournament was created with.
+        lobby (int): The tournament's position among the lobbies created together.
+        lobby_count (int): How many lobbies were created together, 1 for a single tournament.
+        balanced (bool): Whether the first teams were balanced by the players' ratings.
+        pair_counts (Dict[Tuple[int, int], float]): The players' teammate history when the
+            tournament was created, which its teams keep players away from.
+        bracket (Optional[Bracket]): The bracket, once the teams have been confirmed.
+        leaderboard_id (Optional[int]): The ID of the standings message, once a result has been reported.
+        last_active (float): Monotonic timestamp of the last interaction.
+        lock (asyncio.Lock): Held while the teams are rerolled or confirmed, so only one
+            of those runs at a time. Not stored.
+    """
+
+    __slots__ = (
+        "guild_id",
+        "channel_id",
+        "message_id",
+        "creator_id",
+        "players",
+        "teams",
+        "seed",
+        "draw",
+        "team_size",
+        "lobby",
+        "lobby_count",
+        "balanced",
+        "pair_counts",
+        "bracket",
+        "leaderboard_id",
+        "last_active",
+        "lock",
+    )
+
+    def __init__(
+        self,
+        guild_id: int,
+        channel_id: int,
+        message_id: int,
+        creator_id: int,
+        players: List[Player],
+        teams: List[List[int]],
+        seed: Optional[int] = None,
+        draw: int = 0,
+        team_size: Optional[int] = None,
+        pair_counts: Optional[Dict[Tuple[int, int], float]] = None,
+        lobby: int = 0,
+        lobby_count: int = 1,
+        balanced: bool = False,
+    ):
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.message_id = message_id
+        self.creator_id = creator_id
+        self.players = players
+        self.teams = teams
+        self.seed = newSeed() if seed is None else seed
+        self.draw = draw
+        self.team_size = team_size
+        self.pair_counts = pair_counts if pair_counts is not None else {}
+        self.lobby = lobby
+        self.lobby_count = lobby_count
+        self.balanced = balanced
+        self.bracket: Optional[Bracket] = None
+        self.leaderboard_id: Optional[int] = None
+        self.last_active = 0.0
+        self.lock = asyncio.Lock()
+
+    @property
+    def key(self) -> SessionKey:
+        return (self.guild_id, self.channel_id, self.message_id)
+
+    @property
+    def player_ids(self) -> List[int]:
+        return [player.id for player in self.players]
+
+    @property
+    def ratings(self) -> Optional[Dict[int, float]]:
+        """The ratings the first teams were balanced with, or None if they were random."""
+        if not self.balanced:
+            return None
+        return {player.id: player.rating for player in self.players}
+
+    def next_rng(self) -> random.Random:
+        """
+        Get the generator for the tournament's next reroll.
+
+        Returns:
+            random.Random: The generator for draw + 1. The draw is only advanced once
+                the new teams have been accepted.
+        """
+        return sessionRng(self.seed, self.draw + 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the session to a JSON-serialisable dict.
+
+        Returns:
+            dict: The session's state. Brackets are stored as their format and results.
+        """
+        data: Dict[str, Any] = {
+            "guild_id": self.guild_id,
+            "channel_id": self.channel_id,
+            "message_id": self.message_id,
+            "creator_id": self.creator_id,
+            "players": [player.to_list() for player in self.players],
+            "teams": self.teams,
+            "seed": self.seed,
+            "draw": self.draw,
+            "team_size": self.team_size,
+            "lobby": self.lobby,
+            "lobby_count": self.lobby_count,
+            "balanced": self.balanced,
+            "pair_counts": [
+                [a, b, weight] for (a, b), weight in self.pair_counts.items()
+            ],
+            "bracket": None,
+            "leaderboard_id": self.leaderboard_id,
+        }
+        if self.bracket is not None:
+            data["bracket"] = {
+                "format": self.bracket.format,
+                "teams": self.bracket.teams,
+                "results": self.bracket.results,
+            }
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TournamentSession":
+        """
+        Recreate a session from the output of to_dict.
+
+        Args:
+            data (dict): The stored session state.
+
+        Returns:
+            TournamentSession: The restored session.
+        """
+        session = cls(
+            guild_id=data["guild_id"],
+            channel_id=data["channel_id"],
+            message_id=data["message_id"],
+            creator_id=data["creator_id"],
+            players=[Player.from_list(player) for player in data["players"]],
+            teams=data["teams"],
+            seed=data["seed"],
+            draw=data["draw"],
+            team_size=data["team_size"],
+            lobby=data["lobby"],
+            lobby_count=data["lobby_count"],
+            balanced=data["balanced"],
+            pair_counts={(a, b): weight for a, b, weight in data["pair_counts"]},
+        )
+        if data["bracket"] is not None:
+            stored = data["bracket"]
+            session.bracket = restoreBracket(
+                stored["teams"], stored["format"], stored["results"]
+            )
+        session.leaderboard_id = data["leaderboard_id"]
+        return session
+
+
+class SessionRegistry:
+    """
+    Registry of active tournament sessions across guilds and channels.
+
+    Sessions are indexed by the ID of their team message so a reaction can be
+    routed to its tournament with a single dict lookup. Entries are kept in
+    least-recently-used order, which makes evicting idle sessions and capping
+    the number of live sessions cheap.
+
+    Attributes:
+        max_sessions (int): The maximum number of sessions kept in memory.
+        idle_timeout (float): Seconds of inactivity after which a session is evicted.
+        on_remove (Optional[Callable[[TournamentSession], None]]): Called with every session
+            that is removed or evicted, e.g. to delete it from storage.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+        on_remove: Optional[Callable[[TournamentSession], None]] = None,
+    ):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.on_remove = on_remove
+        self._clock = clock
+        self._sessions: "OrderedDict[int, TournamentSession]" = OrderedDict()
+        # Message IDs of the sessions in each (guild, channel), oldest first,
+        # for channel-scoped commands
+        self._channels: Dict[Tuple[int, int], Dict[int, None]] = {}
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, message_id: int) -> bool:
+        return message_id in self._sessions
+
+    def __iter__(self) -> Iterator[TournamentSession]:
+        return iter(list(self._sessions.values()))
+
+    def add(self, session: TournamentSession) -> None:
+        """
+        Register a session, evicting idle or excess sessions to make room.
+
+        Args:
+            session (TournamentSession): The session to register.
+        """
+        session.last_active = self._clock()
+        self._sessions[session.message_id] = session
+        self._sessions.move_to_end(session.message_id)
+        channel_key = (session.guild_id, session.channel_id)
+        self._channels.setdefault(channel_key, {})[session.message_id] = None
+        self.evict_idle()
+        while len(self._sessions) > self.max_sessions:
+            self.remove(next(iter(self._sessions)))
+
+    def get(self, message_id: int) -> Optional[TournamentSession]:
+        """
+        Look up the session owning a message and mark it as recently used.
+
+        Args:
+            message_id (int): The ID of the team message.
+
+        Returns:
+            Optional[TournamentSession]: The session, or None if there is no live session for the message.
+        """
+        session = self._sessions.get(message_id)
+        if session is None:
+            return None
+        if self._clock() - session.last_active > self.idle_timeout:
+            self.remove(message_id)
+            return None
+        session.last_active = self._clock()
+        self._sessions.move_to_end(message_id)
+        return session
+
+    def for_channel(self, guild_id: int, channel_id: int) -> List[TournamentSession]:
+        """
+        Get the live sessions in a channel, e.g. the lobbies of one tournament.
+
+        Sessions are not marked as used, since a command usually acts on only
+        one of them; look that one up with get.
+
+        Args:
+            guild_id (int): The ID of the guild.
+            channel_id (int): The ID of the channel.
+
+        Returns:
+            List[TournamentSession]: The sessions, oldest first.
+        """
+        cutoff = self._clock() - self.idle_timeout
+        sessions = []
+        for message_id in list(self._channels.get((guild_id, channel_id), ())):
+            session = self._sessions[message_id]
+            if session.last_active < cutoff:
+                self.remove(message_id)
+            else:
+                sessions.append(session)
+        return sessions
+
+    def remove(self, message_id: int) -> Optional[TournamentSession]:
+        """
+        Remove a session.
+
+        Args:
+            message_id (int): The ID of the session's team message.
+
+        Returns:
+            Optional[TournamentSession]: The removed session, if there was one.
+        """
+        session = self._sessions.pop(message_id, None)
+        if session is not None:
+            self._forget_channel(session)
+            if self.on_remove is not None:
+                self.on_remove(session)
+        return session
+
+    def evict_idle(self) -> int:
+        """
+        Drop sessions that have been inactive for longer than the idle timeout.
+
+        Returns:
+            int: The number of sessions evicted.
+        """
+        cutoff = self._clock() - self.idle_timeout
+        evicted = 0
+        # Sessions are ordered by activity, so stop at the first live one
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest.last_active >= cutoff:
+                break
+            self.remove(oldest.message_id)
+            evicted += 1
+        return evicted
+
+    def _forget_channel(self, session: TournamentSession) -> None:
+        channel_key = (session.guild_id, session.channel_id)
+        message_ids = self._channels.get(channel_key)
+        if message_ids is not None:
+            message_ids.pop(session.message_id, None)
+            if not message_ids:
+                del self._channels[channel_key]
@@ -0,0 +1,139 @@
+import logging
+import multiprocessing
+from typing import Any, Iterable, List, Optional
+
+import discord
+
+from src.storage import SQLiteStorage
+from src.tourneyBot import DudeBot
+
+logger = logging.getLogger(__name__)
+
+
+def shardForGuild(guildId: int, shardCount: int) -> int:
+    """
+    Work out which shard Discord sends a guild's events to.
+
+    Args:
+        guildId (int): The ID of the guild, or 0 for direct messages.
+        shardCount (int): The total number of shards.
+
+    Returns:
+        int: The shard ID.
+    """
+    return (guildId >> 22) % shardCount
+
+
+def shardRanges(shardCount: int, processCount: int) -> List[List[int]]:
+    """
+    Split shards into contiguous ranges, one per worker process.
+
+    Args:
+        shardCount (int): The total number of shards.
+        processCount (int): The number of worker processes.
+
+    Returns:
+        List[List[int]]: The shard IDs for each process. Sizes differ by at most one.
+
+    Raises:
+        ValueError: If there are fewer shards than processes.
+    """
+    if processCount < 1 or shardCount < processCount:
+        raise ValueError("Need at least one shard per process")
+    base, extra = divmod(shardCount, processCount)
+    ranges = []
+    start = 0
+    for i in range(processCount):
+        size = base + (1 if i < extra else 0)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return ranges
+
+
+class ShardedDudeBot(DudeBot, discord.AutoShardedClient):
+    """
+    A DudeBot that runs a subset of the bot's shards.
+
+    Several of these can run in separate processes, each with its own range
+    of shards. Every guild belongs to exactly one shard, so each process only
+    restores and handles the tournaments of its own guilds, and the processes
+    can share one SQLite database.
+
+    Attributes:
+        shard_ids (List[int]): The shards this client runs.
+        shard_count (int): The total number of shards across all processes.
+    """
+
+    def owns_guild(self, guild_id: int) -> bool:
+        assert self.shard_count is not None and self.shard_ids is not None
+        return shardForGuild(guild_id, self.shard_count) in self.shard_ids
+
+    async def sync_commands(
+        self, guilds: Iterable[Optional[discord.abc.Snowflake]] = (None,)
+    ) -> List[Optional[discord.abc.Snowflake]]:
+        # Commands belong to the application, so only the first process syncs them
+        if self.shard_ids is not None and 0 not in self.shard_ids:
+            return []
+        return await super().sync_commands(guilds)
+
+
+def runWorker(
+    token: str, shardIds: List[int], shardCount: int, dbPath: str, **options: Any
+) -> None:
+    """
+    Run a bot process for a range of shards. Blocks until the bot shuts down.
+
+    Args:
+        token (str): The bot token.
+        shardIds (List[int]): The shards to run.
+        shardCount (int): The total number of shards.
+        dbPath (str): The SQLite database shared by all processes.
+        **options: Passed on to ShardedDudeBot, e.g. low_memory. A metrics_port is
+            offset by the first shard ID so each process gets its own port.
+    """
+    if options.get("metrics_port") is not None:
+        options["metrics_port"] += shardIds[0]
+    client = ShardedDudeBot(
+        storage=SQLiteStorage(dbPath),
+        shard_ids=shardIds,
+        shard_count=shardCount,
+        **options,
+    )
+    client.run(token)
+
+
+def launch(
+    token: str, shardCount: int, processCount: int, dbPath: str, **options: Any
+) -> int:
+    """
+    Run the bot's shards spread across several worker processes.
+
+    Args:
+        token (str): The bot token.
+        shardCount (int): The total number of shards.
+        processCount (int): The number of worker processes.
+        dbPath (str): The SQLite database shared by all processes.
+        **options: Passed on to ShardedDudeBot, e.g. low_memory.
+
+    Returns:
+        int: 0 if every worker exited cleanly, otherwise the first non-zero exit code.
+    """
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(
+            target=runWorker,
+            args=(token, shardIds, shardCount, dbPath),
+            kwargs=options,
+            name=f"shards-{shardIds[0]}-{shardIds[-1]}",
+        )
+        for shardIds in shardRanges(shardCount, processCount)
+    ]
+    for worker in workers:
+        worker.start()
+    exitCode = 0
+    for worker in workers:
+        worker.join()
+        if worker.exitcode:
+            logger.error("%s exited with code %s", worker.name, worker.exitcode)
+            exitCode = exitCode or worker.exitcode
+    return exitCode
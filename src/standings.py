@@ -0,0 +1,177 @@
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.player import Player
+
+
+class PlayerRecord:
+    """
+    A player's wins and losses across a guild's tournaments.
+
+    Attributes:
+        guild_id (int): The ID of the guild.
+        id (int): The player's member ID.
+        name (str): The player's name when they last played.
+        wins (int): Matches won.
+        losses (int): Matches lost.
+    """
+
+    __slots__ = ("guild_id", "id", "name", "wins", "losses")
+
+    def __init__(
+        self, guild_id: int, id: int, name: str, wins: int = 0, losses: int = 0
+    ):
+        self.guild_id = guild_id
+        self.id = id
+        self.name = name
+        self.wins = wins
+        self.losses = losses
+
+    @property
+    def played(self) -> int:
+        return self.wins + self.losses
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "guild_id": self.guild_id,
+            "player_id": self.id,
+            "name": self.name,
+            "wins": self.wins,
+            "losses": self.losses,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PlayerRecord":
+        return cls(
+            data["guild_id"],
+            data["player_id"],
+            data["name"],
+            data["wins"],
+            data["losses"],
+        )
+
+    def __repr__(self) -> str:
+        return f"PlayerRecord({self.guild_id!r}, {self.id!r}, {self.name!r}, {self.wins!r}, {self.losses!r})"
+
+
+def rankKey(record: PlayerRecord) -> Tuple[int, int, str]:
+    """
+    Order records for a leaderboard: most wins first, then fewest losses.
+
+    Args:
+        record (PlayerRecord): The record.
+
+    Returns:
+        Tuple[int, int, str]: The sort key. Ties are broken by name so the order is stable.
+    """
+    return (-record.wins, record.losses, record.name)
+
+
+class Standings:
+    """
+    Every player's wins and losses, per guild.
+
+    Reporting a match only updates the records of the players in it and
+    returns those records, so saving the standings only writes the rows that
+    changed. Guilds are loaded from storage the first time they report a
+    result.
+    """
+
+    def __init__(self):
+        self._records: Dict[int, Dict[int, PlayerRecord]] = {}
+        self._loaded_guilds: Set[int] = set()
+
+    def is_loaded(self, guild_id: int) -> bool:
+        return guild_id in self._loaded_guilds
+
+    def load_guild(self, guild_id: int, records: Iterable[PlayerRecord]) -> None:
+        """
+        Set a guild's stored records.
+
+        Records already in memory are kept, so a second load finishing after
+        results were reported does not undo them.
+
+        Args:
+            guild_id (int): The ID of the guild.
+            records (Iterable[PlayerRecord]): The guild's stored records.
+        """
+        guild = self._records.setdefault(guild_id, {})
+        for record in records:
+            guild.setdefault(record.id, record)
+        self._loaded_guilds.add(guild_id)
+
+    def get(self, guild_id: int, player_id: int) -> Optional[PlayerRecord]:
+        """
+        Get a player's record.
+
+        Args:
+            guild_id (int): The ID of the guild.
+            player_id (int): The player's member ID.
+
+        Returns:
+            Optional[PlayerRecord]: The record, or None if the player has not played a reported match.
+        """
+        return self._records.get(guild_id, {}).get(player_id)
+
+    def record_match(
+        self, guild_id: int, winners: Iterable[Player], losers: Iterable[Player]
+    ) -> List[PlayerRecord]:
+        """
+        Record the result of a match.
+
+        Args:
+            guild_id (int): The ID of the guild the match was played in.
+            winners (Iterable[Player]): The players of the winning team.
+            losers (Iterable[Player]): The players of the losing team.
+
+        Returns:
+            List[PlayerRecord]: The records that changed.
+        """
+        guild = self._records.setdefault(guild_id, {})
+        changed = []
+        for players, won in ((winners, True), (losers, False)):
+            for player in players:
+                record = guild.get(player.id)
+                if record is None:
+                    record = guild[player.id] = PlayerRecord(
+                        guild_id, player.id, player.name
+                    )
+                record.name = player.name
+                if won:
+                    record.wins += 1
+                else:
+                    record.losses += 1
+                changed.append(record)
+        return changed
+
+    def ranked(
+        self, guild_id: int, player_ids: Optional[Iterable[int]] = None
+    ) -> List[PlayerRecord]:
+        """
+        Rank a guild's players.
+
+        Args:
+            guild_id (int): The ID of the guild.
+            player_ids (Optional[Iterable[int]]): Only rank these players, e.g. a tournament's.
+                Defaults to every player with a record.
+
+        Returns:
+            List[PlayerRecord]: The records in leaderboard order. Players without a record are left out.
+        """
+        guild = self._records.get(guild_id, {})
+        if player_ids is None:
+            records = list(guild.values())
+        else:
+            records = [
+                guild[player_id] for player_id in player_ids if player_id in guild
+            ]
+        return sorted(records, key=rankKey)
+
+    def forget_guild(self, guild_id: int) -> None:
+        """
+        Drop a guild's records from memory, e.g. when the bot leaves it.
+
+        Args:
+            guild_id (int): The ID of the guild.
+        """
+        self._records.pop(guild_id, None)
+        self._loaded_guilds.discard(guild_id)
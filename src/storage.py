@@ -0,0 +1,539 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.sessionRegistry import TournamentSession
+
+# How often queued changes are written, and how many trigger an early write
+DEFAULT_FLUSH_INTERVAL = 0.5
+DEFAULT_BATCH_SIZE = 100
+
+logger = logging.getLogger(__name__)
+
+
+class StorageBackend(ABC):
+    """
+    Interface for persisting tournament sessions.
+
+    Methods are blocking and are called from a worker thread by
+    WriteBehindQueue, never directly from the event loop. Every method
+    but close must be implemented, so a backend cannot silently drop data.
+    """
+
+    @abstractmethod
+    def write_batch(self, upserts: List[Dict[str, Any]], deletes: List[int]) -> None:
+        """
+        Save and delete sessions in a single batch.
+
+        Args:
+            upserts (list[dict]): Sessions to save, as returned by TournamentSession.to_dict.
+            deletes (list[int]): Message IDs of sessions to delete.
+        """
+
+    @abstractmethod
+    def load_sessions(self, since: float) -> List[Dict[str, Any]]:
+        """
+        Load the sessions updated since a point in time.
+
+        Args:
+            since (float): A Unix timestamp. Older sessions are discarded.
+
+        Returns:
+            list[dict]: The stored sessions.
+        """
+
+    @abstractmethod
+    def save_guild_config(self, config: Dict[str, Any]) -> None:
+        """
+        Save a guild's role settings.
+
+        Args:
+            config (dict): The settings, as returned by GuildConfig.to_dict.
+        """
+
+    @abstractmethod
+    def load_guild_configs(self) -> List[Dict[str, Any]]:
+        """
+        Load every guild's role settings.
+
+        Returns:
+            list[dict]: The stored settings.
+        """
+
+    @abstractmethod
+    def load_value(self, key: str) -> Optional[str]:
+        """
+        Load a value saved with save_value.
+
+        Args:
+            key (str): The value's key.
+
+        Returns:
+            Optional[str]: The value, or None if nothing is saved under the key.
+        """
+
+    @abstractmethod
+    def save_value(self, key: str, value: str) -> None:
+        """
+        Save a small piece of bot state, such as the hash of the synced commands.
+
+        Args:
+            key (str): The value's key.
+            value (str): The value.
+        """
+
+    @abstractmethod
+    def save_standings(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Save the records of players whose standings changed.
+
+        Args:
+            records (list[dict]): The changed records, as returned by PlayerRecord.to_dict.
+        """
+
+    @abstractmethod
+    def load_standings(self, guild_id: int) -> List[Dict[str, Any]]:
+        """
+        Load a guild's player standings.
+
+        Args:
+            guild_id (int): The ID of the guild.
+
+        Returns:
+            list[dict]: The stored records.
+        """
+
+    @abstractmethod
+    def save_rating_period(
+        self,
+        guild_id: int,
+        played: float,
+        results: List[List[List[int]]],
+        ratings: List[Dict[str, Any]],
+    ) -> None:
+        """
+        Save a rated tournament's results and its players' new ratings together.
+
+        Args:
+            guild_id (int): The ID of the guild.
+            played (float): Unix timestamp of the rating period.
+            results (list): The match results, as [winners, losers] lists of player IDs.
+            ratings (list[dict]): The new ratings, as returned by Rating.to_dict.
+        """
+
+    @abstractmethod
+    def load_ratings(
+        self, guild_id: int, player_ids: List[int]
+    ) -> List[Dict[str, Any]]:
+        """
+        Load the ratings of some of a guild's players, e.g. a lobby's.
+
+        Args:
+            guild_id (int): The ID of the guild.
+            player_ids (list[int]): The players' IDs.
+
+        Returns:
+            list[dict]: The stored ratings. Unrated players are left out.
+        """
+
+    @abstractmethod
+    def load_rating_history(
+        self, guild_id: int
+    ) -> List[Tuple[float, List[List[List[int]]]]]:
+        """
+        Load every rated tournament of a guild, to recompute its ratings.
+
+        Args:
+            guild_id (int): The ID of the guild.
+
+        Returns:
+            list[tuple]: (timestamp, results) for each rating period, oldest first.
+        """
+
+    @abstractmethod
+    def replace_ratings(self, guild_id: int, ratings: List[Dict[str, Any]]) -> None:
+        """
+        Replace all of a guild's ratings, e.g. after recomputing them.
+
+        Args:
+            guild_id (int): The ID of the guild.
+            ratings (list[dict]): The new ratings, as returned by Rating.to_dict.
+        """
+
+    def close(self) -> None:
+        """
+        Release any resources held by the backend.
+        """
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    Stores sessions in a SQLite database, one JSON row per session.
+
+    Attributes:
+        path (str): The path to the database file, or ":memory:".
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sessions (
+                    message_id INTEGER PRIMARY KEY,
+                    guild_id INTEGER NOT NULL,
+                    channel_id INTEGER NOT NULL,
+                    data TEXT NOT NULL,
+                    updated REAL NOT NULL
+                )
+                """
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated)"
+            )
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS guild_configs (
+                    guild_id INTEGER PRIMARY KEY,
+                    data TEXT NOT NULL
+                )
+                """
+            )
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS bot_state (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                )
+                """
+            )
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS standings (
+                    guild_id INTEGER NOT NULL,
+                    player_id INTEGER NOT NULL,
+                    name TEXT NOT NULL,
+                    wins INTEGER NOT NULL,
+                    losses INTEGER NOT NULL,
+                    PRIMARY KEY (guild_id, player_id)
+                )
+                """
+            )
+            # Rating snapshots are keyed like standings, so a lobby's ratings
+            # are a single lookup on the primary key
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS ratings (
+                    guild_id INTEGER NOT NULL,
+                    player_id INTEGER NOT NULL,
+                    rating REAL NOT NULL,
+                    deviation REAL NOT NULL,
+                    updated REAL NOT NULL,
+                    PRIMARY KEY (guild_id, player_id)
+                )
+                """
+            )
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS rating_history (
+                    id INTEGER PRIMARY KEY,
+                    guild_id INTEGER NOT NULL,
+                    played REAL NOT NULL,
+                    results TEXT NOT NULL
+                )
+                """
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS rating_history_guild ON rating_history (guild_id, played)"
+            )
+
+    def write_batch(self, upserts: List[Dict[str, Any]], deletes: List[int]) -> None:
+        now = time.time()
+        with self._lock, self._connection:
+            if deletes:
+                self._connection.executemany(
+                    "DELETE FROM sessions WHERE message_id = ?",
+                    [(message_id,) for message_id in deletes],
+                )
+            if upserts:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO sessions (message_id, guild_id, channel_id, data, updated) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (
+                            data["message_id"],
+                            data["guild_id"],
+                            data["channel_id"],
+                            json.dumps(data),
+                            now,
+                        )
+                        for data in upserts
+                    ],
+                )
+
+    def load_sessions(self, since: float) -> List[Dict[str, Any]]:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM sessions WHERE updated < ?", (since,))
+            rows = self._connection.execute(
+                "SELECT data FROM sessions ORDER BY updated"
+            ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def save_guild_config(self, config: Dict[str, Any]) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO guild_configs (guild_id, data) VALUES (?, ?)",
+                (config["guild_id"], json.dumps(config)),
+            )
+
+    def load_guild_configs(self) -> List[Dict[str, Any]]:
+        with self._lock, self._connection:
+            rows = self._connection.execute("SELECT data FROM guild_configs").fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def load_value(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM bot_state WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def save_value(self, key: str, value: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO bot_state (key, value) VALUES (?, ?)",
+                (key, value),
+            )
+
+    def save_standings(self, records: List[Dict[str, Any]]) -> None:
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO standings (guild_id, player_id, name, wins, losses) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        record["guild_id"],
+                        record["player_id"],
+                        record["name"],
+                        record["wins"],
+                        record["losses"],
+                    )
+                    for record in records
+                ],
+            )
+
+    def load_standings(self, guild_id: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT player_id, name, wins, losses FROM standings WHERE guild_id = ?",
+                (guild_id,),
+            ).fetchall()
+        return [
+            {
+                "guild_id": guild_id,
+                "player_id": player_id,
+                "name": name,
+                "wins": wins,
+                "losses": losses,
+            }
+            for player_id, name, wins, losses in rows
+        ]
+
+    def save_rating_period(
+        self,
+        guild_id: int,
+        played: float,
+        results: List[List[List[int]]],
+        ratings: List[Dict[str, Any]],
+    ) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT INTO rating_history (guild_id, played, results) VALUES (?, ?, ?)",
+                (guild_id, played, json.dumps(results)),
+            )
+            self._write_ratings(ratings)
+
+    def load_ratings(
+        self, guild_id: int, player_ids: List[int]
+    ) -> List[Dict[str, Any]]:
+        if not player_ids:
+            return []
+        placeholders = ", ".join("?" * len(player_ids))
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT player_id, rating, deviation, updated FROM ratings "
+                f"WHERE guild_id = ? AND player_id IN ({placeholders})",
+                (guild_id, *player_ids),
+            ).fetchall()
+        return [
+            {
+                "guild_id": guild_id,
+                "player_id": player_id,
+                "rating": rating,
+                "deviation": deviation,
+                "updated": updated,
+            }
+            for player_id, rating, deviation, updated in rows
+        ]
+
+    def load_rating_history(
+        self, guild_id: int
+    ) -> List[Tuple[float, List[List[List[int]]]]]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT played, results FROM rating_history WHERE guild_id = ? ORDER BY played, id",
+                (guild_id,),
+            ).fetchall()
+        return [(played, json.loads(results)) for played, results in rows]
+
+    def replace_ratings(self, guild_id: int, ratings: List[Dict[str, Any]]) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM ratings WHERE guild_id = ?", (guild_id,)
+            )
+            self._write_ratings(ratings)
+
+    def _write_ratings(self, ratings: List[Dict[str, Any]]) -> None:
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO ratings (guild_id, player_id, rating, deviation, updated) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [
+                (
+                    rating["guild_id"],
+                    rating["player_id"],
+                    rating["rating"],
+                    rating["deviation"],
+                    rating["updated"],
+                )
+                for rating in ratings
+            ],
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class WriteBehindQueue:
+    """
+    Batches session changes and writes them to a storage backend off the event loop.
+
+    Changes to the same session are coalesced, so a session edited several
+    times between flushes is written once. Sessions are serialised on the
+    event loop at flush time and written from a worker thread.
+
+    Attributes:
+        backend (StorageBackend): The backend changes are written to.
+        flush_interval (float): The maximum number of seconds a change waits before being written.
+        batch_size (int): The number of queued changes that triggers an immediate write.
+    """
+
+    def __init__(
+        self,
+        backend: StorageBackend,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        # Message ID -> session to save, or None to delete
+        self._dirty: Dict[int, Optional[TournamentSession]] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+
+    def __len__(self) -> int:
+        return len(self._dirty)
+
+    def save(self, session: TournamentSession) -> None:
+        """
+        Queue a session to be saved.
+
+        Args:
+            session (TournamentSession): The session that changed.
+        """
+        self._dirty[session.message_id] = session
+        self._maybe_wake()
+
+    def delete(self, message_id: int) -> None:
+        """
+        Queue a session to be deleted.
+
+        Args:
+            message_id (int): The message ID of the session.
+        """
+        self._dirty[message_id] = None
+        self._maybe_wake()
+
+    def start(self) -> None:
+        """
+        Start writing queued changes in the background. Must be called from the event loop.
+        """
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._task = asyncio.create_task(self._run())
+
+    async def flush(self) -> None:
+        """
+        Write all queued changes now.
+        """
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            dirty, self._dirty = self._dirty, {}
+            upserts = [
+                session.to_dict() for session in dirty.values() if session is not None
+            ]
+            deletes = [
+                message_id for message_id, session in dirty.items() if session is None
+            ]
+            try:
+                await asyncio.to_thread(self.backend.write_batch, upserts, deletes)
+            except Exception:
+                # Put the batch back unless the session changed again meanwhile
+                for message_id, session in dirty.items():
+                    self._dirty.setdefault(message_id, session)
+                raise
+
+    async def close(self) -> None:
+        """
+        Stop the background writer, write any remaining changes and close the backend.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        await asyncio.to_thread(self.backend.close)
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Failed to save tournaments")
+
+    def _maybe_wake(self) -> None:
+        if self._wakeup is not None and len(self._dirty) >= self.batch_size:
+            self._wakeup.set()
@@ -1,53 +1,514 @@
+import heapq
 import random
+import secrets
+from typing import Any, Iterable, Mapping, Optional, Tuple
+
+from src.pairingHistory import pairKey
 
 
 class InvalidTournamentException(Exception):
     pass
 
 
-def teamCreator(players: list[str]) -> list[list[str]]:
+MIN_PLAYERS = 8
+DEFAULT_RATING = 1000.0
+# Larger rosters are split into parallel lobbies; 24 players make at most 8 teams
+MAX_LOBBY_PLAYERS = 24
+# Refinement is bounded by fixed numbers of passes rather than time budgets,
+# so replayed teams match exactly.
+# Swaps rating balancing may make to improve its seeding; lobbies settle in far fewer
+BALANCE_PASSES = 100
+# Passes over the pairs of recent teammates when swapping them apart
+REPEAT_PASSES = 3
+
+PairCounts = Mapping[Tuple[int, int], float]
+
+
+def teamSizes(playerCount: int, teamSize: int) -> list[int]:
+    """
+    Work out how many players go in each team.
+
+    Players are spread over as few teams as possible without exceeding the
+    target size, so team sizes differ by at most one and larger teams come
+    first (e.g. 10 players with a team size of 3 gives 3v3 and 2v2 teams).
+
+    Args:
+        playerCount (int): The number of players to place in teams.
+        teamSize (int): The target number of players per team.
+
+    Returns:
+        list[int]: The size of each team.
+
+    Raises:
+        InvalidTournamentException: If the players cannot be split into at least two teams of that size.
+
+    """
+    if teamSize < 1 or playerCount <= teamSize:
+        raise InvalidTournamentException("Tournament size not supported")
+
+    teamCount = -(-playerCount // teamSize)
+    base, extra = divmod(playerCount, teamCount)
+    return [base + 1] * extra + [base] * (teamCount - extra)
+
+
+def balanceTeams(
+    players: list[int],
+    ratings: Mapping[int, float],
+    sizes: list[int],
+    passes: int = BALANCE_PASSES,
+) -> list[list[int]]:
+    """
+    Split players into teams of the given sizes with average ratings as close as possible.
+
+    Teams are seeded greedily, strongest player first, into whichever team is
+    weakest relative to its size. The seeding is then refined by swapping
+    players out of the strongest team and into the weakest team, one swap per
+    pass, until no swap improves the balance or the passes run out.
+
+    Args:
+        players (list[int]): The IDs of the players.
+        ratings (Mapping[int, float]): Ratings by player ID. Unrated players get DEFAULT_RATING.
+        sizes (list[int]): The size of each team, as returned by teamSizes.
+        passes (int): The maximum number of refinement passes. Seeding always completes.
+
+    Returns:
+        list[list[int]]: A list of teams, where each team is represented as a list of player IDs.
+
+    """
+    rating = [ratings.get(player, DEFAULT_RATING) for player in players]
+    order = sorted(range(len(players)), key=rating.__getitem__, reverse=True)
+
+    members: list[list[int]] = [[] for _ in sizes]
+    totals = [0.0] * len(sizes)
+    # Teams with free slots, weakest average first; ties go to the lowest index
+    seeding = [(0.0, t) for t in range(len(sizes)) if sizes[t] > 0]
+    for index in order:
+        _, team = heapq.heappop(seeding)
+        members[team].append(index)
+        totals[team] += rating[index]
+        if len(members[team]) < sizes[team]:
+            heapq.heappush(seeding, (totals[team] / sizes[team], team))
+
+    # Refine by minimising the squared distance of each team's average from
+    # the lobby average, which keeps improving even when several teams tie
+    # for strongest or weakest
+    target = sum(rating) / len(rating)
+    for _ in range(passes):
+        means = [totals[t] / sizes[t] for t in range(len(sizes))]
+        high = max(range(len(sizes)), key=means.__getitem__)
+        low = min(range(len(sizes)), key=means.__getitem__)
+
+        best = None
+        bestGain = 1e-9
+        for strong, weak in [(high, t) for t in range(len(sizes))] + [
+            (t, low) for t in range(len(sizes))
+        ]:
+            if strong == weak:
+                continue
+            before = (means[strong] - target) ** 2 + (means[weak] - target) ** 2
+            for i, a in enumerate(members[strong]):
+                for j, b in enumerate(members[weak]):
+                    delta = rating[a] - rating[b]
+                    if delta <= 0:
+                        continue
+                    strongMean = (totals[strong] - delta) / sizes[strong]
+                    weakMean = (totals[weak] + delta) / sizes[weak]
+                    gain = (
+                        before - (strongMean - target) ** 2 - (weakMean - target) ** 2
+                    )
+                    if gain > bestGain:
+                        bestGain = gain
+                        best = (strong, weak, i, j, delta)
+        if best is None:
+            break
+
+        strong, weak, i, j, delta = best
+        members[strong][i], members[weak][j] = members[weak][j], members[strong][i]
+        totals[strong] -= delta
+        totals[weak] += delta
+
+    return [[players[index] for index in team] for team in members]
+
+
+def avoidRepeats(
+    teams: list[list[int]], pairCounts: PairCounts, passes: int = REPEAT_PASSES
+) -> list[list[int]]:
+    """
+    Swap players between teams so fewer of them are with recent teammates.
+
+    For each pair of recent teammates that is together again, one of them is
+    swapped with the first player in another team for whom the swap lowers
+    the total weight of the pairs in the two teams involved. Team sizes are
+    unchanged.
+
+    Args:
+        teams (list[list[int]]): A list of teams, where each team is represented as a list of player IDs.
+        pairCounts (PairCounts): How strongly each pair, keyed by pairKey, should be kept apart.
+        passes (int): The maximum number of passes over the pairs.
+
+    Returns:
+        list[list[int]]: The new teams. The teams passed in are not modified.
+
+    """
+    teams = [list(team) for team in teams]
+    teamOf = {player: t for t, team in enumerate(teams) for player in team}
+    pairs = [(a, b) for a, b in pairCounts if a in teamOf and b in teamOf]
+
+    def cost(player: int, t: int, without: int) -> float:
+        return sum(
+            pairCounts.get(pairKey(player, other), 0.0)
+            for other in teams[t]
+            if other != player and other != without
+        )
+
+    for _ in range(passes):
+        swapped = False
+        for a, partner in pairs:
+            # Skip pairs that are apart, including those an earlier swap split up
+            t1 = teamOf[a]
+            if teamOf[partner] != t1:
+                continue
+            i = teams[t1].index(a)
+            for t2 in range(len(teams)):
+                if t2 == t1:
+                    continue
+                for j, b in enumerate(teams[t2]):
+                    if cost(a, t2, b) + cost(b, t1, a) < cost(a, t1, a) + cost(
+                        b, t2, b
+                    ):
+                        teams[t1][i], teams[t2][j] = b, a
+                        teamOf[a], teamOf[b] = t2, t1
+                        swapped = True
+                        break
+                if teamOf[a] != t1:
+                    break
+        if not swapped:
+            break
+    return teams
+
+
+def addTeammates(
+    pairCounts: PairCounts, teams: list[list[int]], weight: float = 1.0
+) -> dict[Tuple[int, int], float]:
+    """
+    Add a set of teams' teammate pairs to some pair counts.
+
+    Args:
+        pairCounts (PairCounts): The pair counts to start from. They are not modified.
+        teams (list[list[int]]): A list of teams, where each team is represented as a list of player IDs.
+        weight (float): The weight added for each pair of teammates.
+
+    Returns:
+        dict[Tuple[int, int], float]: The combined pair counts.
+
+    """
+    combined = dict(pairCounts)
+    for team in teams:
+        for i, a in enumerate(team):
+            for b in team[i + 1 :]:
+                key = pairKey(a, b)
+                combined[key] = combined.get(key, 0.0) + weight
+    return combined
+
+
+def teamSpread(teams: list[list[int]], ratings: Mapping[int, float]) -> float:
+    """
+    Measure how uneven a set of teams is.
+
+    Args:
+        teams (list[list[int]]): A list of teams, where each team is represented as a list of player IDs.
+        ratings (Mapping[int, float]): Ratings by player ID. Unrated players get DEFAULT_RATING.
+
+    Returns:
+        float: The difference between the highest and lowest average team rating.
+
+    """
+    means = [
+        sum(ratings.get(player, DEFAULT_RATING) for player in team) / len(team)
+        for team in teams
+    ]
+    return max(means) - min(means)
+
+
+def teamCreator(
+    players: list[int],
+    teamSize: Optional[int] = None,
+    ratings: Optional[Mapping[int, float]] = None,
+    rng: Optional[random.Random] = None,
+    pairCounts: Optional[PairCounts] = None,
+) -> list[list[int]]:
     """
     Create teams for a tournament based on the number of players.
 
+    The players list is not modified.
+
     Args:
-        players (list[str]): A list of player names.
+        players (list[int]): The IDs of the players.
+        teamSize (Optional[int]): The target number of players per team. Defaults to 2v2 for
+            8 players and 3v3 otherwise.
+        ratings (Optional[Mapping[int, float]]): Player ratings. When given, teams are balanced
+            by rating instead of being purely random.
+        rng (Optional[random.Random]): The generator used to shuffle the players. Passing a
+            seeded generator makes the teams reproducible. Defaults to the global generator.
+        pairCounts (Optional[PairCounts]): How often pairs of players have recently been
+            teammates, keyed by pairKey. When given, random teams are adjusted so fewer
+            of them are together again. Ignored when balancing by rating.
 
     Returns:
-        list[list[str]]: A list of teams, where each team is represented as a list of player names.
+        list[list[int]]: A list of teams, where each team is represented as a list of player IDs.
 
     Raises:
         InvalidTournamentException: If the number of players is less than 8 or not supported.
 
     """
-    if len(players) < 8:
+    if len(players) < MIN_PLAYERS:
         raise InvalidTournamentException("Need at least 8 players for a tournament")
 
-    random.shuffle(players)
+    if teamSize is None:
+        teamSize = 2 if len(players) == MIN_PLAYERS else 3
+    sizes = teamSizes(len(players), teamSize)
+
+    players = list(players)
+    shuffle = rng.shuffle if rng is not None else random.shuffle
+    shuffle(players)
+
+    if ratings is not None:
+        return balanceTeams(players, ratings, sizes)
+
+    teams = []
+    start = 0
+    for size in sizes:
+        teams.append(players[start : start + size])
+        start += size
+    if pairCounts:
+        teams = avoidRepeats(teams, pairCounts)
+    return teams
+
+
+def lobbySizes(playerCount: int, maxPlayers: int = MAX_LOBBY_PLAYERS) -> list[int]:
+    """
+    Work out how many players go in each lobby.
+
+    Players are spread over as few lobbies as possible without exceeding the
+    maximum, so lobby sizes differ by at most one and larger lobbies come first.
+
+    Args:
+        playerCount (int): The number of players.
+        maxPlayers (int): The maximum number of players in a lobby.
+
+    Returns:
+        list[int]: The size of each lobby. A single lobby if everyone fits in one.
+
+    Raises:
+        InvalidTournamentException: If the maximum is too small to hold a tournament.
+
+    """
+    if maxPlayers < MIN_PLAYERS:
+        raise InvalidTournamentException(
+            f"Lobbies need room for at least {MIN_PLAYERS} players"
+        )
+    lobbyCount = max(1, -(-playerCount // maxPlayers))
+    base, extra = divmod(playerCount, lobbyCount)
+    return [base + 1] * extra + [base] * (lobbyCount - extra)
+
 
-    if len(players) == 8:
-        return [players[i : i + 2] for i in range(0, len(players), 2)]
-    if len(players) == 10:
-        threesTeams = [players[i : i + 3] for i in range(0, 6, 3)]
-        twosTeams = [players[i : i + 2] for i in range(6, 10, 2)]
-        return threesTeams + twosTeams
-    if len(players) == 12:
-        return [players[i : i + 3] for i in range(0, len(players), 3)]
+def splitLobbies(
+    players: list[int],
+    maxPlayers: int = MAX_LOBBY_PLAYERS,
+    ratings: Optional[Mapping[int, float]] = None,
+    rng: Optional[random.Random] = None,
+) -> list[list[int]]:
+    """
+    Split players into lobbies of sizes given by lobbySizes.
 
-    raise InvalidTournamentException("Tournament size not supported")
+    Args:
+        players (list[int]): The IDs of the players.
+        maxPlayers (int): The maximum number of players in a lobby.
+        ratings (Optional[Mapping[int, float]]): Player ratings. When given, lobbies are
+            rating tiers, strongest first, instead of random.
+        rng (Optional[random.Random]): The generator used to shuffle the players. Defaults
+            to the global generator.
+
+    Returns:
+        list[list[int]]: The players in each lobby. The players list is not modified.
+
+    Raises:
+        InvalidTournamentException: If the maximum is too small to hold a tournament.
+
+    """
+    sizes = lobbySizes(len(players), maxPlayers)
+    if len(sizes) == 1:
+        return [list(players)]
+    if ratings is not None:
+        rating = {player: ratings.get(player, DEFAULT_RATING) for player in players}
+        order = sorted(players, key=rating.__getitem__, reverse=True)
+    else:
+        order = list(players)
+        shuffle = rng.shuffle if rng is not None else random.shuffle
+        shuffle(order)
+    lobbies = []
+    start = 0
+    for size in sizes:
+        lobbies.append(order[start : start + size])
+        start += size
+    return lobbies
 
 
-def tournamentGenerator(teams: list[list[str]]) -> str:
+def createLobbies(
+    players: list[int],
+    seeds: list[int],
+    teamSize: Optional[int] = None,
+    pairCounts: Optional[PairCounts] = None,
+    ratings: Optional[Mapping[int, float]] = None,
+    maxPlayers: int = MAX_LOBBY_PLAYERS,
+) -> list[tuple[list[int], list[list[int]]]]:
+    """
+    Split players into lobbies and create every lobby's teams in one go.
+
+    Each lobby is its own tournament, so its teams can be replayed with
+    replayTeams from its players and seed.
+
+    Args:
+        players (list[int]): The IDs of the players.
+        seeds (list[int]): A seed for each lobby, one per entry of lobbySizes.
+        teamSize (Optional[int]): The target number of players per team.
+        pairCounts (Optional[PairCounts]): How often pairs of players have recently been teammates.
+        ratings (Optional[Mapping[int, float]]): Player ratings. When given, lobbies are rating
+            tiers and teams are balanced by rating.
+        maxPlayers (int): The maximum number of players in a lobby.
+
+    Returns:
+        list[tuple[list[int], list[list[int]]]]: Each lobby's players and teams.
+
+    Raises:
+        InvalidTournamentException: If a lobby has too few players or the team size is not supported.
+
+    """
+    # The split is drawn from the first lobby's seed, so it is reproducible too
+    lobbies = splitLobbies(players, maxPlayers, ratings, sessionRng(seeds[0], -1))
+    return [
+        (lobby, teamCreator(lobby, teamSize, ratings, sessionRng(seed, 0), pairCounts))
+        for seed, lobby in zip(seeds, lobbies)
+    ]
+
+
+def formatTeam(team: Iterable[Any], names: Optional[Mapping[int, str]] = None) -> str:
+    """
+    Render a team as its players' names separated by spaces.
+
+    Args:
+        team (Iterable): The team's player IDs.
+        names (Optional[Mapping[int, str]]): Player names by ID. Without it, the team's
+            entries are rendered as they are.
+
+    Returns:
+        str: The rendered team.
+
+    """
+    if names is None:
+        return " ".join([str(player) for player in team])
+    return " ".join([names[player] for player in team])
+
+
+def tournamentGenerator(
+    teams: list[list[int]],
+    rng: Optional[random.Random] = None,
+    names: Optional[Mapping[int, str]] = None,
+) -> str:
     """
     Generate a tournament based on the teams.
 
+    The teams list is not modified.
+
     Args:
-        teams (list[list[str]]): A list of teams, where each team is represented as a list of player names.
+        teams (list[list[int]]): A list of teams, where each team is represented as a list of player IDs.
+        rng (Optional[random.Random]): The generator used to shuffle the teams. Defaults to the
+            global generator.
+        names (Optional[Mapping[int, str]]): Player names by ID, used to render the teams.
 
     Returns:
         str: A string representation of the tournament.
 
     """
-    random.shuffle(teams)
-    # return team 1 vs team 2, team 3 vs team 4, etc.
-    return "\n".join([f"{' '.join(teams[i])} vs {' '.join(teams[i+1])}" for i in range(0, len(teams), 2)])
+    teams = list(teams)
+    shuffle = rng.shuffle if rng is not None else random.shuffle
+    shuffle(teams)
+    # return team 1 vs team 2, team 3 vs team 4, etc. with the odd team out getting a bye
+    lines = [
+        f"{formatTeam(teams[i], names)} vs {formatTeam(teams[i + 1], names)}"
+        for i in range(0, len(teams) - 1, 2)
+    ]
+    if len(teams) % 2:
+        lines.append(f"{formatTeam(teams[-1], names)} has a bye")
+    return "\n".join(lines)
+
+
+def newSeed() -> int:
+    """
+    Pick a seed for a new tournament.
+
+    Returns:
+        int: A random 63-bit seed.
+
+    """
+    return secrets.randbits(63)
+
+
+def sessionRng(seed: int, draw: int) -> random.Random:
+    """
+    Create the generator for one draw of a tournament's teams.
+
+    Every reroll is a new draw, so each set of teams a tournament has offered
+    can be recreated from its seed and draw number alone.
+
+    Args:
+        seed (int): The tournament's seed.
+        draw (int): The draw number, starting at 0 for the first set of teams.
+
+    Returns:
+        random.Random: A generator that produces the same sequence for the same seed and draw.
+
+    """
+    return random.Random(f"{seed}:{draw}")
+
+
+def replayTeams(
+    players: list[int],
+    seed: int,
+    draw: int = 0,
+    teamSize: Optional[int] = None,
+    pairCounts: Optional[PairCounts] = None,
+    ratings: Optional[Mapping[int, float]] = None,
+) -> list[list[int]]:
+    """
+    Recreate the teams a tournament offered for a given draw.
+
+    Each reroll keeps away from the teammates of the draw before it, so the
+    draws are replayed in turn. Only the first draw of a tournament balanced
+    by rating is balanced; rerolls are random.
 
+    Args:
+        players (list[int]): The tournament's players, in the order they were stored.
+        seed (int): The tournament's seed.
+        draw (int): The draw number, starting at 0 for the first set of teams.
+        teamSize (Optional[int]): The team size the tournament was created with.
+        pairCounts (Optional[PairCounts]): The teammate history the tournament was created with.
+        ratings (Optional[Mapping[int, float]]): The ratings the first draw was balanced with, if any.
+
+    Returns:
+        list[list[int]]: The teams, exactly as they were first generated.
+
+    Raises:
+        InvalidTournamentException: If the number of players is less than 8 or not supported.
+
+    """
+    pairCounts = pairCounts or {}
+    teams = teamCreator(players, teamSize, ratings, sessionRng(seed, 0), pairCounts)
+    for previous in range(1, draw + 1):
+        teams = teamCreator(
+            players,
+            teamSize,
+            rng=sessionRng(seed, previous),
+            pairCounts=addTeammates(pairCounts, teams),
+        )
+    return teams
@@ -1,14 +1,286 @@
+import asyncio
+import csv
+import hashlib
+import io
+import json
+import logging
+import time
 import discord
+from discord.channel import VocalGuildChannel
 from discord import app_commands
 from discord.interactions import Interaction
-from src.tournament import teamCreator, tournamentGenerator, InvalidTournamentException
-from typing import Set, List, Optional
+from src.tournament import (
+    teamCreator,
+    createLobbies,
+    lobbySizes,
+    formatTeam,
+    addTeammates,
+    newSeed,
+    DEFAULT_RATING,
+    InvalidTournamentException,
+)
+from src.pairingHistory import PairingHistory
+from src.player import Player, playerNames
+from src.voiceRoster import VoiceRosterIndex
+from src.render import pageMessage, renderPages
+from src.standings import PlayerRecord, Standings
+from src.ratings import Rating, RatingBook, rateHistory
+from src.bracket import BYE, createBracket, formatMatches
+from src.sessionRegistry import SessionRegistry, TournamentSession
+from src.storage import StorageBackend, WriteBehindQueue
+from src.scheduler import OutboundScheduler, PRIORITY_INTERACTION
+from src.guildConfig import GuildConfig, GuildConfigCache
+from src.commandRegistry import CommandRegistry, CommandUsageException, PrefixCommand
+from src.compute import ComputeBackend, ComputeTimeoutException, ExecutorCompute
+from src.metrics import LoopLagMonitor, Metrics, MetricsCommandTree, MetricsServer
+from typing import Any, Dict, Iterable, Set, List, Mapping, Optional, Tuple, Union
 
-# Constants for setup command
+# Defaults for guilds that have not configured their own roles
 SETUP_ROLE_ID = 759395917924139038
 ADMIN_ROLE_IDS: Set[int] = {858401896930082868, 480422236243623936}
 TOURNAMENT_EMOJIS = ["🔁", "✅"]
 MAX_NICKNAME_LENGTH = 32
+MAX_MESSAGE_LENGTH = 2000
+# Members updated at once by the bulk setup command
+BULK_SETUP_CONCURRENCY = 8
+# Seconds a user must wait between creating tournaments
+CREATE_COOLDOWN = 10.0
+# Seconds to wait for more results before editing a standings message
+LEADERBOARD_DELAY = 2.0
+
+logger = logging.getLogger(__name__)
+
+
+def formatTeams(
+    teams: List[List[int]], names: Optional[Mapping[int, str]] = None
+) -> str:
+    """
+    Render teams as one "Team N: players" line each.
+
+    Args:
+        teams (List[List[int]]): The teams to render, as lists of player IDs.
+        names (Optional[Mapping[int, str]]): Player names by ID.
+
+    Returns:
+        str: The rendered teams.
+    """
+    return "\n".join(
+        [f"Team {i + 1}: {formatTeam(team, names)}" for i, team in enumerate(teams)]
+    )
+
+
+def commandTreeHash(
+    tree: app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None
+) -> str:
+    """
+    Hash the commands a tree would sync, to tell whether they changed since the last sync.
+
+    Args:
+        tree (app_commands.CommandTree): The command tree.
+        guild (Optional[discord.abc.Snowflake]): The guild whose commands to hash. Defaults to
+            the global commands.
+
+    Returns:
+        str: A hex digest that is the same whenever the synced payload would be.
+    """
+    payload = sorted(
+        (command.to_dict() for command in tree.get_commands(guild=guild)),
+        key=lambda command: (command.get("type", 1), command["name"]),
+    )
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def formatNickname(first_name: str, last_initial: str, current_name: str) -> str:
+    """
+    Build a set up member's nickname: FirstName "CurrentName" LastInitial.
+
+    Args:
+        first_name (str): The member's first name.
+        last_initial (str): The member's last initial.
+        current_name (str): The member's username.
+
+    Returns:
+        str: The nickname, truncated to fit Discord's nickname length limit.
+    """
+    # Calculate how much space we have for the middle part
+    # Format is: FirstName + space + quote + CurrentName + quote + space + LastInitial
+    # So we need 5 extra characters (2 spaces, 2 quotes, and a buffer of 1)
+    extras_length = len(first_name) + 5 + len(last_initial)
+    available_space = MAX_NICKNAME_LENGTH - extras_length
+
+    # Truncate the current name if needed
+    if len(current_name) > available_space:
+        truncated_name = current_name[: available_space - 3] + "..."
+    else:
+        truncated_name = current_name
+
+    # Create the new nickname
+    new_nickname = f'{first_name} "{truncated_name}" {last_initial}'
+
+    # Final check to ensure we're within limits
+    if len(new_nickname) > MAX_NICKNAME_LENGTH:
+        # If still too long, reduce the first name or use initials
+        new_nickname = f'{first_name[:1]}. "{truncated_name}" {last_initial}'
+    return new_nickname
+
+
+def isAlreadySetup(member: discord.Member, has_setup_role: bool) -> bool:
+    """
+    Check whether a member has already been set up.
+
+    Args:
+        member (discord.Member): The member to check.
+        has_setup_role (bool): Whether the member has the role given to members awaiting set up.
+
+    Returns:
+        bool: True if the member has a custom nickname and no setup role.
+    """
+    return not has_setup_role and member.nick is not None and member.nick != member.name
+
+
+def parseSetupCsv(text: str) -> List[Tuple[str, str, str]]:
+    """
+    Parse a bulk setup CSV with member, first_name and last_initial columns.
+
+    The member column may hold a member ID or username. A header row is
+    skipped if present.
+
+    Args:
+        text (str): The CSV file contents.
+
+    Returns:
+        List[Tuple[str, str, str]]: (member, first name, last initial) for each row.
+
+    Raises:
+        ValueError: If a row does not have three non-empty columns.
+    """
+    rows = []
+    for line_number, row in enumerate(csv.reader(io.StringIO(text)), start=1):
+        if not row or not "".join(row).strip():
+            continue
+        cells = [cell.strip() for cell in row]
+        if line_number == 1 and cells[0].lower() == "member":
+            continue
+        if len(cells) != 3 or not all(cells):
+            raise ValueError(
+                f"Line {line_number} should be member,first_name,last_initial"
+            )
+        rows.append((cells[0], cells[1], cells[2]))
+    return rows
+
+
+class BulkSetupSummary:
+    """
+    The outcome of a bulk setup.
+
+    Attributes:
+        succeeded (List[str]): Mentions of members that were set up.
+        skipped (List[str]): Mentions of members that were already set up.
+        failed (List[Tuple[str, str]]): (member, reason) for members that could not be set up.
+    """
+
+    def __init__(self):
+        self.succeeded: List[str] = []
+        self.skipped: List[str] = []
+        self.failed: List[Tuple[str, str]] = []
+
+    def format(self, limit: int = MAX_MESSAGE_LENGTH) -> str:
+        """
+        Render the summary as a message.
+
+        Args:
+            limit (int): The maximum message length. Failures that do not fit are counted instead.
+
+        Returns:
+            str: The rendered summary.
+        """
+        lines = [
+            f"Set up {len(self.succeeded)} member(s).",
+            f"Skipped {len(self.skipped)} already set up.",
+        ]
+        if self.failed:
+            lines.append(f"Failed to set up {len(self.failed)}:")
+        length = sum(len(line) + 1 for line in lines)
+        for shown, (member, reason) in enumerate(self.failed):
+            line = f"• {member}: {reason}"
+            # Leave room for the "and N more" line
+            if length + len(line) + 1 > limit - 30:
+                lines.append(f"...and {len(self.failed) - shown} more")
+                break
+            lines.append(line)
+            length += len(line) + 1
+        return "\n".join(lines)
+
+
+class TournamentControls(discord.ui.View):
+    """
+    Reroll and start buttons for a team message.
+
+    The buttons have fixed custom IDs and no timeout, so a single instance
+    handles the buttons on every team message, including messages sent
+    before a restart.
+
+    Attributes:
+        bot (DudeBot): The bot whose tournaments the buttons control.
+    """
+
+    def __init__(self, bot: "DudeBot"):
+        super().__init__(timeout=None)
+        self.bot = bot
+
+    @discord.ui.button(
+        label="Reroll",
+        emoji="🔁",
+        style=discord.ButtonStyle.secondary,
+        custom_id="tourney:reroll",
+    )
+    async def reroll(self, interaction: Interaction, button: discord.ui.Button):
+        await self.bot.reroll_from_button(interaction)
+
+    @discord.ui.button(
+        label="Start",
+        emoji="✅",
+        style=discord.ButtonStyle.success,
+        custom_id="tourney:start",
+    )
+    async def start(self, interaction: Interaction, button: discord.ui.Button):
+        await self.bot.start_from_button(interaction)
+
+
+class MessageEdit:
+    """
+    A message edit queued in the outbound scheduler.
+
+    Attributes:
+        message (Union[discord.Message, discord.PartialMessage]): The message to edit.
+        fields (Dict[str, Any]): The keyword arguments for message.edit.
+    """
+
+    __slots__ = ("message", "fields")
+
+    def __init__(
+        self,
+        message: Union[discord.Message, discord.PartialMessage],
+        fields: Dict[str, Any],
+    ):
+        self.message = message
+        self.fields = fields
+
+    async def __call__(self) -> discord.Message:
+        return await self.message.edit(**self.fields)
+
+    def merge(self, later: "MessageEdit") -> "MessageEdit":
+        """
+        Combine this edit with a later one to the same message.
+
+        Args:
+            later (MessageEdit): The later edit. Its fields replace this edit's.
+
+        Returns:
+            MessageEdit: An edit making both sets of changes.
+        """
+        return MessageEdit(self.message, {**self.fields, **later.fields})
 
 
 class DudeBot(discord.Client):
@@ -18,32 +290,117 @@ class DudeBot(discord.Client):
     Attributes:
         bot_id (str): The ID of the bot user.
         tournament_emojis (list): A list of emojis used by the bot.
-        current_team_message (discord.Message): The current team message.
+        sessions (SessionRegistry): The tournaments currently being organised, keyed by team message.
+        pairings (PairingHistory): Who has recently been teammates in each guild.
+        voice_rosters (VoiceRosterIndex): Who is in each voice channel, from voice state events.
+        standings (Standings): Every player's wins and losses in each guild.
+        ratings (RatingBook): Player ratings in each guild, used to balance new tournaments.
+        leaderboard_delay (float): Seconds to wait for more results before editing a standings message.
+        persistence (Optional[WriteBehindQueue]): Queue saving session changes, if storage is configured.
+        outbound (OutboundScheduler): Queues Discord API requests per rate limit bucket.
+        guild_configs (GuildConfigCache): Per-guild admin and setup roles, and cached member roles.
+        commands (CommandRegistry): Commands invoked by mentioning the bot.
+        low_memory (bool): Whether only voice channel members are cached.
+        use_buttons (bool): Whether team messages get buttons instead of reactions.
+        compute (ComputeBackend): Runs team balancing and bracket creation off the event loop.
+        metrics (Optional[Metrics]): Handler, command and request metrics, if enabled.
         tree (app_commands.CommandTree): The command tree for slash commands.
     """
 
-    def __init__(self, *args, **kwargs):
-        # Set up intents for the required permissions
+    def __init__(
+        self,
+        *args,
+        storage: Optional[StorageBackend] = None,
+        low_memory: bool = False,
+        use_buttons: bool = False,
+        compute: Optional[ComputeBackend] = None,
+        metrics: Optional[Metrics] = None,
+        metrics_port: Optional[int] = None,
+        leaderboard_delay: float = LEADERBOARD_DELAY,
+        **kwargs,
+    ):
+        # Set up intents for the required permissions. With buttons, neither
+        # reactions nor message content are needed; Discord still sends the
+        # content of messages that mention the bot. Creating teams only needs
+        # voice states, but /setup_bulk lists role members and looks members
+        # up by name, which Discord refuses without the members intent
         intents = discord.Intents.default()
-        intents.message_content = True
+        intents.message_content = not use_buttons
         intents.members = True
-        intents.reactions = True
+        intents.reactions = not use_buttons
         kwargs["intents"] = intents
+        if low_memory:
+            # Only members in voice channels are needed to create tournaments;
+            # everyone else is fetched when a command asks for them
+            member_cache_flags = discord.MemberCacheFlags.none()
+            member_cache_flags.voice = True
+            kwargs.setdefault("member_cache_flags", member_cache_flags)
+            kwargs.setdefault("chunk_guilds_at_startup", False)
+        if metrics_port is not None and metrics is None:
+            metrics = Metrics()
+        if metrics is not None:
+            kwargs.setdefault("http_trace", metrics.http_trace())
         super().__init__(*args, **kwargs)
 
+        self.low_memory = low_memory
+        self.use_buttons = use_buttons
+        self.compute = compute if compute is not None else ExecutorCompute()
+        self.metrics = metrics
+        self._metrics_port = metrics_port
+        self._metrics_server: Optional[MetricsServer] = None
+        self._loop_lag: Optional[LoopLagMonitor] = None
+        self._tournament_controls: Optional[TournamentControls] = None
+
         self.bot_id: str = ""
         self.tournament_emojis: List[str] = TOURNAMENT_EMOJIS
-        self.current_team_message: Optional[discord.Message] = None
-        self.teams: List[List[str]] = []
-        self.tournament_creator: int = 0
-        self.players: List[str] = []
+        self.sessions = SessionRegistry(on_remove=self.delete_session)
+        self.pairings = PairingHistory()
+        self.voice_rosters = VoiceRosterIndex()
+        self.standings = Standings()
+        self.ratings = RatingBook()
+        self.leaderboard_delay = leaderboard_delay
+        # Pending standings edits by team message ID
+        self._leaderboard_updates: Dict[int, asyncio.Task] = {}
+        # Every standings update still running, including ones already sending
+        self._leaderboard_tasks: Set[asyncio.Task] = set()
+        self.persistence: Optional[WriteBehindQueue] = (
+            WriteBehindQueue(storage) if storage is not None else None
+        )
+        self.outbound = OutboundScheduler()
+        self.guild_configs = GuildConfigCache(ADMIN_ROLE_IDS, SETUP_ROLE_ID)
+
+        # Commands invoked by mentioning the bot
+        self.commands = CommandRegistry()
+        self.commands.add(
+            PrefixCommand(
+                "help",
+                self.command_help,
+                aliases=("commands",),
+                description="gives a help message",
+            )
+        )
+        self.commands.add(
+            PrefixCommand(
+                "create",
+                self.command_create,
+                aliases=("new", "teams"),
+                max_args=1,
+                cooldown=CREATE_COOLDOWN,
+                usage="[team size]",
+                description="generates teams from your voice channel",
+            )
+        )
 
         # Set up command tree for slash commands
-        self.tree = app_commands.CommandTree(self)
+        self.tree = (
+            MetricsCommandTree(self, metrics)
+            if metrics is not None
+            else app_commands.CommandTree(self)
+        )
 
         # Register the setup command
-        @self.tree.command()
-        @app_commands.checks.has_any_role(*ADMIN_ROLE_IDS)
+        @self.tree.command()  # type: ignore[arg-type]
+        @app_commands.check(self.check_admin)
         async def setup(
             interaction: Interaction,
             member: discord.Member,
@@ -63,77 +420,42 @@ class DudeBot(discord.Client):
                 # Check if the user has already been setup
                 guild = interaction.guild
                 if guild is None:
-                    await interaction.response.send_message(
+                    await self.respond(
+                        interaction,
                         "This command can only be used in a server.",
                         ephemeral=True,
                     )
                     return
 
-                setup_role = guild.get_role(SETUP_ROLE_ID)
-                is_already_setup = (
-                    setup_role not in member.roles
-                    and member.nick is not None
-                    and member.nick != member.name
-                )
-
-                if is_already_setup:
-                    await interaction.response.send_message(
+                setup_role = self.guild_configs.setup_role(guild)
+                if isAlreadySetup(member, self.guild_configs.has_setup_role(member)):
+                    await self.respond(
+                        interaction,
                         f"{member.mention} has already been set up.",
                         ephemeral=True,
                     )
                     return
 
-                # Get current nickname or username if no nickname
-                current_name = member.name
-
-                # Format the new nickname: FirstName "CurrentName" LastInitial
-                # Calculate how much space we have for the middle part
-                # Format is: FirstName + space + quote + CurrentName + quote + space + LastInitial
-                # So we need 5 extra characters (2 spaces, 2 quotes, and a buffer of 1)
-                extras_length = len(first_name) + 5 + len(last_initial)
-                available_space = MAX_NICKNAME_LENGTH - extras_length
-
-                # Truncate the current name if needed
-                if len(current_name) > available_space:
-                    truncated_name = current_name[: available_space - 3] + "..."
-                else:
-                    truncated_name = current_name
-
-                # Create the new nickname
-                new_nickname = f'{first_name} "{truncated_name}" {last_initial}'
-
-                # Final check to ensure we're within limits
-                if len(new_nickname) > MAX_NICKNAME_LENGTH:
-                    # If still too long, reduce the first name or use initials
-                    new_nickname = (
-                        f'{first_name[:1]}. "{truncated_name}" {last_initial}'
-                    )
-
-                await member.edit(nick=new_nickname)
-
-                # Remove setup role if they have it
-                guild = interaction.guild
-                if guild is None:
-                    return
-
-                setup_role = guild.get_role(SETUP_ROLE_ID)
-                if setup_role in member.roles:
-                    await member.remove_roles(setup_role)
+                new_nickname = await self.setup_member(
+                    guild, member, first_name, last_initial, setup_role
+                )
 
-                await interaction.response.send_message(
+                await self.respond(
+                    interaction,
                     f"Successfully set up {member.mention}:\n"
                     f"• Changed nickname to: {new_nickname}\n"
                     f"• Removed setup role",
                     ephemeral=True,
                 )
             except discord.Forbidden:
-                await interaction.response.send_message(
+                await self.respond(
+                    interaction,
                     "I don't have permission to modify this user's nickname or roles.",
                     ephemeral=True,
                 )
             except Exception as e:
-                await interaction.response.send_message(
-                    f"An error occurred: {str(e)}", ephemeral=True
+                await self.respond(
+                    interaction, f"An error occurred: {str(e)}", ephemeral=True
                 )
 
         @setup.error
@@ -141,134 +463,1835 @@ class DudeBot(discord.Client):
             interaction: Interaction, error: app_commands.AppCommandError
         ):
             if isinstance(error, app_commands.MissingAnyRole):
-                await interaction.response.send_message(
-                    "You don't have permission to use this command.", ephemeral=True
+                await self.respond(
+                    interaction,
+                    "You don't have permission to use this command.",
+                    ephemeral=True,
                 )
             else:
-                await interaction.response.send_message(
-                    f"An error occurred: {str(error)}", ephemeral=True
+                await self.respond(
+                    interaction, f"An error occurred: {str(error)}", ephemeral=True
                 )
 
-    async def setup_hook(self):
-        """
-        Called when the bot is setting up. Used to sync the command tree.
-        """
-        await self.tree.sync()
+        # Register the per-guild role configuration commands
+        config = app_commands.Group(
+            name="config", description="Configure the bot's roles for this server"
+        )
 
-    async def on_ready(self):
-        """
-        Called when the bot is ready and logged in.
-        """
-        print(f"Logged on as {self.user}!")
-        self.bot_id = self.user.id
+        @config.command(name="setup_role")  # type: ignore[arg-type]
+        @app_commands.check(self.check_admin)
+        async def config_setup_role(interaction: Interaction, role: discord.Role):
+            """
+            Set the role given to members awaiting setup.
 
-    async def on_reaction_add(self, reaction: discord.Reaction, user: discord.User):
-        """
-        Called when a reaction is added to a message.
+            Parameters
+            ----------
+            role : The setup role
+            """
+            current = self.guild_configs.get(role.guild.id)
+            await self.save_guild_config(
+                GuildConfig(role.guild.id, current.admin_role_ids, role.id)
+            )
+            await self.respond(
+                interaction, f"Setup role set to {role.mention}.", ephemeral=True
+            )
 
-        Args:
-            reaction (discord.Reaction): The reaction that was added.
-            user (discord.User): The user who added the reaction.
-        """
-        if user == self.user:
-            return
-        if (
-            reaction.emoji == "🔁"
-            and self.current_team_message is not None
-            and reaction.message.id == self.current_team_message.id
-            and user.id == self.tournament_creator
-        ):
-            await self.current_team_message.delete()
-            teams = teamCreator(self.players)
-            self.teams = teams
-            teams_message = "\n".join(
-                [
-                    f"Team {i + 1}: {' '.join(players)}"
-                    for i, players in enumerate(teams)
-                ]
+        @config.command(name="admin_add")  # type: ignore[arg-type]
+        @app_commands.check(self.check_admin)
+        async def config_admin_add(interaction: Interaction, role: discord.Role):
+            """
+            Allow a role to use admin commands.
+
+            Parameters
+            ----------
+            role : The role to allow
+            """
+            current = self.guild_configs.get(role.guild.id)
+            await self.save_guild_config(
+                GuildConfig(
+                    role.guild.id,
+                    current.admin_role_ids | {role.id},
+                    current.setup_role_id,
+                )
             )
+            await self.respond(
+                interaction,
+                f"{role.mention} can now use admin commands.",
+                ephemeral=True,
+            )
+
+        @config.command(name="admin_remove")  # type: ignore[arg-type]
+        @app_commands.check(self.check_admin)
+        async def config_admin_remove(interaction: Interaction, role: discord.Role):
+            """
+            Stop a role from using admin commands.
 
-            created_message = await reaction.message.channel.send(
-                f"```{teams_message}```"
+            Parameters
+            ----------
+            role : The role to remove
+            """
+            current = self.guild_configs.get(role.guild.id)
+            if current.admin_role_ids == {role.id}:
+                await self.respond(
+                    interaction, "At least one admin role is required.", ephemeral=True
+                )
+                return
+            await self.save_guild_config(
+                GuildConfig(
+                    role.guild.id,
+                    current.admin_role_ids - {role.id},
+                    current.setup_role_id,
+                )
             )
-            self.current_team_message = created_message
-            for emoji in self.tournament_emojis:
-                await self.current_team_message.add_reaction(emoji)
-        if (
-            reaction.emoji == "✅"
-            and self.current_team_message is not None
-            and reaction.message.id == self.current_team_message.id
-            and user.id == self.tournament_creator
+            await self.respond(
+                interaction,
+                f"{role.mention} can no longer use admin commands.",
+                ephemeral=True,
+            )
+
+        config.error(setup_error)  # type: ignore[arg-type]
+        self.tree.add_command(config)
+
+        # Register the tournament commands
+        tourney = app_commands.Group(
+            name="tourney", description="Create and run tournaments"
+        )
+
+        @tourney.command(name="create")  # type: ignore[arg-type]
+        async def tourney_create(
+            interaction: Interaction,
+            team_size: Optional[app_commands.Range[int, 1, 10]] = None,
         ):
-            for emoji in self.tournament_emojis:
-                await self.current_team_message.remove_reaction(emoji, self.user)
-            await self.current_team_message.channel.send(
-                f"```{tournamentGenerator(self.teams)}```"
+            """
+            Create teams from the members of your voice channel.
+
+            Parameters
+            ----------
+            team_size : The number of players per team (defaults to 2 for 8 players, otherwise 3)
+            """
+            user = interaction.user
+            if not isinstance(user, discord.Member) or interaction.channel is None:
+                await self.respond(
+                    interaction,
+                    "This command can only be used in a server.",
+                    ephemeral=True,
+                )
+                return
+            if not user.voice or not user.voice.channel:
+                await self.respond(
+                    interaction,
+                    "You must be in a voice channel to use this command.",
+                    ephemeral=True,
+                )
+                return
+
+            # Acknowledge before balancing teams, which can take a while
+            await self.defer(interaction, thinking=True)
+            try:
+                sessions = await self.create_sessions(
+                    user.guild.id,
+                    interaction.channel.id,
+                    user.id,
+                    self.voice_players(user.voice.channel),
+                    team_size,
+                )
+            except (InvalidTournamentException, ComputeTimeoutException) as e:
+                await interaction.followup.send(f"```Error: {e}```", ephemeral=True)
+                return
+
+            team_messages = await asyncio.gather(
+                *(
+                    interaction.followup.send(
+                        embeds=self.team_embeds(session),
+                        view=self.tournament_controls(),
+                        wait=True,
+                    )
+                    for session in sessions
+                )
             )
-            self.current_team_message = None
+            for session, team_message in zip(sessions, team_messages):
+                session.message_id = team_message.id
+                self.sessions.add(session)
+                self.save_session(session)
 
-    async def on_message(self, message: discord.Message):
-        """
-        Called when a message is received.
+        @tourney.command(name="reroll")  # type: ignore[arg-type]
+        async def tourney_reroll(
+            interaction: Interaction,
+            lobby: Optional[app_commands.Range[int, 1]] = None,
+        ):
+            """
+            Generate new teams for the tournament being organised in this channel.
 
-        Args:
-            message (discord.Message): The message that was received.
-        """
-        if not message.mentions or message.mentions[0].id != self.bot_id:
-            return
+            Parameters
+            ----------
+            lobby : The lobby to reroll, if you are organising several here
+            """
+            session, error = self.session_to_control(interaction, lobby)
+            if session is None or error is not None:
+                await self.respond(interaction, error, ephemeral=True)
+                return
 
-        command_parts = message.content.split()
-        if len(command_parts) != 2:
-            return
+            await self.defer(interaction, ephemeral=True, thinking=True)
+            try:
+                await self.reroll_session(session)
+            except (InvalidTournamentException, ComputeTimeoutException) as e:
+                await interaction.followup.send(f"```Error: {e}```", ephemeral=True)
+                return
+            await self.edit_message(
+                self.team_message(session),
+                embeds=self.team_embeds(session),
+            )
+            await interaction.followup.send("Teams rerolled.", ephemeral=True)
+
+        @tourney.command(name="start")  # type: ignore[arg-type]
+        async def tourney_start(
+            interaction: Interaction,
+            lobby: Optional[app_commands.Range[int, 1]] = None,
+        ):
+            """
+            Confirm the teams of the tournament being organised in this channel and post the matches.
 
-        command = command_parts[1].lower()
+            Parameters
+            ----------
+            lobby : The lobby to start, if you are organising several here
+            """
+            session, error = self.session_to_control(interaction, lobby)
+            if session is None or error is not None:
+                await self.respond(interaction, error, ephemeral=True)
+                return
 
-        if command == "help":
-            await message.channel.send(
-                "```I'm a bot that can help you create teams for a tournament "
-                "if you have more than 8 people in a voice channel. "
-                "Just type @tourney create while in the voice channel and I'll take care of the rest.```"
+            await self.defer(interaction, thinking=True)
+            try:
+                await self.start_session(session)
+            except (InvalidTournamentException, ComputeTimeoutException) as e:
+                await interaction.followup.send(f"```Error: {e}```", ephemeral=True)
+                return
+            assert session.bracket is not None
+            await asyncio.gather(
+                self.edit_message(self.team_message(session), view=None),
+                interaction.followup.send(**pageMessage(self.match_pages(session))),
             )
-        elif command == "create":
-            # Check if author has voice state and is in a voice channel
-            if not isinstance(message.author, discord.Member):
-                await message.channel.send(
-                    "```Error: Command must be used in a server.```"
+
+        self.tree.add_command(tourney)
+
+        # Register the result reporting command
+        @self.tree.command(name="report")  # type: ignore[arg-type]
+        async def report(
+            interaction: Interaction,
+            match: app_commands.Range[int, 1],
+            winner: discord.Member,
+            winner_score: Optional[app_commands.Range[int, 0]] = None,
+            loser_score: Optional[app_commands.Range[int, 0]] = None,
+        ):
+            """
+            Report the result of a match in the tournament being played in this channel.
+
+            Parameters
+            ----------
+            match : The match number
+            winner : Any player on the winning team
+            winner_score : The winning team's score
+            loser_score : The losing team's score
+            """
+            session = self.report_session(interaction, winner.id)
+            error = self.check_report_control(session, interaction.user)
+            if session is None or error is not None:
+                await self.respond(interaction, error, ephemeral=True)
+                return
+
+            try:
+                if (winner_score is None) != (loser_score is None):
+                    raise InvalidTournamentException("Give both scores or neither")
+                scores = (
+                    (winner_score, loser_score)
+                    if winner_score is not None and loser_score is not None
+                    else None
                 )
+                await self.report_match(session, match - 1, winner.id, scores)
+            except InvalidTournamentException as e:
+                await self.respond(interaction, f"```Error: {e}```", ephemeral=True)
                 return
+            await self.respond(
+                interaction, f"Recorded the result of match {match}.", ephemeral=True
+            )
+
+        # Register the bulk setup command
+        @self.tree.command(name="setup_bulk")  # type: ignore[arg-type]
+        @app_commands.check(self.check_admin)
+        async def setup_bulk(
+            interaction: Interaction,
+            members_csv: Optional[discord.Attachment] = None,
+            role: Optional[discord.Role] = None,
+        ):
+            """
+            Setup many users at once from a CSV file or a role.
 
-            if not message.author.voice or not message.author.voice.channel:
-                await message.channel.send(
-                    "```Error: You must be in a voice channel to use this command.```"
+            Parameters
+            ----------
+            members_csv : A CSV file with member,first_name,last_initial rows (member is an ID or username)
+            role : Only setup members with this role, or everyone with it if no CSV is given
+            """
+            guild = interaction.guild
+            if guild is None:
+                await self.respond(
+                    interaction,
+                    "This command can only be used in a server.",
+                    ephemeral=True,
+                )
+                return
+            if members_csv is None and role is None:
+                await self.respond(
+                    interaction, "Provide a CSV file, a role or both.", ephemeral=True
                 )
                 return
 
-            voice_channel = message.author.voice.channel
+            rows = None
+            if members_csv is not None:
+                try:
+                    rows = parseSetupCsv((await members_csv.read()).decode("utf-8"))
+                except (ValueError, UnicodeDecodeError) as e:
+                    await self.respond(
+                        interaction, f"Invalid CSV file: {e}", ephemeral=True
+                    )
+                    return
+
+            # Updating many members can take longer than the response deadline
+            await self.defer(interaction, ephemeral=True, thinking=True)
+            summary = BulkSetupSummary()
+            requests = await self.resolve_setup_requests(guild, rows, role, summary)
+            result = await self.setup_members(
+                guild, requests, self.guild_configs.setup_role(guild)
+            )
+            summary.succeeded = result.succeeded
+            summary.skipped = result.skipped
+            summary.failed += result.failed
+            await interaction.followup.send(summary.format(), ephemeral=True)
+
+        setup_bulk.error(setup_error)
 
-            # Check if the voice channel is a type that has members
-            if not hasattr(voice_channel, "members"):
-                await message.channel.send(
-                    "```Error: Cannot get members from this type of voice channel.```"
+        # Register the rating rebuild command
+        @self.tree.command(name="rebuild_ratings")  # type: ignore[arg-type]
+        @app_commands.check(self.check_admin)
+        async def rebuild_ratings(interaction: Interaction):
+            """
+            Recompute this server's player ratings from every rated tournament.
+            """
+            if interaction.guild_id is None:
+                await self.respond(
+                    interaction,
+                    "This command can only be used in a server.",
+                    ephemeral=True,
                 )
                 return
+            await self.defer(interaction, ephemeral=True, thinking=True)
+            rated = await self.rebuild_ratings(interaction.guild_id)
+            await interaction.followup.send(
+                f"Recomputed the ratings of {rated} player(s).", ephemeral=True
+            )
 
-            self.players = [member.name for member in voice_channel.members]
+        rebuild_ratings.error(setup_error)
 
-            try:
-                teams = teamCreator(self.players)
-                self.teams = teams
-                teams_message = "\n".join(
-                    [
-                        f"Team {i + 1}: {' '.join(players)}"
-                        for i, players in enumerate(teams)
-                    ]
+        if metrics is not None:
+            self.instrument(metrics)
+
+    def instrument(self, metrics: Metrics):
+        """
+        Time every event handler and report the bot's queues as gauges.
+
+        Handlers are only wrapped when metrics are enabled, so there is no
+        overhead otherwise.
+
+        Args:
+            metrics (Metrics): Where to record the metrics.
+        """
+        for name in dir(type(self)):
+            handler = getattr(self, name)
+            if (
+                name.startswith("on_")
+                and name not in ("on_error", "on_app_command_completion")
+                and asyncio.iscoroutinefunction(handler)
+            ):
+                setattr(
+                    self,
+                    name,
+                    metrics.time_coroutine(
+                        "tourneybot_event_duration_seconds",
+                        "tourneybot_event_errors_total",
+                        (("event", name[3:]),),
+                        handler,
+                    ),
                 )
 
-                created_message = await message.channel.send(f"```{teams_message}```")
-                self.current_team_message = created_message
-                self.tournament_creator = message.author.id
+        metrics.gauge_callback("tourneybot_active_sessions", lambda: len(self.sessions))
+        metrics.gauge_callback(
+            "tourneybot_outbound_queue_depth", self.outbound.queue_depth
+        )
+        # The scheduler keeps its own running totals, read when scraped
+        stats = self.outbound.stats
+        for name, read in (
+            ("tourneybot_outbound_submitted_total", lambda: stats.submitted),
+            ("tourneybot_outbound_coalesced_total", lambda: stats.coalesced),
+            ("tourneybot_outbound_completed_total", lambda: stats.completed),
+            ("tourneybot_outbound_failed_total", lambda: stats.failed),
+            ("tourneybot_outbound_rate_limited_total", lambda: stats.rate_limited),
+            ("tourneybot_outbound_wait_seconds_total", lambda: stats.total_wait),
+            ("tourneybot_outbound_max_wait_seconds", lambda: stats.max_wait),
+        ):
+            metrics.gauge_callback(name, read)
+        if self.persistence is not None:
+            persistence = self.persistence
+            metrics.gauge_callback(
+                "tourneybot_unsaved_sessions", lambda: len(persistence)
+            )
+        for name, kind, help in (
+            (
+                "tourneybot_event_duration_seconds",
+                "histogram",
+                "Time spent in event handlers.",
+            ),
+            ("tourneybot_event_errors_total", "counter", "Event handlers that raised."),
+            (
+                "tourneybot_command_duration_seconds",
+                "histogram",
+                "Time spent in slash commands.",
+            ),
+            (
+                "tourneybot_command_errors_total",
+                "counter",
+                "Slash commands that failed.",
+            ),
+            (
+                "tourneybot_discord_requests_total",
+                "counter",
+                "Discord API requests by route and status.",
+            ),
+            (
+                "tourneybot_discord_request_failures_total",
+                "counter",
+                "Discord API requests that failed or returned an error status.",
+            ),
+            (
+                "tourneybot_discord_request_duration_seconds",
+                "histogram",
+                "Discord API request latency.",
+            ),
+            ("tourneybot_active_sessions", "gauge", "Tournaments being organised."),
+            (
+                "tourneybot_outbound_queue_depth",
+                "gauge",
+                "Discord API requests waiting to be sent.",
+            ),
+            (
+                "tourneybot_outbound_submitted_total",
+                "counter",
+                "Discord API requests queued.",
+            ),
+            (
+                "tourneybot_outbound_coalesced_total",
+                "counter",
+                "Queued Discord API requests merged into one already waiting.",
+            ),
+            (
+                "tourneybot_outbound_completed_total",
+                "counter",
+                "Queued Discord API requests that succeeded.",
+            ),
+            (
+                "tourneybot_outbound_failed_total",
+                "counter",
+                "Queued Discord API requests that failed.",
+            ),
+            (
+                "tourneybot_outbound_rate_limited_total",
+                "counter",
+                "Times a request bucket was paused after a 429 response.",
+            ),
+            (
+                "tourneybot_outbound_wait_seconds_total",
+                "counter",
+                "Time queued Discord API requests spent waiting to be sent.",
+            ),
+            (
+                "tourneybot_outbound_max_wait_seconds",
+                "gauge",
+                "The longest a queued Discord API request has waited to be sent.",
+            ),
+            (
+                "tourneybot_unsaved_sessions",
+                "gauge",
+                "Tournament changes waiting to be saved.",
+            ),
+            (
+                "tourneybot_event_loop_lag_seconds",
+                "histogram",
+                "How late the event loop runs scheduled work.",
+            ),
+            (
+                "tourneybot_event_loop_last_lag_seconds",
+                "gauge",
+                "The most recent event loop lag measurement.",
+            ),
+        ):
+            metrics.describe(name, kind, help)
+
+    def check_admin(self, interaction: Interaction) -> bool:
+        """
+        Check that the user of a command has one of the guild's admin roles.
 
-                for emoji in self.tournament_emojis:
-                    await created_message.add_reaction(emoji)
-            except InvalidTournamentException as e:
-                await message.channel.send(f"```Error: {e}```")
+        Args:
+            interaction (Interaction): The command interaction.
+
+        Returns:
+            bool: True if the user is an admin.
+
+        Raises:
+            app_commands.NoPrivateMessage: If the command was used outside a server.
+            app_commands.MissingAnyRole: If the user has none of the admin roles.
+        """
+        if not isinstance(interaction.user, discord.Member):
+            raise app_commands.NoPrivateMessage()
+        if not self.guild_configs.is_admin(interaction.user):
+            config = self.guild_configs.get(interaction.user.guild.id)
+            raise app_commands.MissingAnyRole(sorted(config.admin_role_ids))
+        return True
+
+    async def save_guild_config(self, config: GuildConfig):
+        """
+        Apply and store a guild's role settings.
+
+        Args:
+            config (GuildConfig): The new settings.
+        """
+        self.guild_configs.set(config)
+        if self.persistence is not None:
+            await asyncio.to_thread(
+                self.persistence.backend.save_guild_config, config.to_dict()
+            )
+
+    async def on_guild_available(self, guild: discord.Guild):
+        """
+        Called when a guild's data arrives. Loads its voice channel rosters.
+        """
+        self.voice_rosters.load_guild(
+            guild.id,
+            {
+                channel.id: [Player.from_member(member) for member in channel.members]
+                for channel in [*guild.voice_channels, *guild.stage_channels]
+            },
+        )
+
+    async def on_guild_unavailable(self, guild: discord.Guild):
+        """
+        Called when a guild goes down. Its rosters are reloaded once it is back.
+        """
+        self.voice_rosters.forget_guild(guild.id)
+
+    async def on_guild_remove(self, guild: discord.Guild):
+        """
+        Called when the bot leaves a guild. Drops its voice channel rosters, standings and ratings.
+        """
+        self.voice_rosters.forget_guild(guild.id)
+        self.standings.forget_guild(guild.id)
+        self.ratings.forget_guild(guild.id)
+
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        """
+        Called when a channel is deleted. Drops its roster if it was a voice channel.
+        """
+        self.voice_rosters.forget_channel(channel.id)
+
+    async def on_voice_state_update(
+        self,
+        member: discord.Member,
+        before: discord.VoiceState,
+        after: discord.VoiceState,
+    ):
+        """
+        Called when a member joins, leaves or moves between voice channels, or
+        changes their mute or deafen state. Updates the voice channel rosters.
+        """
+        self.voice_rosters.update(
+            member.guild.id,
+            Player.from_member(member),
+            after.channel.id if after.channel is not None else None,
+        )
+
+    def voice_players(self, channel: VocalGuildChannel) -> List[Player]:
+        """
+        Get the players in a voice channel.
+
+        Args:
+            channel (VocalGuildChannel): The voice or stage channel.
+
+        Returns:
+            List[Player]: The players, from the roster index once the channel's guild
+                has been loaded, otherwise from the channel's cached members.
+        """
+        roster = self.voice_rosters.snapshot(channel.guild.id, channel.id)
+        if roster is not None:
+            return list(roster)
+        return [Player.from_member(member) for member in channel.members]
+
+    async def on_guild_role_delete(self, role: discord.Role):
+        """
+        Called when a role is deleted. Removes the role from the guild's settings.
+        """
+        self.guild_configs.remove_role(role.guild.id, role.id)
+
+    async def setup_member(
+        self,
+        guild: discord.Guild,
+        member: discord.Member,
+        first_name: str,
+        last_initial: str,
+        setup_role: Optional[discord.Role],
+    ) -> str:
+        """
+        Set a member's nickname and remove their setup role in a single edit.
+
+        Args:
+            guild (discord.Guild): The guild the member belongs to.
+            member (discord.Member): The member to set up.
+            first_name (str): The member's first name.
+            last_initial (str): The member's last initial.
+            setup_role (Optional[discord.Role]): The role given to members awaiting set up.
+
+        Returns:
+            str: The member's new nickname.
+        """
+        new_nickname = formatNickname(first_name, last_initial, member.name)
+        changes: Dict[str, Any] = {"nick": new_nickname}
+        if setup_role is not None and self.guild_configs.has_setup_role(member):
+            changes["roles"] = [
+                role
+                for role in member.roles
+                if role != setup_role and not role.is_default()
+            ]
+        await self.outbound.submit(
+            ("members", guild.id), lambda: member.edit(**changes)
+        )
+        return new_nickname
+
+    async def setup_members(
+        self,
+        guild: discord.Guild,
+        requests: List[Tuple[discord.Member, str, str]],
+        setup_role: Optional[discord.Role],
+    ) -> BulkSetupSummary:
+        """
+        Set up many members concurrently.
+
+        Args:
+            guild (discord.Guild): The guild the members belong to.
+            requests (List[Tuple[discord.Member, str, str]]): (member, first name, last initial) to set up.
+            setup_role (Optional[discord.Role]): The role given to members awaiting set up.
+
+        Returns:
+            BulkSetupSummary: Which members were set up, skipped or failed.
+        """
+        summary = BulkSetupSummary()
+        semaphore = asyncio.Semaphore(BULK_SETUP_CONCURRENCY)
+
+        async def setup_one(member: discord.Member, first_name: str, last_initial: str):
+            if isAlreadySetup(member, self.guild_configs.has_setup_role(member)):
+                summary.skipped.append(member.mention)
+                return
+            async with semaphore:
+                try:
+                    await self.setup_member(
+                        guild, member, first_name, last_initial, setup_role
+                    )
+                except discord.Forbidden:
+                    summary.failed.append((member.mention, "missing permissions"))
+                except Exception as e:
+                    summary.failed.append((member.mention, str(e)))
+                else:
+                    summary.succeeded.append(member.mention)
+
+        await asyncio.gather(*(setup_one(*request) for request in requests))
+        return summary
+
+    async def find_member(
+        self, guild: discord.Guild, reference: str
+    ) -> Optional[discord.Member]:
+        """
+        Find a member by ID or username, fetching them if they are not cached.
+
+        Args:
+            guild (discord.Guild): The guild to search.
+            reference (str): A member ID or username.
+
+        Returns:
+            Optional[discord.Member]: The member, or None if there is no such member.
+        """
+        if reference.isdigit():
+            member = guild.get_member(int(reference))
+            if member is None:
+                try:
+                    member = await guild.fetch_member(int(reference))
+                except discord.HTTPException:
+                    return None
+            return member
+
+        member = guild.get_member_named(reference)
+        if member is None:
+            # Ask the gateway for just this member rather than chunking the guild
+            matches = await guild.query_members(query=reference, limit=5, cache=False)
+            member = next((m for m in matches if m.name == reference), None)
+        return member
+
+    async def resolve_setup_requests(
+        self,
+        guild: discord.Guild,
+        rows: Optional[List[Tuple[str, str, str]]],
+        role: Optional[discord.Role],
+        summary: BulkSetupSummary,
+    ) -> List[Tuple[discord.Member, str, str]]:
+        """
+        Work out which members a bulk setup applies to.
+
+        With CSV rows, each row's member is looked up by ID or username and,
+        if a role is given, must have it. With only a role, every member with
+        the role is set up using a nickname of the form "First Last".
+        Members that cannot be resolved are added to the summary's failures.
+
+        Args:
+            guild (discord.Guild): The guild to set members up in.
+            rows (Optional[List[Tuple[str, str, str]]]): Parsed CSV rows.
+            role (Optional[discord.Role]): Only set up members with this role.
+            summary (BulkSetupSummary): Collects members that could not be resolved.
+
+        Returns:
+            List[Tuple[discord.Member, str, str]]: (member, first name, last initial) to set up.
+        """
+        requests = []
+        if rows is None:
+            assert role is not None
+            if self.low_memory:
+                # Role members are not cached, so page through the guild
+                role_members = [
+                    member
+                    async for member in guild.fetch_members(limit=None)
+                    if member.get_role(role.id) is not None
+                ]
+            else:
+                role_members = role.members
+            for role_member in role_members:
+                name_parts = (role_member.nick or "").split()
+                if len(name_parts) < 2:
+                    summary.failed.append(
+                        (role_member.mention, "no first and last name in nickname")
+                    )
+                    continue
+                requests.append((role_member, name_parts[0], name_parts[-1][:1]))
+            return requests
+
+        for reference, first_name, last_initial in rows:
+            member = await self.find_member(guild, reference)
+            if member is None:
+                summary.failed.append((reference, "member not found"))
+            elif role is not None and all(
+                member_role.id != role.id for member_role in member.roles
+            ):
+                summary.failed.append((member.mention, f"does not have {role.name}"))
+            else:
+                requests.append((member, first_name, last_initial))
+        return requests
+
+    async def setup_hook(self):
+        """
+        Called when the bot is setting up. Used to restore saved tournaments and sync the command tree.
+        """
+        await self.restore_sessions()
+        self.add_view(self.tournament_controls())
+        if self.metrics is not None:
+            self._loop_lag = LoopLagMonitor(self.metrics)
+            self._loop_lag.start()
+            if self._metrics_port is not None:
+                self._metrics_server = MetricsServer(self.metrics, self._metrics_port)
+                await self._metrics_server.start()
+        await self.sync_commands()
+
+    async def sync_commands(
+        self, guilds: Iterable[Optional[discord.abc.Snowflake]] = (None,)
+    ) -> List[Optional[discord.abc.Snowflake]]:
+        """
+        Sync the command tree, skipping scopes whose commands have not changed
+        since they were last synced.
+
+        A hash of each scope's commands is saved after syncing. Without
+        storage, there is nothing to compare against and every scope is synced.
+
+        Args:
+            guilds (Iterable[Optional[discord.abc.Snowflake]]): The guilds to sync, with None
+                for the global commands. Defaults to the global commands only.
+
+        Returns:
+            List[Optional[discord.abc.Snowflake]]: The scopes that were synced.
+        """
+        synced = []
+        for guild in guilds:
+            if self.persistence is None:
+                await self.tree.sync(guild=guild)
+                synced.append(guild)
+                continue
+
+            backend = self.persistence.backend
+            key = (
+                f"command_hash:{self.application_id}:{guild.id if guild else 'global'}"
+            )
+            digest = commandTreeHash(self.tree, guild)
+            if await asyncio.to_thread(backend.load_value, key) == digest:
+                continue
+            await self.tree.sync(guild=guild)
+            await asyncio.to_thread(backend.save_value, key, digest)
+            synced.append(guild)
+        return synced
+
+    async def close(self):
+        """
+        Called when the bot shuts down. Saves any pending tournament changes.
+        """
+        for update in self._leaderboard_tasks:
+            update.cancel()
+        if self.persistence is not None:
+            await self.persistence.close()
+        self.compute.close()
+        if self._loop_lag is not None:
+            await self._loop_lag.stop()
+        if self._metrics_server is not None:
+            await self._metrics_server.stop()
+        await super().close()
+
+    async def restore_sessions(self) -> int:
+        """
+        Load tournaments that were active before the last restart and guild
+        settings, and start saving changes.
+
+        Returns:
+            int: The number of tournaments restored.
+        """
+        if self.persistence is None:
+            return 0
+        since = time.time() - self.sessions.idle_timeout
+        stored = await asyncio.to_thread(self.persistence.backend.load_sessions, since)
+        # Other processes may share the storage; only load this client's guilds
+        stored = [data for data in stored if self.owns_guild(data["guild_id"])]
+        for data in stored:
+            self.sessions.add(TournamentSession.from_dict(data))
+        configs = await asyncio.to_thread(self.persistence.backend.load_guild_configs)
+        for config in configs:
+            if self.owns_guild(config["guild_id"]):
+                self.guild_configs.set(GuildConfig.from_dict(config))
+        self.persistence.start()
+        return len(stored)
+
+    def owns_guild(self, guild_id: int) -> bool:
+        """
+        Check whether this client receives a guild's events.
+
+        Args:
+            guild_id (int): The ID of the guild, or 0 for direct messages.
+
+        Returns:
+            bool: True unless the guild is handled by another process.
+        """
+        return True
+
+    def save_session(self, session: TournamentSession):
+        """
+        Queue a tournament to be saved, if storage is configured.
+
+        Args:
+            session (TournamentSession): The tournament that changed.
+        """
+        if self.persistence is not None:
+            self.persistence.save(session)
+
+    def delete_session(self, session: TournamentSession):
+        """
+        Queue an evicted tournament to be deleted, if storage is configured.
+
+        Args:
+            session (TournamentSession): The tournament that was evicted.
+        """
+        if self.persistence is not None:
+            self.persistence.delete(session.message_id)
+
+    async def on_ready(self):
+        """
+        Called when the bot is ready and logged in.
+        """
+        print(f"Logged on as {self.user}!")
+        self.bot_id = self.user.id
+
+    async def on_app_command_completion(
+        self, interaction: Interaction, command: app_commands.Command
+    ):
+        """
+        Called when a slash command finishes successfully.
+
+        Args:
+            interaction (Interaction): The command's interaction.
+            command (app_commands.Command): The command.
+        """
+        if isinstance(self.tree, MetricsCommandTree):
+            self.tree.record(interaction)
+
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        """
+        Called when a reaction is added to a message, whether or not the message
+        is cached. Team messages of restored tournaments are never cached.
+
+        Args:
+            payload (discord.RawReactionActionEvent): The reaction that was added.
+        """
+        if payload.user_id == self.bot_id:
+            return
+
+        session = self.sessions.get(payload.message_id)
+        if (
+            session is None
+            or session.bracket is not None
+            or payload.user_id != session.creator_id
+        ):
+            return
+
+        channel = self.get_partial_messageable(
+            payload.channel_id, guild_id=payload.guild_id
+        )
+        message = channel.get_partial_message(payload.message_id)
+        emoji = str(payload.emoji)
+        if emoji == "🔁":
+            try:
+                await self.reroll_session(session)
+            except (InvalidTournamentException, ComputeTimeoutException) as e:
+                await self.send_message(channel, f"```Error: {e}```")
+                return
+            # Edit the team message in place and clear the creator's reaction
+            # so they can reroll again; the two requests use different buckets
+            await asyncio.gather(
+                self.edit_message(message, embeds=self.team_embeds(session)),
+                self.clear_reroll_reaction(message, payload.user_id),
+            )
+        elif emoji == "✅":
+            try:
+                await self.start_session(session)
+            except (InvalidTournamentException, ComputeTimeoutException) as e:
+                await self.send_message(channel, f"```Error: {e}```")
+                return
+            assert session.bracket is not None
+            await asyncio.gather(
+                *(
+                    self.remove_reaction(message, control, self.user)
+                    for control in self.tournament_emojis
+                ),
+                self.send_message(channel, **pageMessage(self.match_pages(session))),
+            )
+
+    async def clear_reroll_reaction(
+        self, message: discord.PartialMessage, user_id: int
+    ):
+        """
+        Remove a creator's reroll reaction so they can react again. Removing
+        other users' reactions needs the Manage Messages permission; without it
+        the reaction is left in place and the creator has to remove it.
+
+        Args:
+            message (discord.PartialMessage): The team message.
+            user_id (int): The ID of the creator.
+        """
+        try:
+            await self.remove_reaction(message, "🔁", discord.Object(user_id))
+        except discord.Forbidden:
+            logger.info(
+                "Cannot remove reactions in channel %s without Manage Messages",
+                message.channel.id,
+            )
+
+    def tournament_controls(self) -> TournamentControls:
+        """
+        Get the buttons attached to team messages.
+
+        Returns:
+            TournamentControls: The shared button view. Created on first use,
+                since views need a running event loop.
+        """
+        if self._tournament_controls is None:
+            self._tournament_controls = TournamentControls(self)
+        return self._tournament_controls
+
+    async def create_sessions(
+        self,
+        guild_id: int,
+        channel_id: int,
+        creator_id: int,
+        players: List[Player],
+        team_size: Optional[int] = None,
+    ) -> List[TournamentSession]:
+        """
+        Create the teams for a new tournament, split into lobbies if there are too
+        many players for one.
+
+        Every lobby's teams are created in a single call to the compute backend.
+        If any of the players are rated, lobbies are rating tiers and the first
+        teams are balanced by rating.
+
+        Args:
+            guild_id (int): The ID of the guild, or 0 for direct messages.
+            channel_id (int): The ID of the channel the teams will be posted in.
+            creator_id (int): The ID of the user creating the tournament.
+            players (List[Player]): The players.
+            team_size (Optional[int]): The number of players per team.
+
+        Returns:
+            List[TournamentSession]: A session per lobby, not yet registered. Their
+                message IDs are set once the team messages have been sent.
+
+        Raises:
+            InvalidTournamentException: If the players cannot be split into teams.
+            ComputeTimeoutException: If creating the teams took too long.
+        """
+        player_ids = [player.id for player in players]
+        pair_counts = self.pairings.pair_counts(guild_id, player_ids)
+        ratings = await self.player_ratings(guild_id, player_ids)
+        seeds = [newSeed() for _ in lobbySizes(len(player_ids))]
+        lobbies = await self.compute.run(
+            createLobbies, player_ids, seeds, team_size, pair_counts, ratings or None
+        )
+        # New records, since the players may be shared with the voice roster index
+        by_id = {
+            player.id: Player(
+                player.id, player.name, ratings.get(player.id, DEFAULT_RATING)
+            )
+            for player in players
+        }
+        sessions = []
+        for index, (seed, (lobby, teams)) in enumerate(zip(seeds, lobbies)):
+            members = set(lobby)
+            sessions.append(
+                TournamentSession(
+                    guild_id=guild_id,
+                    channel_id=channel_id,
+                    message_id=0,
+                    creator_id=creator_id,
+                    players=[by_id[player_id] for player_id in lobby],
+                    teams=teams,
+                    seed=seed,
+                    team_size=team_size,
+                    pair_counts={
+                        pair: weight
+                        for pair, weight in pair_counts.items()
+                        if pair[0] in members and pair[1] in members
+                    },
+                    lobby=index,
+                    lobby_count=len(lobbies),
+                    balanced=bool(ratings),
+                )
+            )
+        return sessions
+
+    def session_title(self, session: TournamentSession, title: str) -> str:
+        """
+        Title a tournament's output with its lobby when several lobbies were created together.
+
+        Args:
+            session (TournamentSession): The tournament.
+            title (str): The title of the output.
+
+        Returns:
+            str: The title, prefixed with the lobby number if there are several lobbies.
+        """
+        if session.lobby_count > 1:
+            return f"Lobby {session.lobby + 1} of {session.lobby_count}: {title}"
+        return title
+
+    def team_embeds(self, session: TournamentSession) -> List[discord.Embed]:
+        """
+        Render the team message of a tournament.
+
+        Args:
+            session (TournamentSession): The tournament.
+
+        Returns:
+            List[discord.Embed]: The teams. Lobbies are capped at MAX_LOBBY_PLAYERS,
+                so they always fit in a single message.
+        """
+        pages = renderPages(
+            self.session_title(session, "Teams"),
+            formatTeams(session.teams, playerNames(session.players)).split("\n"),
+        )
+        return pages[0]
+
+    def match_pages(self, session: TournamentSession) -> List[List[discord.Embed]]:
+        """
+        Render the matches of a started tournament.
+
+        Args:
+            session (TournamentSession): The tournament.
+
+        Returns:
+            List[List[discord.Embed]]: The pages of matches, one message each.
+        """
+        assert session.bracket is not None
+        return renderPages(
+            self.session_title(session, "Matches"),
+            formatMatches(session.bracket, names=playerNames(session.players)).split(
+                "\n"
+            ),
+        )
+
+    async def reroll_session(self, session: TournamentSession):
+        """
+        Generate new teams for a tournament.
+
+        The teams come from the tournament's next draw, so they can be replayed
+        from its seed. They keep players away from their recent teammates and
+        from their teammates in the teams being replaced. Rerolls and starts of
+        the same tournament run one at a time, so every draw is used once.
+
+        Args:
+            session (TournamentSession): The tournament.
+
+        Raises:
+            InvalidTournamentException: If the tournament started in the meantime.
+            ComputeTimeoutException: If creating the teams took too long.
+        """
+        async with session.lock:
+            if session.bracket is not None:
+                raise InvalidTournamentException("This tournament has already started.")
+            session.teams = await self.compute.run(
+                teamCreator,
+                session.player_ids,
+                session.team_size,
+                None,
+                session.next_rng(),
+                addTeammates(session.pair_counts, session.teams),
+            )
+            session.draw += 1
+            self.save_session(session)
+
+    async def start_session(self, session: TournamentSession):
+        """
+        Confirm a tournament's teams and create its bracket.
+
+        The teams are added to the guild's teammate history. A reroll that is
+        still running finishes first, and its teams are the ones confirmed.
+
+        Args:
+            session (TournamentSession): The tournament.
+
+        Raises:
+            InvalidTournamentException: If the tournament started in the meantime.
+            ComputeTimeoutException: If creating the bracket took too long.
+        """
+        async with session.lock:
+            if session.bracket is not None:
+                raise InvalidTournamentException("This tournament has already started.")
+            session.bracket = await self.compute.run(createBracket, session.teams)
+            self.pairings.record_teams(session.guild_id, session.teams)
+            self.save_session(session)
+
+    async def report_match(
+        self,
+        session: TournamentSession,
+        match_id: int,
+        winner_id: int,
+        scores: Optional[Tuple[int, int]] = None,
+    ):
+        """
+        Record the result of a match and update the standings.
+
+        Only the records of the match's players change, and only those are
+        saved. The standings message is updated after a short delay, so a
+        burst of reports results in a single edit.
+
+        Args:
+            session (TournamentSession): The started tournament.
+            match_id (int): The ID of the match.
+            winner_id (int): The ID of any player on the winning team.
+            scores (Optional[Tuple[int, int]]): The winning and losing teams' scores.
+
+        Raises:
+            InvalidTournamentException: If the match is not awaiting a result, the player
+                is not playing in it, or the scores do not match the winner.
+        """
+        bracket = session.bracket
+        assert bracket is not None
+        if not 0 <= match_id < len(bracket.matches):
+            raise InvalidTournamentException("There is no such match")
+        match = bracket.matches[match_id]
+        if not match.ready or match.done:
+            raise InvalidTournamentException("Match is not awaiting a result")
+        winner = next(
+            (
+                side
+                for side in match.sides
+                if side is not None and side != BYE and winner_id in bracket.teams[side]
+            ),
+            None,
+        )
+        if winner is None:
+            raise InvalidTournamentException("That player is not playing in this match")
+        if scores is not None and scores[0] <= scores[1]:
+            raise InvalidTournamentException("The winner must have the higher score")
+
+        await self.load_standings(session.guild_id)
+        bracket.report_result(
+            match_id,
+            winner,
+            scores if scores is None or match.sides[0] == winner else scores[::-1],
+        )
+        assert match.loser is not None
+        players = {player.id: player for player in session.players}
+        changed = self.standings.record_match(
+            session.guild_id,
+            [players[player_id] for player_id in bracket.teams[winner]],
+            [players[player_id] for player_id in bracket.teams[match.loser]],
+        )
+        self.save_session(session)
+        self.schedule_leaderboard(session)
+        if self.persistence is not None:
+            await asyncio.to_thread(
+                self.persistence.backend.save_standings,
+                [record.to_dict() for record in changed],
+            )
+        if bracket.finished:
+            await self.rate_tournament(session)
+
+    async def player_ratings(
+        self, guild_id: int, player_ids: List[int]
+    ) -> Dict[int, float]:
+        """
+        Get players' ratings, loading the ones not cached with a single query.
+
+        Args:
+            guild_id (int): The ID of the guild.
+            player_ids (List[int]): The players' IDs.
+
+        Returns:
+            Dict[int, float]: Ratings by player ID, for the rated players only.
+        """
+        unknown = self.ratings.unknown(guild_id, player_ids)
+        if unknown:
+            stored: Dict[int, Rating] = {}
+            if self.persistence is not None:
+                rows = await asyncio.to_thread(
+                    self.persistence.backend.load_ratings, guild_id, unknown
+                )
+                stored = {row["player_id"]: Rating.from_dict(row) for row in rows}
+            self.ratings.load(guild_id, unknown, stored)
+        return self.ratings.ratings(guild_id, player_ids)
+
+    async def rate_tournament(self, session: TournamentSession):
+        """
+        Update the ratings of a finished tournament's players, as one rating period.
+
+        Args:
+            session (TournamentSession): The finished tournament.
+        """
+        bracket = session.bracket
+        assert bracket is not None
+        results = []
+        for match in bracket.matches:
+            if match.done and not match.is_bye:
+                assert match.winner is not None and match.loser is not None
+                results.append(
+                    [bracket.teams[match.winner], bracket.teams[match.loser]]
+                )
+        await self.player_ratings(session.guild_id, session.player_ids)
+        played = time.time()
+        updated = self.ratings.apply_period(session.guild_id, results, played)
+        if self.persistence is not None:
+            await asyncio.to_thread(
+                self.persistence.backend.save_rating_period,
+                session.guild_id,
+                played,
+                results,
+                [
+                    rating.to_dict(session.guild_id, player_id)
+                    for player_id, rating in updated.items()
+                ],
+            )
+
+    async def rebuild_ratings(self, guild_id: int) -> int:
+        """
+        Recompute a guild's ratings from its stored history, e.g. after correcting it.
+
+        Args:
+            guild_id (int): The ID of the guild.
+
+        Returns:
+            int: The number of rated players.
+        """
+        if self.persistence is None:
+            return 0
+        backend = self.persistence.backend
+        history = await asyncio.to_thread(backend.load_rating_history, guild_id)
+        ratings = await self.compute.run(rateHistory, history, self.ratings.per_player)
+        self.ratings.replace_guild(guild_id, ratings)
+        await asyncio.to_thread(
+            backend.replace_ratings,
+            guild_id,
+            [
+                rating.to_dict(guild_id, player_id)
+                for player_id, rating in ratings.items()
+            ],
+        )
+        return len(ratings)
+
+    async def load_standings(self, guild_id: int):
+        """
+        Load a guild's standings from storage, if they have not been loaded yet.
+
+        Args:
+            guild_id (int): The ID of the guild.
+        """
+        if self.standings.is_loaded(guild_id):
+            return
+        records: List[PlayerRecord] = []
+        if self.persistence is not None:
+            stored = await asyncio.to_thread(
+                self.persistence.backend.load_standings, guild_id
+            )
+            records = [PlayerRecord.from_dict(data) for data in stored]
+        self.standings.load_guild(guild_id, records)
+
+    def leaderboard_embeds(self, session: TournamentSession) -> List[discord.Embed]:
+        """
+        Render the standings message of a started tournament.
+
+        Args:
+            session (TournamentSession): The tournament.
+
+        Returns:
+            List[discord.Embed]: The teams' records in this tournament and the
+                matches that can be played next, followed by their players'
+                records across the guild's tournaments.
+        """
+        bracket = session.bracket
+        assert bracket is not None
+        names = playerNames(session.players)
+        lines = []
+        if bracket.champion is not None:
+            lines += [f"Champion: Team {bracket.champion + 1}", ""]
+        wins, losses = bracket.wins, bracket.losses
+        ranked = sorted(
+            range(len(bracket.teams)),
+            key=lambda team: (-wins[team], losses[team], team),
+        )
+        lines += [
+            f"Team {team + 1}: {formatTeam(bracket.teams[team], names)}"
+            f" ({wins[team]}-{losses[team]})"
+            for team in ranked
+        ]
+        # The matches posted at the start only cover the first round, so later
+        # rounds are announced here as their teams are decided
+        pending = bracket.pending_matches()
+        if pending:
+            lines += ["", "Up next"]
+            lines += formatMatches(bracket, pending, names).split("\n")
+        records = self.standings.ranked(session.guild_id, session.player_ids)
+        if records:
+            lines += ["", "All time"]
+            lines += [
+                f"{record.name}: {record.wins}-{record.losses}" for record in records
+            ]
+        return renderPages(self.session_title(session, "Standings"), lines)[0]
+
+    def schedule_leaderboard(self, session: TournamentSession):
+        """
+        Update a tournament's standings message after leaderboard_delay seconds.
+
+        Reports made while an update is pending are included in it rather than
+        scheduling another.
+
+        Args:
+            session (TournamentSession): The tournament.
+        """
+        if session.message_id not in self._leaderboard_updates:
+            update = asyncio.create_task(self.update_leaderboard(session))
+            self._leaderboard_updates[session.message_id] = update
+            self._leaderboard_tasks.add(update)
+            update.add_done_callback(self._leaderboard_tasks.discard)
+
+    async def update_leaderboard(self, session: TournamentSession):
+        """
+        Wait for more results, then post or edit a tournament's standings message.
+
+        A new message is posted if the old one was deleted. Other failures are
+        logged, and the next report tries again.
+
+        Args:
+            session (TournamentSession): The tournament.
+        """
+        try:
+            await asyncio.sleep(self.leaderboard_delay)
+        finally:
+            # Reports from here on schedule another update
+            self._leaderboard_updates.pop(session.message_id, None)
+        channel = self.get_partial_messageable(session.channel_id)
+        embeds = self.leaderboard_embeds(session)
+        try:
+            if session.leaderboard_id is not None:
+                try:
+                    await self.edit_message(
+                        channel.get_partial_message(session.leaderboard_id),
+                        embeds=embeds,
+                    )
+                    return
+                except discord.NotFound:
+                    session.leaderboard_id = None
+                    self.save_session(session)
+            message = await self.send_message(channel, embeds=embeds)
+            session.leaderboard_id = message.id
+            self.save_session(session)
+        except discord.HTTPException:
+            logger.exception(
+                "Could not update the standings of tournament %s", session.message_id
+            )
+
+    def channel_sessions(self, interaction: Interaction) -> List[TournamentSession]:
+        """
+        Get the live tournaments in an interaction's channel.
+
+        Args:
+            interaction (Interaction): The command interaction.
+
+        Returns:
+            List[TournamentSession]: The tournaments, oldest first.
+        """
+        if interaction.channel_id is None:
+            return []
+        return self.sessions.for_channel(
+            interaction.guild_id or 0, interaction.channel_id
+        )
+
+    def session_to_control(
+        self, interaction: Interaction, lobby: Optional[int] = None
+    ) -> Tuple[Optional[TournamentSession], Optional[str]]:
+        """
+        Find the tournament in an interaction's channel that its user wants to
+        reroll or start, and check that they may.
+
+        Without a lobby number, this is the user's tournament that has not
+        started yet. A channel can hold several, e.g. the lobbies of a large
+        voice channel, and then the lobby must be given.
+
+        Args:
+            interaction (Interaction): The command interaction.
+            lobby (Optional[int]): The tournament's lobby number, counting from 1.
+
+        Returns:
+            Tuple[Optional[TournamentSession], Optional[str]]: The tournament, if
+                there is one, and why the user may not control it, or None if
+                they may.
+        """
+        sessions = self.channel_sessions(interaction)
+        if lobby is not None:
+            sessions = [session for session in sessions if session.lobby == lobby - 1]
+        else:
+            waiting = [
+                session
+                for session in sessions
+                if session.bracket is None and session.creator_id == interaction.user.id
+            ]
+            if len(waiting) > 1:
+                return None, (
+                    f"You are organising {len(waiting)} tournaments here;"
+                    " choose a lobby."
+                )
+            sessions = waiting or sessions
+        session = self.sessions.get(sessions[-1].message_id) if sessions else None
+        return session, self.check_session_control(session, interaction.user)
+
+    def report_session(
+        self, interaction: Interaction, winner_id: int
+    ) -> Optional[TournamentSession]:
+        """
+        Find the started tournament in an interaction's channel that a reported
+        winner is playing in.
+
+        Args:
+            interaction (Interaction): The command interaction.
+            winner_id (int): The ID of the reported winner.
+
+        Returns:
+            Optional[TournamentSession]: The tournament. If the winner is not
+                playing in a started tournament, the most recent started one, or
+                failing that the most recent one, so the report is refused with
+                a reason.
+        """
+        sessions = self.channel_sessions(interaction)
+        started = [session for session in sessions if session.bracket is not None]
+        playing = [
+            session
+            for session in started
+            if any(player.id == winner_id for player in session.players)
+        ]
+        candidates = playing or started or sessions
+        if not candidates:
+            return None
+        return self.sessions.get(candidates[-1].message_id)
+
+    def team_message(self, session: TournamentSession) -> discord.PartialMessage:
+        """
+        Get a reference to a tournament's team message without fetching it.
+
+        Args:
+            session (TournamentSession): The tournament.
+
+        Returns:
+            discord.PartialMessage: The team message.
+        """
+        channel = self.get_partial_messageable(session.channel_id)
+        return channel.get_partial_message(session.message_id)
+
+    def check_session_control(
+        self, session: Optional[TournamentSession], user: discord.abc.User
+    ) -> Optional[str]:
+        """
+        Check that a user may reroll or start a tournament.
+
+        Args:
+            session (Optional[TournamentSession]): The tournament, if there is one.
+            user (discord.abc.User): The user.
+
+        Returns:
+            Optional[str]: Why the user may not, or None if they may.
+        """
+        if session is None:
+            return "There is no tournament being organised here."
+        if session.bracket is not None:
+            return "This tournament has already started."
+        if user.id != session.creator_id:
+            return "Only the tournament creator can do that."
+        return None
+
+    def check_report_control(
+        self, session: Optional[TournamentSession], user: discord.abc.User
+    ) -> Optional[str]:
+        """
+        Check that a user may report the results of a tournament.
+
+        Args:
+            session (Optional[TournamentSession]): The tournament, if there is one.
+            user (discord.abc.User): The user.
+
+        Returns:
+            Optional[str]: Why the user may not, or None if they may.
+        """
+        if session is None:
+            return "There is no tournament being organised here."
+        if session.bracket is None:
+            return "This tournament has not started yet."
+        if user.id != session.creator_id and not (
+            isinstance(user, discord.Member) and self.guild_configs.is_admin(user)
+        ):
+            return "Only the tournament creator or an admin can report results."
+        return None
+
+    async def reroll_from_button(self, interaction: Interaction):
+        """
+        Handle the reroll button on a team message.
+
+        Args:
+            interaction (Interaction): The button interaction.
+        """
+        assert interaction.message is not None
+        session = self.sessions.get(interaction.message.id)
+        error = self.check_session_control(session, interaction.user)
+        if session is None or error is not None:
+            await self.respond(interaction, error, ephemeral=True)
+            return
+
+        await self.defer(interaction)
+        try:
+            await self.reroll_session(session)
+        except (InvalidTournamentException, ComputeTimeoutException) as e:
+            await interaction.followup.send(f"```Error: {e}```", ephemeral=True)
+            return
+        await self.edit_message(
+            interaction.message,
+            embeds=self.team_embeds(session),
+        )
+
+    async def start_from_button(self, interaction: Interaction):
+        """
+        Handle the start button on a team message.
+
+        Args:
+            interaction (Interaction): The button interaction.
+        """
+        assert interaction.message is not None
+        session = self.sessions.get(interaction.message.id)
+        error = self.check_session_control(session, interaction.user)
+        if session is None or error is not None:
+            await self.respond(interaction, error, ephemeral=True)
+            return
+
+        await self.defer(interaction)
+        try:
+            await self.start_session(session)
+        except (InvalidTournamentException, ComputeTimeoutException) as e:
+            await interaction.followup.send(f"```Error: {e}```", ephemeral=True)
+            return
+        assert session.bracket is not None
+        await asyncio.gather(
+            self.edit_message(interaction.message, view=None),
+            self.send_message(
+                interaction.message.channel, **pageMessage(self.match_pages(session))
+            ),
+        )
+
+    async def add_tournament_reactions(self, message: discord.Message):
+        """
+        Add the reroll and confirm reactions to a team message.
+
+        The requests are issued together; discord.py queues requests sharing
+        a rate limit bucket in the order they were made, so the reactions
+        still appear in order.
+
+        Args:
+            message (discord.Message): The team message.
+        """
+        await asyncio.gather(
+            *(self.add_reaction(message, emoji) for emoji in self.tournament_emojis)
+        )
+
+    async def send_message(
+        self,
+        channel: discord.abc.Messageable,
+        content: Optional[str] = None,
+        **kwargs,
+    ):
+        """
+        Send a message through the outbound scheduler.
+
+        Args:
+            channel (discord.abc.Messageable): The channel to send to.
+            content (Optional[str]): The message content, if any.
+            **kwargs: Passed on to channel.send, e.g. embeds.
+
+        Returns:
+            discord.Message: The sent message.
+        """
+        return await self.outbound.submit(
+            ("messages", getattr(channel, "id", None)),
+            lambda: channel.send(content, **kwargs),
+        )
+
+    async def edit_message(
+        self, message: Union[discord.Message, discord.PartialMessage], **kwargs
+    ):
+        """
+        Edit a message through the outbound scheduler. Queued edits to the
+        same message are merged into one request, with later keyword
+        arguments replacing earlier ones.
+
+        Args:
+            message (Union[discord.Message, discord.PartialMessage]): The message to edit.
+            **kwargs: Passed on to message.edit.
+
+        Returns:
+            discord.Message: The edited message.
+        """
+        return await self.outbound.submit(
+            ("messages", message.channel.id),
+            MessageEdit(message, kwargs),
+            coalesce_key=("edit", message.id),
+            merge=MessageEdit.merge,
+        )
+
+    async def add_reaction(self, message: discord.Message, emoji: str):
+        """
+        Add a reaction through the outbound scheduler.
+
+        Args:
+            message (discord.Message): The message to react to.
+            emoji (str): The emoji to add.
+        """
+        await self.outbound.submit(
+            ("reactions", message.channel.id),
+            lambda: message.add_reaction(emoji),
+            coalesce_key=("add_reaction", message.id, emoji),
+        )
+
+    async def remove_reaction(
+        self,
+        message: Union[discord.Message, discord.PartialMessage],
+        emoji: str,
+        member: discord.abc.Snowflake,
+    ):
+        """
+        Remove a reaction through the outbound scheduler.
+
+        Args:
+            message (Union[discord.Message, discord.PartialMessage]): The message
+                the reaction is on.
+            emoji (str): The emoji to remove.
+            member (discord.abc.Snowflake): The user whose reaction to remove.
+        """
+        await self.outbound.submit(
+            ("reactions", message.channel.id),
+            lambda: message.remove_reaction(emoji, member),
+            coalesce_key=("remove_reaction", message.id, emoji, member),
+        )
+
+    async def respond(self, interaction: Interaction, *args, **kwargs):
+        """
+        Respond to an interaction ahead of other queued requests, since
+        Discord expects a response within three seconds.
+
+        Args:
+            interaction (Interaction): The interaction to respond to.
+            *args: Passed on to interaction.response.send_message.
+            **kwargs: Passed on to interaction.response.send_message.
+        """
+        await self.outbound.submit(
+            ("interaction", interaction.id),
+            lambda: interaction.response.send_message(*args, **kwargs),
+            priority=PRIORITY_INTERACTION,
+        )
+
+    async def defer(self, interaction: Interaction, **kwargs):
+        """
+        Acknowledge an interaction ahead of other queued requests, so a
+        response can follow after Discord's three second deadline.
+
+        Args:
+            interaction (Interaction): The interaction to acknowledge.
+            **kwargs: Passed on to interaction.response.defer.
+        """
+        await self.outbound.submit(
+            ("interaction", interaction.id),
+            lambda: interaction.response.defer(**kwargs),
+            priority=PRIORITY_INTERACTION,
+        )
+
+    def is_addressed_to_bot(self, message: discord.Message) -> bool:
+        """
+        Check whether a message starts by mentioning the bot.
+
+        This runs for every message the bot can see, so it only looks at the
+        already-parsed mentions and never at the message content.
+
+        Args:
+            message (discord.Message): The message.
+
+        Returns:
+            bool: True if the bot is the first user mentioned.
+        """
+        mentions = message.mentions
+        return bool(mentions) and mentions[0].id == self.bot_id
+
+    async def on_message(self, message: discord.Message):
+        """
+        Called when a message is received.
+
+        Args:
+            message (discord.Message): The message that was received.
+        """
+        if not self.is_addressed_to_bot(message):
+            return
+
+        try:
+            await self.commands.dispatch(message)
+        except CommandUsageException as e:
+            await self.send_message(message.channel, f"```Error: {e}```")
+
+    async def command_help(self, message: discord.Message, args: List[str]):
+        """
+        Send a description of the bot and its commands.
+
+        Args:
+            message (discord.Message): The message invoking the command.
+            args (List[str]): Unused.
+        """
+        lines = "\n".join(
+            f"@tourney {command.signature} - {command.description}"
+            for command in self.commands.commands
+        )
+        await self.send_message(
+            message.channel,
+            "```I'm a bot that can help you create teams for a tournament "
+            "if you have more than 8 people in a voice channel. "
+            "Just type @tourney create while in the voice channel and I'll take care of the rest."
+            f"\n\n{lines}```",
+        )
+
+    async def command_create(self, message: discord.Message, args: List[str]):
+        """
+        Create teams from the members of the author's voice channel.
+
+        Args:
+            message (discord.Message): The message invoking the command.
+            args (List[str]): Optionally, the number of players per team.
+
+        Raises:
+            CommandUsageException: If teams cannot be created from the author's
+                voice channel.
+        """
+        # Check if author has voice state and is in a voice channel
+        if not isinstance(message.author, discord.Member):
+            raise CommandUsageException("Command must be used in a server.")
+
+        if not message.author.voice or not message.author.voice.channel:
+            raise CommandUsageException(
+                "You must be in a voice channel to use this command."
+            )
+
+        team_size: Optional[int] = None
+        if args:
+            if not args[0].isdigit():
+                raise CommandUsageException("Team size must be a number.")
+            team_size = int(args[0])
+
+        voice_channel = message.author.voice.channel
+
+        # Check if the voice channel is a type that has members
+        if not hasattr(voice_channel, "members"):
+            raise CommandUsageException(
+                "Cannot get members from this type of voice channel."
+            )
+
+        try:
+            sessions = await self.create_sessions(
+                message.guild.id if message.guild else 0,
+                message.channel.id,
+                message.author.id,
+                self.voice_players(voice_channel),
+                team_size,
+            )
+        except (InvalidTournamentException, ComputeTimeoutException) as e:
+            raise CommandUsageException(str(e)) from e
+
+        if self.use_buttons:
+            created_messages = await asyncio.gather(
+                *(
+                    self.send_message(
+                        message.channel,
+                        embeds=self.team_embeds(session),
+                        view=self.tournament_controls(),
+                    )
+                    for session in sessions
+                )
+            )
+        else:
+            created_messages = await asyncio.gather(
+                *(
+                    self.send_message(message.channel, embeds=self.team_embeds(session))
+                    for session in sessions
+                )
+            )
+        for session, created_message in zip(sessions, created_messages):
+            session.message_id = created_message.id
+            self.sessions.add(session)
+            self.save_session(session)
+        if not self.use_buttons:
+            await asyncio.gather(
+                *(
+                    self.add_tournament_reactions(created_message)
+                    for created_message in created_messages
+                )
+            )
@@ -0,0 +1,126 @@
+from typing import Dict, Iterable, Mapping, Optional, Set, Tuple
+
+from src.player import Player
+
+
+class VoiceRosterIndex:
+    """
+    Who is in each voice channel, kept up to date from voice state events.
+
+    Each channel's roster is kept in join order. Snapshots are cached tuples
+    that are only rebuilt after the channel changes, so reading the roster
+    when a tournament is created does not depend on the member cache and
+    costs nothing while nobody joins or leaves.
+
+    A guild's rosters are only trusted once the guild has been loaded, since
+    members who joined before the bot connected never send an event.
+    """
+
+    def __init__(self):
+        self._channels: Dict[int, Dict[int, Player]] = {}
+        # (guild_id, member_id) -> the channel the member is in
+        self._locations: Dict[Tuple[int, int], int] = {}
+        self._channel_guilds: Dict[int, int] = {}
+        self._snapshots: Dict[int, Tuple[Player, ...]] = {}
+        self._loaded_guilds: Set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def load_guild(
+        self, guild_id: int, rosters: Mapping[int, Iterable[Player]]
+    ) -> None:
+        """
+        Replace a guild's rosters with a full listing, e.g. when it becomes available.
+
+        Args:
+            guild_id (int): The ID of the guild.
+            rosters (Mapping[int, Iterable[Player]]): The players in each of the
+                guild's voice channels, by channel ID.
+        """
+        self.forget_guild(guild_id)
+        for channel_id, players in rosters.items():
+            for player in players:
+                self.update(guild_id, player, channel_id)
+        self._loaded_guilds.add(guild_id)
+
+    def update(self, guild_id: int, player: Player, channel_id: Optional[int]) -> None:
+        """
+        Record a member joining, leaving or moving between voice channels.
+
+        Args:
+            guild_id (int): The ID of the guild.
+            player (Player): The member, as a player record.
+            channel_id (Optional[int]): The channel the member is now in, or None if
+                they left voice.
+        """
+        key = (guild_id, player.id)
+        previous = self._locations.get(key)
+        if previous is not None and previous != channel_id:
+            roster = self._channels[previous]
+            del roster[player.id]
+            self._snapshots.pop(previous, None)
+            if not roster:
+                del self._channels[previous]
+                del self._channel_guilds[previous]
+        if channel_id is None:
+            self._locations.pop(key, None)
+            return
+        self._locations[key] = channel_id
+        self._channel_guilds[channel_id] = guild_id
+        roster = self._channels.setdefault(channel_id, {})
+        # Mute and deafen updates keep the member's place but refresh their name
+        current = roster.get(player.id)
+        if current is None or current.name != player.name:
+            roster[player.id] = player
+            self._snapshots.pop(channel_id, None)
+
+    def snapshot(self, guild_id: int, channel_id: int) -> Optional[Tuple[Player, ...]]:
+        """
+        Get the players in a voice channel.
+
+        Args:
+            guild_id (int): The ID of the guild the channel belongs to.
+            channel_id (int): The ID of the voice channel.
+
+        Returns:
+            Optional[Tuple[Player, ...]]: The players in join order, or None if the
+                guild has not been loaded and the roster may be incomplete.
+        """
+        if guild_id not in self._loaded_guilds:
+            return None
+        snapshot = self._snapshots.get(channel_id)
+        if snapshot is None:
+            snapshot = tuple(self._channels.get(channel_id, {}).values())
+            self._snapshots[channel_id] = snapshot
+        return snapshot
+
+    def forget_channel(self, channel_id: int) -> None:
+        """
+        Drop a deleted channel's roster.
+
+        Args:
+            channel_id (int): The ID of the channel.
+        """
+        guild_id = self._channel_guilds.pop(channel_id, None)
+        roster = self._channels.pop(channel_id, {})
+        if guild_id is not None:
+            for member_id in roster:
+                del self._locations[(guild_id, member_id)]
+        self._snapshots.pop(channel_id, None)
+
+    def forget_guild(self, guild_id: int) -> None:
+        """
+        Drop all of a guild's rosters, e.g. when the bot leaves it.
+
+        Args:
+            guild_id (int): The ID of the guild.
+        """
+        channels = [
+            channel_id
+            for channel_id, owner in self._channel_guilds.items()
+            if owner == guild_id
+        ]
+        for channel_id in channels:
+            self.forget_channel(channel_id)
+        self._loaded_guilds.discard(guild_id)
@@ -0,0 +1,159 @@
+import pytest
+from unittest.mock import patch
+from src.bracket import (
+    BYE,
+    createBracket,
+    formatMatches,
+    restoreBracket,
+    seedOrder,
+    DoubleEliminationBracket,
+    RoundRobinBracket,
+    SingleEliminationBracket,
+    SwissBracket,
+)
+from src.tournament import tournamentGenerator, InvalidTournamentException
+
+
+def makeTeams(count):
+    return [["Player" + str(i)] for i in range(count)]
+
+
+def playOut(bracket, pickWinner=lambda match: min(match.sides)):
+    games = 0
+    while not bracket.finished:
+        pending = bracket.pending_matches()
+        assert pending, "Bracket stalled before finishing"
+        for match in pending:
+            bracket.report_result(match.id, pickWinner(match))
+            games += 1
+    return games
+
+
+def testSeedOrder():
+    assert seedOrder(4) == [0, 3, 1, 2]
+    assert seedOrder(8) == [0, 7, 3, 4, 1, 6, 2, 5]
+
+
+def testSingleEliminationGivesTopSeedsByes():
+    bracket = SingleEliminationBracket(makeTeams(6))
+    pending = bracket.pending_matches()
+    assert [match.sides for match in pending] == [[3, 4], [2, 5]]
+    # Seeds 1 and 2 already sit in round two
+    assert bracket.rounds[1][0].sides == [0, None]
+    assert bracket.rounds[1][1].sides == [1, None]
+
+
+def testSingleEliminationAdvancesWinners():
+    bracket = SingleEliminationBracket(makeTeams(4))
+    first, second = bracket.pending_matches()
+    assert bracket.report_result(first.id, 3) == []
+    newlyReady = bracket.report_result(second.id, 1)
+    assert [match.sides for match in newlyReady] == [[3, 1]]
+    bracket.report_result(newlyReady[0].id, 1, (3, 2))
+    assert bracket.champion == 1
+    assert bracket.final.scores == (3, 2)
+    assert bracket.wins[1] == 2
+    assert bracket.losses[3] == 1
+
+
+@pytest.mark.parametrize(
+    "format,teamCount,expectedGames",
+    [
+        ("single", 2, 1),
+        ("single", 7, 6),
+        ("single", 128, 127),
+        ("double", 2, 2),
+        ("double", 8, 14),
+        ("double", 13, 24),
+        ("roundrobin", 7, 21),
+        ("roundrobin", 8, 28),
+        ("swiss", 8, 12),
+        ("swiss", 9, 16),
+    ],
+)
+def testBracketsPlayToCompletion(format, teamCount, expectedGames):
+    bracket = createBracket(makeTeams(teamCount), format)
+    assert playOut(bracket) == expectedGames
+    assert bracket.champion is not None and bracket.champion != BYE
+
+
+def testDoubleEliminationNeedsTwoLosses():
+    bracket = DoubleEliminationBracket(makeTeams(4))
+
+    # The top seed loses its opening game, then wins every other game
+    def pickWinner(match):
+        if match.stage == "winners" and match.round == 1 and 0 in match.sides:
+            return 3
+        return 0 if 0 in match.sides else max(match.sides)
+
+    # The grand final is won from the losers bracket, so it is reset
+    assert playOut(bracket, pickWinner) == 7
+    grandFinal, reset = bracket.matches[-2:]
+    assert grandFinal.sides == reset.sides == [3, 0]
+    assert grandFinal.winner == 0
+    assert bracket.final is reset
+    assert bracket.losses[0] == 1
+    assert bracket.losses[3] == 2
+    assert bracket.champion == 0
+
+
+def testDoubleEliminationResetCanGoToTheWinnersChampion():
+    bracket = DoubleEliminationBracket(makeTeams(2))
+    (opening,) = bracket.pending_matches()
+    bracket.report_result(opening.id, 0)
+    (grandFinal,) = bracket.pending_matches()
+    newlyReady = bracket.report_result(grandFinal.id, 1)
+    assert not bracket.finished
+    assert [match.sides for match in newlyReady] == [[0, 1]]
+    bracket.report_result(newlyReady[0].id, 0)
+    assert bracket.champion == 0
+    assert bracket.wins == [2, 1]
+    # Replaying the results recreates the reset match
+    restored = restoreBracket(bracket.teams, "double", bracket.results)
+    assert restored.champion == 0
+    assert len(restored.matches) == 3
+
+
+def testRoundRobinEveryPairPlaysOnce():
+    bracket = RoundRobinBracket(makeTeams(5))
+    playOut(bracket)
+    pairs = [frozenset(match.sides) for match in bracket.matches if not match.is_bye]
+    assert len(pairs) == len(set(pairs)) == 10
+
+
+def testSwissAvoidsRematches():
+    bracket = SwissBracket(makeTeams(8))
+    playOut(bracket)
+    pairs = [frozenset(match.sides) for match in bracket.matches]
+    assert len(pairs) == len(set(pairs))
+    assert bracket.points[bracket.champion] == 3
+
+
+def testReportResultValidation():
+    bracket = SingleEliminationBracket(makeTeams(4))
+    match = bracket.pending_matches()[0]
+    with pytest.raises(InvalidTournamentException, match="not playing"):
+        bracket.report_result(match.id, 2)
+    bracket.report_result(match.id, match.sides[0])
+    with pytest.raises(InvalidTournamentException, match="not awaiting"):
+        bracket.report_result(match.id, match.sides[0])
+    with pytest.raises(InvalidTournamentException, match="not awaiting"):
+        bracket.report_result(bracket.final.id, 0)
+
+
+def testCreateBracketValidation():
+    with pytest.raises(InvalidTournamentException, match="Unknown bracket format"):
+        createBracket(makeTeams(4), "ladder")
+    with pytest.raises(InvalidTournamentException, match="at least 2 teams"):
+        createBracket(makeTeams(1))
+
+
+def testFormatMatches():
+    bracket = SingleEliminationBracket([["A", "B"], ["C", "D"], ["E", "F"]])
+    assert formatMatches(bracket) == "Match 2: C D vs E F"
+
+
+@patch("src.tournament.random.shuffle", lambda x: x)
+def testTournamentGeneratorGivesOddTeamABye():
+    teams = [["A"], ["B"], ["C"]]
+    assert tournamentGenerator(teams) == "A vs B\nC has a bye"
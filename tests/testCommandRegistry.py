@@ -0,0 +1,106 @@
+import pytest
+import discord
+from unittest.mock import AsyncMock, Mock
+from src.commandRegistry import CommandRegistry, CommandUsageException, PrefixCommand
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def registry(clock):
+    registry = CommandRegistry(clock=clock)
+    registry.add(PrefixCommand("help", AsyncMock()))
+    registry.add(
+        PrefixCommand(
+            "create",
+            AsyncMock(),
+            aliases=("new",),
+            max_args=1,
+            cooldown=10.0,
+            usage="[team size]",
+        )
+    )
+    registry.add(PrefixCommand("say", AsyncMock(), min_args=1, max_args=2))
+    return registry
+
+
+def make_message(content, author_id=1):
+    message = Mock(spec=discord.Message)
+    message.content = content
+    message.author = Mock()
+    message.author.id = author_id
+    return message
+
+
+def test_parse_routes_names_and_aliases(registry):
+    create = registry.get("create")
+    assert registry.parse("<@1> create") == (create, [])
+    assert registry.parse("<@1> NEW 3") == (create, ["3"])
+    assert registry.parse("<@1> unknown") is None
+    assert registry.parse("<@1>") is None
+
+
+def test_parse_splits_arguments(registry):
+    say = registry.get("say")
+    assert registry.parse("<@1> say hello  there") == (say, ["hello", "there"])
+    with pytest.raises(CommandUsageException):
+        registry.parse("<@1> say hello there " + "everyone " * 1000)
+
+
+def test_parse_rejects_wrong_argument_counts(registry):
+    with pytest.raises(CommandUsageException, match=r"Usage: say"):
+        registry.parse("<@1> say")
+    with pytest.raises(CommandUsageException, match=r"Usage: help"):
+        registry.parse("<@1> help me")
+
+
+def test_duplicate_names_are_rejected(registry):
+    with pytest.raises(ValueError):
+        registry.add(PrefixCommand("new", AsyncMock()))
+    assert registry.get("new").name == "create"
+
+
+@pytest.mark.asyncio
+async def test_dispatch_runs_handler(registry):
+    message = make_message("<@1> create 3")
+    assert await registry.dispatch(message)
+    registry.get("create").handler.assert_awaited_once_with(message, ["3"])
+    assert not await registry.dispatch(make_message("<@1> hello"))
+
+
+@pytest.mark.asyncio
+async def test_cooldown_is_per_user(registry, clock):
+    await registry.dispatch(make_message("<@1> create", author_id=1))
+    await registry.dispatch(make_message("<@1> create", author_id=2))
+    with pytest.raises(CommandUsageException, match="Slow down"):
+        await registry.dispatch(make_message("<@1> new", author_id=1))
+
+    clock.now = 10.0
+    await registry.dispatch(make_message("<@1> create", author_id=1))
+    assert registry.get("create").handler.await_count == 3
+    # Expired cooldowns are dropped as new ones are recorded
+    assert len(registry._cooldowns) == 1
+
+
+@pytest.mark.asyncio
+async def test_rejected_uses_do_not_start_cooldown(registry):
+    create = registry.get("create")
+    create.handler.side_effect = CommandUsageException("Not in a voice channel")
+    with pytest.raises(CommandUsageException, match="voice channel"):
+        await registry.dispatch(make_message("<@1> create"))
+
+    create.handler.side_effect = None
+    await registry.dispatch(make_message("<@1> create"))
+    with pytest.raises(CommandUsageException, match="Slow down"):
+        await registry.dispatch(make_message("<@1> create"))
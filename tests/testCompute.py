@@ -0,0 +1,65 @@
+import asyncio
+import random
+import time
+import pytest
+from src.compute import ComputeTimeoutException, ExecutorCompute, InlineCompute
+from src.tournament import balanceTeams, teamSizes
+
+# The longest the event loop may go without running while a solve is in progress
+MAX_LOOP_LAG = 0.05
+
+
+def heavySolve():
+    rng = random.Random(0)
+    players = [f"Player{i}" for i in range(2000)]
+    ratings = {player: rng.gauss(1000, 300) for player in players}
+    start = time.perf_counter()
+    balanceTeams(players, ratings, teamSizes(len(players), 3), passes=100)
+    return time.perf_counter() - start
+
+
+async def measureLoopLag(task):
+    """Return the longest gap between event loop iterations while task runs."""
+    lag = 0.0
+    last = time.perf_counter()
+    while not task.done():
+        await asyncio.sleep(0.005)
+        now = time.perf_counter()
+        lag = max(lag, now - last - 0.005)
+        last = now
+    return lag
+
+
+@pytest.mark.asyncio
+async def test_inline_compute_runs_directly():
+    assert await InlineCompute().run(sorted, [3, 1, 2], reverse=True) == [3, 2, 1]
+
+
+@pytest.mark.asyncio
+async def test_executor_compute_times_out():
+    compute = ExecutorCompute(timeout=0.05)
+    try:
+        assert await compute.run(sum, [1, 2, 3]) == 6
+        with pytest.raises(ComputeTimeoutException):
+            await compute.run(time.sleep, 0.5)
+    finally:
+        compute.close()
+
+
+def test_executor_compute_rejects_unknown_kind():
+    with pytest.raises(ValueError):
+        ExecutorCompute(kind="gpu")
+
+
+@pytest.mark.asyncio
+async def test_heavy_solve_does_not_stall_event_loop():
+    compute = ExecutorCompute(kind="process", max_workers=1, timeout=30)
+    try:
+        # Start the worker process so its startup is not part of the measurement
+        await compute.run(sum, [])
+        task = asyncio.ensure_future(compute.run(heavySolve))
+        lag = await measureLoopLag(task)
+        assert await task >= 0.3
+        assert lag < MAX_LOOP_LAG
+    finally:
+        compute.close()
@@ -0,0 +1,111 @@
+import pytest
+import discord
+from discord import app_commands
+from unittest.mock import AsyncMock, Mock
+from src.guildConfig import GuildConfig, GuildConfigCache
+from src.storage import SQLiteStorage
+from src.tourneyBot import DudeBot, ADMIN_ROLE_IDS, SETUP_ROLE_ID
+
+
+def make_role(role_id):
+    role = Mock(spec=discord.Role)
+    role.id = role_id
+    return role
+
+
+def make_member(guild_id, member_id, role_ids):
+    member = Mock(spec=discord.Member)
+    member.guild = Mock(spec=discord.Guild)
+    member.guild.id = guild_id
+    member.id = member_id
+    member.roles = [make_role(role_id) for role_id in role_ids]
+    return member
+
+
+def test_defaults_apply_to_unconfigured_guilds():
+    cache = GuildConfigCache({1, 2}, 3)
+    config = cache.get(100)
+    assert config.admin_role_ids == {1, 2}
+    assert config.setup_role_id == 3
+
+
+def test_admin_and_setup_checks_use_guild_config():
+    cache = GuildConfigCache({1}, 3)
+    cache.set(GuildConfig(200, {10}, 30))
+    assert cache.is_admin(make_member(100, 1, [1]))
+    assert not cache.is_admin(make_member(200, 1, [1]))
+    assert cache.is_admin(make_member(200, 2, [10]))
+    assert cache.has_setup_role(make_member(200, 3, [30]))
+    assert not cache.has_setup_role(make_member(100, 4, [30]))
+
+
+def test_role_changes_apply_immediately():
+    cache = GuildConfigCache({1}, 3)
+    member = make_member(100, 1, [1, 3])
+    assert cache.is_admin(member)
+    assert cache.has_setup_role(member)
+
+    member.roles = []
+    assert not cache.is_admin(member)
+    assert not cache.has_setup_role(member)
+
+
+def test_deleted_role_is_removed_from_config():
+    cache = GuildConfigCache({1}, 3)
+    cache.set(GuildConfig(100, {10, 11}, 30))
+    cache.remove_role(100, 30)
+    assert cache.get(100).setup_role_id is None
+    assert cache.get(100).admin_role_ids == {10, 11}
+    cache.remove_role(100, 10)
+    assert cache.get(100).admin_role_ids == {11}
+
+
+def test_guild_configs_round_trip_through_storage():
+    storage = SQLiteStorage(":memory:")
+    storage.save_guild_config(GuildConfig(100, {10, 11}, 30).to_dict())
+    storage.save_guild_config(GuildConfig(100, {12}, None).to_dict())
+    loaded = [GuildConfig.from_dict(data) for data in storage.load_guild_configs()]
+    assert len(loaded) == 1
+    assert loaded[0].admin_role_ids == {12}
+    assert loaded[0].setup_role_id is None
+
+
+def test_check_admin():
+    client = DudeBot()
+    interaction = Mock(spec=discord.Interaction)
+    interaction.user = make_member(100, 1, [next(iter(ADMIN_ROLE_IDS))])
+    assert client.check_admin(interaction)
+
+    interaction.user = make_member(100, 2, [SETUP_ROLE_ID])
+    with pytest.raises(app_commands.MissingAnyRole):
+        client.check_admin(interaction)
+
+    interaction.user = Mock(spec=discord.User)
+    with pytest.raises(app_commands.NoPrivateMessage):
+        client.check_admin(interaction)
+
+
+def test_check_admin_uses_the_interaction_roles():
+    client = DudeBot()
+    interaction = Mock(spec=discord.Interaction)
+    interaction.user = make_member(100, 1, [next(iter(ADMIN_ROLE_IDS))])
+    assert client.check_admin(interaction)
+
+    # The roles sent with the next interaction are used, without waiting for
+    # a member update event
+    interaction.user.roles = []
+    with pytest.raises(app_commands.MissingAnyRole):
+        client.check_admin(interaction)
+
+
+@pytest.mark.asyncio
+async def test_save_guild_config_persists(tmp_path):
+    client = DudeBot(storage=SQLiteStorage(str(tmp_path / "tourneybot.db")))
+    await client.save_guild_config(GuildConfig(100, {10}, 30))
+    await client.persistence.close()
+
+    restarted = DudeBot(storage=SQLiteStorage(str(tmp_path / "tourneybot.db")))
+    restarted.tree.sync = AsyncMock()
+    await restarted.setup_hook()
+    assert restarted.guild_configs.get(100).admin_role_ids == {10}
+    await restarted.persistence.close()
@@ -0,0 +1,169 @@
+import asyncio
+import time
+import pytest
+import aiohttp
+import discord
+from unittest.mock import Mock
+from src.metrics import (
+    LoopLagMonitor,
+    Metrics,
+    MetricsCommandTree,
+    MetricsServer,
+    routeTemplate,
+)
+from src.tourneyBot import DudeBot
+
+
+def testRouteTemplate():
+    assert (
+        routeTemplate("/api/v10/channels/759395917924139038/messages")
+        == "/channels/{id}/messages"
+    )
+    assert (
+        routeTemplate(
+            "/api/v10/channels/759395917924139038/messages/858401896930082868"
+            "/reactions/%F0%9F%94%81/@me"
+        )
+        == "/channels/{id}/messages/{id}/reactions/{emoji}/@me"
+    )
+    token = "a" * 60
+    assert (
+        routeTemplate(
+            f"/api/v10/webhooks/480422236243623936/{token}/messages/@original"
+        )
+        == "/webhooks/{id}/{token}/messages/@original"
+    )
+
+
+def testRenderPrometheusText():
+    metrics = Metrics(buckets=(0.1, 1.0))
+    metrics.describe("requests_total", "counter", "Requests.")
+    metrics.inc("requests_total", (("route", "/a"),))
+    metrics.inc("requests_total", (("route", "/a"),))
+    metrics.observe("latency_seconds", 0.05)
+    metrics.observe("latency_seconds", 0.5)
+    metrics.observe("latency_seconds", 5.0)
+    metrics.gauge_callback("sessions", lambda: 3)
+
+    text = metrics.render()
+    assert "# HELP requests_total Requests.\n# TYPE requests_total counter" in text
+    assert 'requests_total{route="/a"} 2' in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 2' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+    assert "latency_seconds_count 3" in text
+    assert "sessions 3" in text
+
+
+def test_disabled_metrics_leave_handlers_unwrapped():
+    client = DudeBot()
+    assert client.metrics is None
+    assert client.on_message.__func__ is DudeBot.on_message
+    assert type(client.tree) is discord.app_commands.CommandTree
+
+
+@pytest.mark.asyncio
+async def test_event_handlers_are_timed():
+    metrics = Metrics()
+    client = DudeBot(metrics=metrics)
+    client.bot_id = 1
+    message = Mock(spec=discord.Message)
+    message.mentions = []
+    await client.on_message(message)
+
+    message.mentions = [Mock(id=1)]
+    message.content = None
+    with pytest.raises(AttributeError):
+        await client.on_message(message)
+
+    labels = (("event", "message"),)
+    assert metrics.value("tourneybot_event_duration_seconds", labels) == 2
+    assert metrics.value("tourneybot_event_errors_total", labels) == 1
+    assert metrics.value("tourneybot_active_sessions") == 0
+
+
+@pytest.mark.asyncio
+async def test_outbound_scheduler_stats_are_exported():
+    metrics = Metrics()
+    client = DudeBot(metrics=metrics)
+    message = Mock(spec=discord.Message)
+    message.id = 1
+    message.channel.id = 2
+    edits = [client.edit_message(message, content=str(i)) for i in range(3)]
+    await asyncio.gather(*edits)
+
+    stats = client.outbound.stats
+    assert metrics.value("tourneybot_outbound_submitted_total") == 3
+    assert metrics.value("tourneybot_outbound_coalesced_total") == stats.coalesced
+    assert metrics.value("tourneybot_outbound_completed_total") == 3 - stats.coalesced
+    assert metrics.value("tourneybot_outbound_failed_total") == 0
+    assert metrics.value("tourneybot_outbound_rate_limited_total") == 0
+    assert metrics.value("tourneybot_outbound_max_wait_seconds") == stats.max_wait
+    text = metrics.render()
+    assert "# TYPE tourneybot_outbound_coalesced_total counter" in text
+    assert "# TYPE tourneybot_outbound_max_wait_seconds gauge" in text
+    assert "tourneybot_outbound_wait_seconds_total " in text
+
+
+@pytest.mark.asyncio
+async def test_slash_commands_are_timed():
+    metrics = Metrics()
+    client = DudeBot(metrics=metrics)
+    assert isinstance(client.tree, MetricsCommandTree)
+    interaction = Mock(spec=discord.Interaction)
+    interaction.extras = {}
+    interaction.command = client.tree.get_command("tourney").get_command("create")
+
+    assert await client.tree.interaction_check(interaction)
+    await client.on_app_command_completion(interaction, interaction.command)
+
+    labels = (("command", "tourney create"),)
+    assert metrics.value("tourneybot_command_duration_seconds", labels) == 1
+    assert metrics.value("tourneybot_command_errors_total", labels) == 0
+
+
+@pytest.mark.asyncio
+async def test_loop_lag_is_measured():
+    metrics = Metrics()
+    monitor = LoopLagMonitor(metrics, interval=0.01)
+    monitor.start()
+    await asyncio.sleep(0.02)
+    # Block the loop so the monitor wakes up late
+    time.sleep(0.05)
+    await asyncio.sleep(0.02)
+    await monitor.stop()
+    assert metrics.value("tourneybot_event_loop_lag_seconds") >= 1
+    assert 'tourneybot_event_loop_lag_seconds_bucket{le="0.05"}' in metrics.render()
+    assert metrics._histograms["tourneybot_event_loop_lag_seconds"][()].total >= 0.03
+
+
+@pytest.mark.asyncio
+async def test_metrics_server_and_request_tracing():
+    metrics = Metrics()
+    server = MetricsServer(metrics, port=0)
+    await server.start()
+    try:
+        async with aiohttp.ClientSession(
+            trace_configs=[metrics.http_trace()]
+        ) as session:
+            async with session.get(
+                f"http://127.0.0.1:{server.port}/metrics"
+            ) as response:
+                assert response.status == 200
+            async with session.get(f"http://127.0.0.1:{server.port}/missing"):
+                pass
+            async with session.get(
+                f"http://127.0.0.1:{server.port}/metrics"
+            ) as response:
+                text = await response.text()
+    finally:
+        await server.stop()
+
+    assert (
+        'tourneybot_discord_requests_total{method="GET",route="/metrics",status="200"} 1'
+        in text
+    )
+    assert (
+        'tourneybot_discord_request_failures_total{method="GET",route="/missing"} 1'
+        in text
+    )
@@ -0,0 +1,48 @@
+from src.pairingHistory import PairingHistory, pairKey
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def testRecordTeamsCountsTeammates():
+    history = PairingHistory(clock=FakeClock())
+    history.record_teams(1, [[1, 2], [3, 4]])
+    history.record_teams(1, [[2, 1, 3]])
+    # Guilds are kept apart
+    assert history.pair_counts(2, [1, 2, 3, 4]) == {}
+    assert history.pair_counts(1, [1, 2, 3, 4]) == {
+        (1, 2): 2.0,
+        (3, 4): 1.0,
+        (1, 3): 1.0,
+        (2, 3): 1.0,
+    }
+    assert pairKey(2, 1) == (1, 2)
+
+
+def testWeightsDecayAndFadedPairsAreForgotten():
+    clock = FakeClock()
+    history = PairingHistory(half_life=10, clock=clock)
+    history.record_teams(1, [[1, 2]])
+    clock.now = 10
+    assert history.pair_counts(1, [2, 1]) == {(1, 2): 0.5}
+    history.record_teams(1, [[3, 4]])
+    assert len(history) == 2
+    clock.now = 50
+    # A-B has faded to 1/32, C-D is still at 1/16
+    assert history.evict_faded() == 1
+    assert history.pair_counts(1, [1, 2, 3, 4]) == {(3, 4): 0.0625}
+
+
+def testCapacityForgetsOldestPairs():
+    history = PairingHistory(max_pairs=2, clock=FakeClock())
+    history.record_teams(1, [[1, 2]])
+    history.record_teams(1, [[3, 4]])
+    history.record_teams(1, [[1, 2]])  # C-D is now the oldest
+    history.record_teams(1, [[5, 6]])
+    assert len(history) == 2
+    assert history.pair_counts(1, [1, 2, 3, 4]) == {(1, 2): 2.0}
@@ -0,0 +1,96 @@
+import pytest
+from src.ratings import (
+    DEFAULT_DEVIATION,
+    MIN_DEVIATION,
+    RATING_PERIOD,
+    Rating,
+    RatingBook,
+    ratePeriod,
+    rateHistory,
+)
+from src.tournament import DEFAULT_RATING
+
+
+def testWinnersGainWhatEvenLosersLose():
+    updated = ratePeriod({}, [[[1, 2], [3, 4]]], now=100.0)
+
+    assert updated[1].rating > DEFAULT_RATING > updated[3].rating
+    assert updated[1].rating - DEFAULT_RATING == pytest.approx(
+        DEFAULT_RATING - updated[3].rating
+    )
+    assert updated[1] == updated[2]
+    assert all(rating.deviation < DEFAULT_DEVIATION for rating in updated.values())
+    assert all(rating.updated == 100.0 for rating in updated.values())
+
+
+def testUpsetsMoveRatingsFurther():
+    ratings = {
+        1: Rating(1400.0, 50.0),
+        2: Rating(1400.0, 50.0),
+        3: Rating(1000.0, 50.0),
+        4: Rating(1000.0, 50.0),
+    }
+    expected = ratePeriod(ratings, [[[1, 2], [3, 4]]], now=0.0)
+    upset = ratePeriod(ratings, [[[3, 4], [1, 2]]], now=0.0)
+    assert upset[3].rating - 1000.0 > expected[1].rating - 1400.0
+
+
+def testResultsInAPeriodAreRatedTogether():
+    results = [[[1, 2], [3, 4]], [[1, 3], [2, 4]], [[4, 2], [1, 3]]]
+    forward = ratePeriod({}, results, now=0.0)
+    backward = ratePeriod({}, results[::-1], now=0.0)
+    for player in forward:
+        assert forward[player].rating == pytest.approx(backward[player].rating)
+        assert forward[player].deviation == pytest.approx(backward[player].deviation)
+
+
+def testTeamAverageModeMovesTeammatesTogether():
+    ratings = {1: Rating(1200.0, 80.0), 2: Rating(900.0, 80.0)}
+    updated = ratePeriod(ratings, [[[1, 2], [3, 4]]], now=0.0, perPlayer=False)
+    assert updated[1].rating - 1200.0 == pytest.approx(updated[2].rating - 900.0)
+
+    perPlayer = ratePeriod(ratings, [[[1, 2], [3, 4]]], now=0.0)
+    assert perPlayer[1].rating - 1200.0 < perPlayer[2].rating - 900.0
+
+
+def testDeviationGrowsWhileIdle():
+    rating = Rating(1500.0, MIN_DEVIATION, updated=0.0)
+    assert rating.at(0.0).deviation == MIN_DEVIATION
+    assert MIN_DEVIATION < rating.at(10 * RATING_PERIOD).deviation < DEFAULT_DEVIATION
+    assert rating.at(1000 * RATING_PERIOD).deviation == DEFAULT_DEVIATION
+    assert rating.at(10 * RATING_PERIOD).rating == 1500.0
+
+
+def testRebuildMatchesIncrementalUpdates():
+    periods = [
+        (0.0, [[[1, 2], [3, 4]], [[1, 2], [5, 6]]]),
+        (RATING_PERIOD, [[[3, 5], [1, 6]]]),
+        (5 * RATING_PERIOD, [[[2, 4], [3, 6]], [[2, 4], [1, 5]]]),
+    ]
+    book = RatingBook()
+    for now, results in periods:
+        book.apply_period(7, results, now)
+
+    rebuilt = rateHistory(periods)
+
+    assert set(rebuilt) == {1, 2, 3, 4, 5, 6}
+    assert book.ratings(7, rebuilt) == {
+        player: rating.rating for player, rating in rebuilt.items()
+    }
+
+
+def testRatingBookCachesLookups():
+    book = RatingBook(clock=lambda: 0.0)
+    assert book.unknown(1, [10, 11]) == [10, 11]
+    book.load(1, [10, 11], {10: Rating(1100.0, 60.0)})
+
+    assert book.unknown(1, [10, 11, 12]) == [12]
+    assert book.ratings(1, [10, 11, 12]) == {10: 1100.0}
+    assert book.get(1, 11) is None
+
+    # A stale load does not overwrite a newer rating
+    book.apply_period(1, [[[10, 11], [12, 13]]], now=0.0)
+    book.load(1, [10], {10: Rating(1100.0, 60.0)})
+    assert book.get(1, 10).rating > 1100.0
+    book.forget_guild(1)
+    assert book.unknown(1, [10]) == [10]
@@ -0,0 +1,99 @@
+import math
+import pytest
+from unittest.mock import AsyncMock, Mock
+from src.bracket import createBracket, formatMatches
+from src.render import (
+    CODE_BLOCK_OVERHEAD,
+    EMBED_DESCRIPTION_LIMIT,
+    EMBED_TOTAL_LIMIT,
+    EMBEDS_PER_MESSAGE,
+    FOOTER_RESERVE,
+    PageView,
+    packLines,
+    pageMessage,
+    renderPages,
+)
+from src.tournament import teamCreator
+from src.tourneyBot import formatTeams
+
+
+def assertWithinLimits(pages):
+    for embeds in pages:
+        assert 1 <= len(embeds) <= EMBEDS_PER_MESSAGE
+        assert sum(len(embed) for embed in embeds) <= EMBED_TOTAL_LIMIT
+        for embed in embeds:
+            assert len(embed.description) <= EMBED_DESCRIPTION_LIMIT
+
+
+def renderedLines(pages):
+    return [
+        line
+        for embeds in pages
+        for embed in embeds
+        for line in embed.description[len("```\n") : -len("\n```")].split("\n")
+    ]
+
+
+def testPackLines():
+    assert packLines(["ab", "cd", "ef"], 5) == ["ab\ncd", "ef"]
+    assert packLines(["abcdefg"], 3) == ["abc", "def", "g"]
+    assert packLines([], 5) == []
+    assert packLines(["", "a"], 5) == ["\na"]
+
+
+def testShortOutputIsOneTitledPageWithoutFooter():
+    pages = renderPages("Teams", ["Team 1: a, b", "Team 2: c, d"])
+    assert len(pages) == 1
+    assert len(pages[0]) == 1
+    assert pages[0][0].title == "Teams"
+    assert pages[0][0].description == "```\nTeam 1: a, b\nTeam 2: c, d\n```"
+    assert not pages[0][0].footer.text
+
+
+@pytest.mark.parametrize("kind", ["teams", "matches"])
+def testFiveHundredPlayersFitTheMinimalNumberOfMessages(kind):
+    names = {i: f"Player{i:03}" for i in range(500)}
+    teams = teamCreator(list(names))
+    if kind == "teams":
+        lines = formatTeams(teams, names).split("\n")
+    else:
+        lines = formatMatches(createBracket(teams), names=names).split("\n")
+    title = kind.capitalize()
+
+    pages = renderPages(title, lines)
+
+    assertWithinLimits(pages)
+    assert renderedLines(pages) == lines
+    # No packing can fit more than this per message once the title, footer
+    # and code blocks are accounted for
+    capacity = EMBED_TOTAL_LIMIT - len(title) - FOOTER_RESERVE - 2 * CODE_BLOCK_OVERHEAD
+    total = sum(len(line) + 1 for line in lines) - 1
+    assert len(pages) == math.ceil(total / capacity)
+    if len(pages) > 1:
+        assert [embeds[-1].footer.text for embeds in pages] == [
+            f"Page {i} of {len(pages)}" for i in range(1, len(pages) + 1)
+        ]
+
+
+def testOverlongLinesAreSplit():
+    pages = renderPages("Teams", ["x" * 20000])
+    assertWithinLimits(pages)
+    assert "".join(renderedLines(pages)) == "x" * 20000
+
+
+@pytest.mark.asyncio
+async def testPageViewFlipsPages():
+    pages = renderPages("Matches", [f"Match {i}: " + "x" * 90 for i in range(200)])
+    message = pageMessage(pages)
+    view = message["view"]
+    assert isinstance(view, PageView)
+    assert message["embeds"] is pages[0]
+
+    interaction = Mock()
+    interaction.response.edit_message = AsyncMock()
+    await view.show(interaction, view.page + 1)
+    interaction.response.edit_message.assert_awaited_with(embeds=pages[1], view=view)
+    await view.show(interaction, view.page - 2)
+    assert view.page == len(pages) - 1
+
+    assert "view" not in pageMessage(pages[:1])
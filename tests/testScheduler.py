@@ -0,0 +1,179 @@
+import asyncio
+import discord
+import pytest
+from unittest.mock import Mock
+from src.scheduler import (
+    OutboundScheduler,
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTION,
+)
+
+
+def rate_limited(retry_after):
+    error = discord.HTTPException(Mock(status=429, reason="Too Many Requests"), "")
+    error.retry_after = retry_after
+    return error
+
+
+async def start_blocker(scheduler, bucket):
+    """Occupy a bucket until the returned event is set."""
+    release = asyncio.Event()
+    task = asyncio.ensure_future(scheduler.submit(bucket, release.wait))
+    await asyncio.sleep(0)
+    return release, task
+
+
+@pytest.mark.asyncio
+async def test_interactions_overtake_queued_actions():
+    scheduler = OutboundScheduler(bucket_concurrency=1)
+    order = []
+
+    async def record(name):
+        order.append(name)
+
+    release, blocker = await start_blocker(scheduler, "bucket")
+    background = asyncio.ensure_future(
+        scheduler.submit(
+            "bucket", lambda: record("background"), priority=PRIORITY_BACKGROUND
+        )
+    )
+    default = asyncio.ensure_future(
+        scheduler.submit("bucket", lambda: record("default"))
+    )
+    interaction = asyncio.ensure_future(
+        scheduler.submit(
+            "bucket", lambda: record("interaction"), priority=PRIORITY_INTERACTION
+        )
+    )
+    await asyncio.sleep(0)
+    assert scheduler.queue_depth("bucket") == 3
+
+    release.set()
+    await asyncio.gather(blocker, background, default, interaction)
+    assert order == ["interaction", "default", "background"]
+    assert scheduler.queue_depth() == 0
+
+
+@pytest.mark.asyncio
+async def test_queued_edits_are_coalesced():
+    scheduler = OutboundScheduler(bucket_concurrency=1)
+    sent = []
+
+    async def edit(content):
+        sent.append(content)
+        return content
+
+    release, blocker = await start_blocker(scheduler, "bucket")
+    edits = [
+        asyncio.ensure_future(
+            scheduler.submit(
+                "bucket", lambda content=content: edit(content), coalesce_key="message"
+            )
+        )
+        for content in ("first", "second", "third")
+    ]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*edits) == ["third"] * 3
+    await blocker
+    assert sent == ["third"]
+    assert scheduler.stats.coalesced == 2
+    assert scheduler.stats.completed == 2
+
+
+@pytest.mark.asyncio
+async def test_queued_edits_can_be_merged():
+    scheduler = OutboundScheduler(bucket_concurrency=1)
+    sent = []
+
+    class Edit:
+        def __init__(self, fields):
+            self.fields = fields
+
+        async def __call__(self):
+            sent.append(self.fields)
+            return self.fields
+
+        def merge(self, later):
+            return Edit({**self.fields, **later.fields})
+
+    release, blocker = await start_blocker(scheduler, "bucket")
+    edits = [
+        asyncio.ensure_future(
+            scheduler.submit(
+                "bucket", Edit(fields), coalesce_key="message", merge=Edit.merge
+            )
+        )
+        for fields in ({"content": "a", "view": 1}, {"view": None}, {"content": "b"})
+    ]
+    await asyncio.sleep(0)
+    release.set()
+
+    await asyncio.gather(blocker, *edits)
+    assert sent == [{"content": "b", "view": None}]
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_bucket_pauses_and_retries():
+    scheduler = OutboundScheduler()
+    attempts = []
+
+    async def flaky():
+        attempts.append(asyncio.get_running_loop().time())
+        if len(attempts) == 1:
+            raise rate_limited(0.05)
+        return "sent"
+
+    assert await scheduler.submit("bucket", flaky) == "sent"
+    assert len(attempts) == 2
+    assert attempts[1] - attempts[0] >= 0.04
+    assert scheduler.stats.rate_limited == 1
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_retries_are_bounded():
+    scheduler = OutboundScheduler(max_retries=1)
+
+    async def always_limited():
+        raise rate_limited(0.01)
+
+    with pytest.raises(discord.HTTPException):
+        await scheduler.submit("bucket", always_limited)
+    assert scheduler.stats.failed == 1
+
+
+@pytest.mark.asyncio
+async def test_errors_are_raised_to_the_caller():
+    scheduler = OutboundScheduler()
+
+    async def broken():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        await scheduler.submit("bucket", broken)
+
+
+@pytest.mark.asyncio
+async def test_global_cap_prefers_interactions_across_buckets():
+    scheduler = OutboundScheduler(max_in_flight=1)
+    order = []
+
+    async def record(name):
+        order.append(name)
+
+    release, blocker = await start_blocker(scheduler, "busy")
+    default = asyncio.ensure_future(
+        scheduler.submit("messages", lambda: record("message"))
+    )
+    interaction = asyncio.ensure_future(
+        scheduler.submit(
+            "interaction", lambda: record("interaction"), priority=PRIORITY_INTERACTION
+        )
+    )
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(blocker, default, interaction)
+
+    assert order == ["interaction", "message"]
+    assert scheduler.stats.max_wait > 0
@@ -0,0 +1,102 @@
+from src.sessionRegistry import SessionRegistry, TournamentSession
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def makeSession(message_id, guild_id=1, channel_id=2):
+    return TournamentSession(
+        guild_id=guild_id,
+        channel_id=channel_id,
+        message_id=message_id,
+        creator_id=42,
+        players=[],
+        teams=[],
+    )
+
+
+def testLookupByMessageId():
+    registry = SessionRegistry()
+    session = makeSession(100)
+    registry.add(session)
+    assert registry.get(100) is session
+    assert registry.get(101) is None
+    assert session.key == (1, 2, 100)
+
+
+def testForChannelReturnsEveryLiveSession():
+    clock = FakeClock()
+    registry = SessionRegistry(idle_timeout=10, clock=clock)
+    lobbies = [makeSession(100), makeSession(101)]
+    for lobby in lobbies:
+        registry.add(lobby)
+    registry.add(makeSession(102, channel_id=3))
+    assert registry.for_channel(1, 2) == lobbies
+    assert registry.for_channel(9, 2) == []
+
+    clock.now = 8
+    registry.get(101)
+    clock.now = 12
+    assert registry.for_channel(1, 2) == [lobbies[1]]
+    assert 100 not in registry
+
+
+def testRemoveForgetsChannel():
+    registry = SessionRegistry()
+    registry.add(makeSession(100))
+    registry.add(makeSession(101))
+    assert registry.remove(100) is not None
+    assert [session.message_id for session in registry.for_channel(1, 2)] == [101]
+    registry.remove(101)
+    assert registry.for_channel(1, 2) == []
+    assert registry._channels == {}
+    assert registry.remove(100) is None
+
+
+def testIdleSessionsAreEvicted():
+    clock = FakeClock()
+    registry = SessionRegistry(idle_timeout=10, clock=clock)
+    registry.add(makeSession(100))
+    clock.now = 5
+    registry.add(makeSession(101, channel_id=3))
+    clock.now = 12
+    assert registry.evict_idle() == 1
+    assert 100 not in registry
+    assert 101 in registry
+    clock.now = 30
+    assert registry.get(101) is None
+
+
+def testCapacityEvictsLeastRecentlyUsed():
+    registry = SessionRegistry(max_sessions=2)
+    registry.add(makeSession(100, channel_id=1))
+    registry.add(makeSession(101, channel_id=2))
+    registry.get(100)  # 101 is now the least recently used
+    registry.add(makeSession(102, channel_id=3))
+    assert 100 in registry
+    assert 101 not in registry
+    assert 102 in registry
+    assert len(registry) == 2
+
+
+def testEvictedSessionsAreReported():
+    clock = FakeClock()
+    removed = []
+    registry = SessionRegistry(
+        max_sessions=2,
+        idle_timeout=10,
+        clock=clock,
+        on_remove=lambda session: removed.append(session.message_id),
+    )
+    registry.add(makeSession(100, channel_id=1))
+    registry.add(makeSession(101, channel_id=2))
+    registry.add(makeSession(102, channel_id=3))
+    assert removed == [100]
+    clock.now = 20
+    registry.evict_idle()
+    assert removed == [100, 101, 102]
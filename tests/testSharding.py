@@ -0,0 +1,116 @@
+import pytest
+import pytest_asyncio
+import discord
+from unittest.mock import AsyncMock, Mock
+from src.sharding import ShardedDudeBot, shardForGuild, shardRanges
+from src.storage import SQLiteStorage
+
+SHARD_COUNT = 6
+PROCESS_COUNT = 3
+
+
+class FakeGateway:
+    """
+    Delivers events to the worker running the guild's shard, as Discord's
+    gateway does for a bot split across processes.
+    """
+
+    def __init__(self, workers, shard_count):
+        self.shard_count = shard_count
+        self.workers = {}
+        for worker in workers:
+            for shard_id in worker.shard_ids:
+                self.workers[shard_id] = worker
+
+    def worker_for(self, guild_id):
+        return self.workers[shardForGuild(guild_id, self.shard_count)]
+
+    async def send_message(self, guild_id, message):
+        await self.worker_for(guild_id).on_message(message)
+
+
+def makeWorkers(path):
+    workers = []
+    for shard_ids in shardRanges(SHARD_COUNT, PROCESS_COUNT):
+        worker = ShardedDudeBot(
+            storage=SQLiteStorage(path), shard_ids=shard_ids, shard_count=SHARD_COUNT
+        )
+        worker.bot_id = 1
+        worker.tree.sync = AsyncMock()
+        workers.append(worker)
+    return workers
+
+
+def makeCreateMessage(guild_id, message_id):
+    message = Mock(spec=discord.Message)
+    message.mentions = [Mock(id=1)]
+    message.content = "@TourneyBot create"
+    message.guild = Mock(id=guild_id)
+    message.author = Mock(spec=discord.Member)
+    message.author.id = guild_id
+    message.author.voice.channel.members = []
+    for member_id, letter in enumerate("ABCDEFGH", start=1000):
+        member = Mock(spec=discord.Member)
+        member.id = member_id
+        member.name = letter
+        message.author.voice.channel.members.append(member)
+    message.channel = AsyncMock()
+    message.channel.id = guild_id
+    message.channel.send.return_value = Mock(id=message_id, add_reaction=AsyncMock())
+    return message
+
+
+@pytest_asyncio.fixture
+async def workers(tmp_path):
+    workers = makeWorkers(str(tmp_path / "tourneybot.db"))
+    yield workers
+    for worker in workers:
+        await worker.persistence.close()
+
+
+def testShardForGuild():
+    assert shardForGuild(0, 4) == 0
+    assert shardForGuild(5 << 22, 4) == 1
+    assert shardForGuild((3 << 22) + 12345, 4) == 3
+
+
+def testShardRanges():
+    assert shardRanges(6, 3) == [[0, 1], [2, 3], [4, 5]]
+    assert shardRanges(5, 2) == [[0, 1, 2], [3, 4]]
+    assert sorted(sum(shardRanges(16, 5), [])) == list(range(16))
+    with pytest.raises(ValueError):
+        shardRanges(2, 3)
+
+
+@pytest.mark.asyncio
+async def test_events_are_routed_to_the_owning_worker(workers, tmp_path):
+    for worker in workers:
+        await worker.setup_hook()
+    gateway = FakeGateway(workers, SHARD_COUNT)
+    guild_ids = [(shard << 22) + 7 for shard in range(SHARD_COUNT * 2)]
+
+    for message_id, guild_id in enumerate(guild_ids, start=100):
+        await gateway.send_message(guild_id, makeCreateMessage(guild_id, message_id))
+
+    for worker in workers:
+        assert len(worker.sessions) == 4
+        assert all(worker.owns_guild(session.guild_id) for session in worker.sessions)
+
+    # Only the worker running shard 0 syncs the application's commands
+    assert [worker.tree.sync.await_count for worker in workers] == [1, 0, 0]
+
+    # After a restart, each worker restores only its own guilds' tournaments
+    # from the shared database
+    for worker in workers:
+        await worker.persistence.close()
+    restarted = makeWorkers(str(tmp_path / "tourneybot.db"))
+    try:
+        for worker in restarted:
+            assert await worker.restore_sessions() == 4
+            for session in worker.sessions:
+                assert (
+                    gateway.worker_for(session.guild_id).shard_ids == worker.shard_ids
+                )
+    finally:
+        for worker in restarted:
+            await worker.persistence.close()
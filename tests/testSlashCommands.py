@@ -1,8 +1,17 @@
+import asyncio
 import pytest
 import discord
 from discord import app_commands
 from unittest.mock import AsyncMock, Mock, patch, MagicMock
-from src.tourneyBot import DudeBot, SETUP_ROLE_ID, ADMIN_ROLE_IDS
+from src.tourneyBot import (
+    DudeBot,
+    SETUP_ROLE_ID,
+    ADMIN_ROLE_IDS,
+    BULK_SETUP_CONCURRENCY,
+    BulkSetupSummary,
+    formatNickname,
+    parseSetupCsv,
+)
 
 
 @pytest.fixture
@@ -390,3 +399,203 @@ async def test_setup_already_setup_user(
     # Verify no edits were made to the member
     mock_member.edit.assert_not_called()
     mock_member.remove_roles.assert_not_called()
+
+
+def make_member(name, roles=(), nick=None):
+    member = Mock(spec=discord.Member)
+    member.edit = AsyncMock()
+    member.name = name
+    member.nick = nick
+    member.mention = f"@{name}"
+    member.roles = list(roles)
+    return member
+
+
+@pytest.fixture
+def bot():
+    return DudeBot()
+
+
+def test_format_nickname():
+    assert formatNickname("Tim", "H", "test") == 'Tim "test" H'
+    long_nickname = formatNickname("Bartholomew-Christopher", "H", "LongUsername")
+    assert len(long_nickname) <= 32
+    assert '"..."' in long_nickname
+
+
+def test_parse_setup_csv():
+    rows = parseSetupCsv(
+        "member,first_name,last_initial\n123,Tim,H\n\nsome_user, Ann , B\n"
+    )
+    assert rows == [("123", "Tim", "H"), ("some_user", "Ann", "B")]
+    with pytest.raises(ValueError, match="Line 2"):
+        parseSetupCsv("123,Tim,H\n456,Ann\n")
+
+
+@pytest.mark.asyncio
+async def test_setup_members_combines_edits(bot, mock_setup_role):
+    guild = Mock(spec=discord.Guild)
+    guild.id = 1
+    everyone = Mock(spec=discord.Role)
+    everyone.is_default.return_value = True
+    other_role = Mock(spec=discord.Role)
+    other_role.is_default.return_value = False
+    mock_setup_role.is_default.return_value = False
+    new_member = make_member("new", [everyone, mock_setup_role, other_role])
+    plain_member = make_member("plain")
+    done_member = make_member("done", nick="Done D")
+
+    summary = await bot.setup_members(
+        guild,
+        [(new_member, "Tim", "H"), (plain_member, "Ann", "B"), (done_member, "X", "Y")],
+        mock_setup_role,
+    )
+
+    # Nickname and role changes go out as one request per member
+    new_member.edit.assert_called_once_with(nick='Tim "new" H', roles=[other_role])
+    plain_member.edit.assert_called_once_with(nick='Ann "plain" B')
+    done_member.edit.assert_not_called()
+    assert sorted(summary.succeeded) == ["@new", "@plain"]
+    assert summary.skipped == ["@done"]
+    assert summary.failed == []
+
+
+@pytest.mark.asyncio
+async def test_setup_members_bounds_concurrency_and_reports_failures(
+    bot, mock_setup_role
+):
+    guild = Mock(spec=discord.Guild)
+    guild.id = 1
+    running = 0
+    peak = 0
+
+    async def slow_edit(**changes):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    members = []
+    for i in range(30):
+        member = make_member(f"user{i}")
+        member.edit.side_effect = slow_edit
+        members.append((member, "First", "L"))
+    members[3][0].edit.side_effect = discord.Forbidden(
+        MagicMock(), "Missing permissions"
+    )
+
+    summary = await bot.setup_members(guild, members, mock_setup_role)
+
+    assert peak <= BULK_SETUP_CONCURRENCY
+    assert len(summary.succeeded) == 29
+    assert summary.failed == [("@user3", "missing permissions")]
+
+
+@pytest.mark.asyncio
+async def test_resolve_setup_requests(bot, mock_setup_role):
+    by_id = make_member("by_id", [mock_setup_role])
+    by_name = make_member("by_name")
+    fetched = make_member("fetched", [mock_setup_role])
+    guild = Mock(spec=discord.Guild)
+    guild.get_member.side_effect = lambda member_id: by_id if member_id == 1 else None
+    guild.get_member_named.side_effect = lambda name: (
+        by_name if name == "by_name" else None
+    )
+    guild.fetch_member = AsyncMock(
+        side_effect=lambda member_id: fetched
+        if member_id == 2
+        else (_ for _ in ()).throw(discord.NotFound(MagicMock(), "Unknown Member"))
+    )
+    summary = BulkSetupSummary()
+
+    requests = await bot.resolve_setup_requests(
+        guild,
+        [("1", "A", "B"), ("2", "C", "D"), ("by_name", "E", "F"), ("3", "G", "H")],
+        mock_setup_role,
+        summary,
+    )
+
+    assert requests == [(by_id, "A", "B"), (fetched, "C", "D")]
+    assert summary.failed == [
+        ("@by_name", f"does not have {mock_setup_role.name}"),
+        ("3", "member not found"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_resolve_setup_requests_from_role(bot, mock_setup_role):
+    named = make_member("named", nick="Tim Horton")
+    unnamed = make_member("unnamed")
+    mock_setup_role.members = [named, unnamed]
+    summary = BulkSetupSummary()
+
+    requests = await bot.resolve_setup_requests(
+        Mock(spec=discord.Guild), None, mock_setup_role, summary
+    )
+
+    assert requests == [(named, "Tim", "H")]
+    assert summary.failed == [("@unnamed", "no first and last name in nickname")]
+
+
+def test_bulk_setup_summary_fits_message_limit():
+    summary = BulkSetupSummary()
+    summary.succeeded = ["@ok"] * 100
+    summary.failed = [(f"@member{i}", "member not found") for i in range(500)]
+    message = summary.format()
+    assert len(message) <= 2000
+    assert message.startswith("Set up 100 member(s).")
+    assert "more" in message.splitlines()[-1]
+
+
+def test_low_memory_mode_only_caches_voice_members():
+    default_bot = DudeBot()
+    assert default_bot._connection.member_cache_flags.joined
+    assert default_bot._connection._chunk_guilds
+
+    low_memory_bot = DudeBot(low_memory=True)
+    flags = low_memory_bot._connection.member_cache_flags
+    assert flags.voice
+    assert not flags.joined
+    assert not low_memory_bot._connection._chunk_guilds
+
+
+@pytest.mark.asyncio
+async def test_find_member_queries_uncached_members(bot):
+    guild = Mock(spec=discord.Guild)
+    guild.get_member.return_value = None
+    guild.get_member_named.return_value = None
+    by_id = make_member("by_id")
+    similar = make_member("by_name_2")
+    by_name = make_member("by_name")
+    guild.fetch_member = AsyncMock(return_value=by_id)
+    guild.query_members = AsyncMock(return_value=[similar, by_name])
+
+    assert await bot.find_member(guild, "1") is by_id
+    guild.fetch_member.assert_awaited_once_with(1)
+    assert await bot.find_member(guild, "by_name") is by_name
+    guild.query_members.assert_awaited_once_with(query="by_name", limit=5, cache=False)
+
+
+@pytest.mark.asyncio
+async def test_resolve_setup_requests_from_role_fetches_in_low_memory_mode(
+    mock_setup_role,
+):
+    bot = DudeBot(low_memory=True)
+    named = make_member("named", nick="Tim Horton")
+    named.get_role = Mock(return_value=mock_setup_role)
+    other = make_member("other", nick="Ann Bee")
+    other.get_role = Mock(return_value=None)
+
+    async def fetch_members(limit):
+        for member in (named, other):
+            yield member
+
+    guild = Mock(spec=discord.Guild)
+    guild.fetch_members = fetch_members
+    summary = BulkSetupSummary()
+
+    requests = await bot.resolve_setup_requests(guild, None, mock_setup_role, summary)
+
+    assert requests == [(named, "Tim", "H")]
+    assert summary.failed == []
@@ -0,0 +1,52 @@
+from src.player import Player
+from src.standings import PlayerRecord, Standings
+
+
+def testRecordMatchOnlyChangesItsPlayers():
+    standings = Standings()
+    a, b, c, d = (Player(i, name) for i, name in enumerate("ABCD", start=1))
+    standings.record_match(1, [a, b], [c, d])
+
+    changed = standings.record_match(1, [c], [a])
+
+    assert [(record.id, record.wins, record.losses) for record in changed] == [
+        (3, 1, 1),
+        (1, 1, 1),
+    ]
+    assert (standings.get(1, 2).wins, standings.get(1, 2).losses) == (1, 0)
+    assert standings.get(2, 1) is None
+
+
+def testRankedOrdersByWinsThenLosses():
+    standings = Standings()
+    standings.load_guild(
+        1,
+        [
+            PlayerRecord(1, 1, "A", 2, 3),
+            PlayerRecord(1, 2, "B", 2, 1),
+            PlayerRecord(1, 3, "C", 5, 0),
+            PlayerRecord(1, 4, "D", 2, 1),
+        ],
+    )
+    assert [record.name for record in standings.ranked(1)] == ["C", "B", "D", "A"]
+    assert [record.name for record in standings.ranked(1, [1, 4, 99])] == ["D", "A"]
+
+
+def testLoadingAgainKeepsResultsReportedSinceTheFirstLoad():
+    standings = Standings()
+    stored = [PlayerRecord(1, 1, "A", 3, 0), PlayerRecord(1, 3, "C", 4, 4)]
+    assert not standings.is_loaded(1)
+    standings.load_guild(1, stored)
+    standings.record_match(1, [Player(1, "A")], [Player(2, "B")])
+
+    # A concurrent report finishing its load later must not undo the result
+    standings.load_guild(
+        1, [PlayerRecord(1, 1, "A", 3, 0), PlayerRecord(1, 3, "C", 4, 4)]
+    )
+
+    assert standings.is_loaded(1)
+    assert standings.get(1, 1).wins == 4
+    assert standings.get(1, 3).played == 8
+    standings.forget_guild(1)
+    assert not standings.is_loaded(1)
+    assert standings.ranked(1) == []
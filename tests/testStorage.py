@@ -0,0 +1,264 @@
+import asyncio
+import time
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock
+from src.bracket import createBracket
+from src.player import Player
+from src.sessionRegistry import TournamentSession
+from src.ratings import Rating
+from src.standings import PlayerRecord
+from src.storage import SQLiteStorage, StorageBackend, WriteBehindQueue
+from src.tourneyBot import DudeBot
+
+
+class RecordingStorage(SQLiteStorage):
+    def __init__(self):
+        super().__init__(":memory:")
+        self.batches = []
+
+    def write_batch(self, upserts, deletes):
+        self.batches.append(([data["message_id"] for data in upserts], deletes))
+
+
+class SessionsOnlyStorage(StorageBackend):
+    def write_batch(self, upserts, deletes):
+        pass
+
+    def load_sessions(self, since):
+        return []
+
+
+def testIncompleteBackendsCannotBeCreated():
+    # A backend that would silently drop standings and ratings is refused
+    with pytest.raises(TypeError):
+        SessionsOnlyStorage()
+
+
+def makeSession(message_id, guild_id=1):
+    players = [Player(i, f"Player{i}") for i in range(1, 9)]
+    return TournamentSession(
+        guild_id=guild_id,
+        channel_id=2,
+        message_id=message_id,
+        creator_id=42,
+        players=players,
+        teams=[[1, 2], [3, 4], [5, 6], [7, 8]],
+    )
+
+
+def testSessionRoundTripsSeed():
+    session = makeSession(100)
+    session.draw = 2
+    session.team_size = 2
+    session.lobby, session.lobby_count = 1, 3
+    restored = TournamentSession.from_dict(session.to_dict())
+    assert (restored.seed, restored.draw, restored.team_size) == (session.seed, 2, 2)
+    assert (restored.lobby, restored.lobby_count) == (1, 3)
+
+
+def testSessionRoundTripsWithBracket():
+    session = makeSession(100)
+    session.bracket = createBracket(session.teams, "double")
+    match = session.bracket.pending_matches()[0]
+    session.bracket.report_result(match.id, match.sides[1], (1, 3))
+    session.leaderboard_id = 555
+
+    restored = TournamentSession.from_dict(session.to_dict())
+
+    assert restored.key == session.key
+    assert restored.players == session.players
+    assert restored.teams == session.teams
+    assert restored.bracket.format == "double"
+    assert restored.leaderboard_id == 555
+    assert restored.bracket.matches[match.id].winner == match.sides[1]
+    assert restored.bracket.matches[match.id].scores == (1, 3)
+    assert [m.id for m in restored.bracket.pending_matches()] == [
+        m.id for m in session.bracket.pending_matches()
+    ]
+
+
+def testSQLiteStorageSavesAndDeletes():
+    storage = SQLiteStorage(":memory:")
+    storage.write_batch([makeSession(100).to_dict(), makeSession(101).to_dict()], [])
+    storage.write_batch([], [100])
+    loaded = storage.load_sessions(since=0)
+    assert [data["message_id"] for data in loaded] == [101]
+
+
+def testSQLiteStorageDiscardsStaleSessions():
+    storage = SQLiteStorage(":memory:")
+    storage.write_batch([makeSession(100).to_dict()], [])
+    assert storage.load_sessions(since=time.time() + 1) == []
+    assert storage.load_sessions(since=0) == []
+
+
+@pytest.mark.asyncio
+async def test_write_behind_queue_coalesces_changes():
+    storage = RecordingStorage()
+    queue = WriteBehindQueue(storage)
+    session = makeSession(100)
+    for _ in range(5):
+        queue.save(session)
+    queue.save(makeSession(101))
+    queue.delete(102)
+    assert len(queue) == 3
+
+    await queue.flush()
+
+    assert storage.batches == [([100, 101], [102])]
+    assert len(queue) == 0
+
+
+@pytest.mark.asyncio
+async def test_write_behind_queue_flushes_full_batches_in_background():
+    storage = RecordingStorage()
+    queue = WriteBehindQueue(storage, flush_interval=60, batch_size=10)
+    queue.start()
+    for message_id in range(10):
+        queue.save(makeSession(message_id))
+    for _ in range(50):
+        if storage.batches:
+            break
+        await asyncio.sleep(0.01)
+    await queue.close()
+    assert storage.batches[0] == (list(range(10)), [])
+
+
+@pytest.mark.asyncio
+async def test_write_behind_queue_keeps_changes_after_failed_write():
+    storage = RecordingStorage()
+    storage.write_batch = lambda upserts, deletes: 1 / 0
+    queue = WriteBehindQueue(storage)
+    queue.save(makeSession(100))
+    with pytest.raises(ZeroDivisionError):
+        await queue.flush()
+    assert len(queue) == 1
+
+
+@pytest_asyncio.fixture
+async def stored_client(tmp_path):
+    path = str(tmp_path / "tourneybot.db")
+    storage = SQLiteStorage(path)
+    storage.write_batch(
+        [makeSession(message_id).to_dict() for message_id in range(1000)], []
+    )
+    storage.close()
+
+    client = DudeBot(storage=SQLiteStorage(path))
+    client.tree.sync = AsyncMock()
+    yield client
+    await client.persistence.close()
+
+
+@pytest.mark.asyncio
+async def test_setup_hook_restores_sessions(stored_client):
+    start = time.perf_counter()
+    await stored_client.setup_hook()
+    elapsed = time.perf_counter() - start
+
+    assert len(stored_client.sessions) == 1000
+    assert stored_client.sessions.get(500).creator_id == 42
+    assert elapsed < 1
+
+
+@pytest.mark.asyncio
+async def test_evicted_sessions_are_deleted(stored_client):
+    await stored_client.setup_hook()
+    stored_client.sessions.max_sessions = 1000
+    stored_client.sessions.add(makeSession(1000))
+    await stored_client.persistence.flush()
+
+    # The least recently used session made room and was deleted
+    stored = stored_client.persistence.backend.load_sessions(since=0)
+    assert len(stored) == 999
+    assert 0 not in {data["message_id"] for data in stored}
+
+
+@pytest.mark.asyncio
+async def test_command_sync_is_skipped_when_unchanged(stored_client):
+    await stored_client.setup_hook()
+    stored_client.tree.sync.assert_awaited_once_with(guild=None)
+
+    # A restart with the same commands does not sync again
+    assert await stored_client.sync_commands() == []
+    assert stored_client.tree.sync.await_count == 1
+
+    @stored_client.tree.command()
+    async def ping(interaction):
+        """Check the bot is alive."""
+
+    assert await stored_client.sync_commands() == [None]
+    assert stored_client.tree.sync.await_count == 2
+
+
+def testSQLiteStorageSavesValues(tmp_path):
+    path = str(tmp_path / "tourneybot.db")
+    storage = SQLiteStorage(path)
+    assert storage.load_value("key") is None
+    storage.save_value("key", "first")
+    storage.save_value("key", "second")
+    storage.close()
+    assert SQLiteStorage(path).load_value("key") == "second"
+
+
+def testSQLiteStorageSavesStandings(tmp_path):
+    path = str(tmp_path / "tourneybot.db")
+    storage = SQLiteStorage(path)
+    storage.save_standings(
+        [
+            PlayerRecord(1, 10, "A", 1, 0).to_dict(),
+            PlayerRecord(2, 10, "A", 0, 1).to_dict(),
+        ]
+    )
+    # Only the changed row is written
+    storage.save_standings([PlayerRecord(1, 10, "Renamed", 2, 0).to_dict()])
+    storage.close()
+
+    storage = SQLiteStorage(path)
+    assert [
+        PlayerRecord.from_dict(data).to_dict() for data in storage.load_standings(1)
+    ] == [PlayerRecord(1, 10, "Renamed", 2, 0).to_dict()]
+    assert storage.load_standings(3) == []
+
+
+def testSQLiteStorageLooksUpALobbysRatingsByKey(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "tourneybot.db"))
+    storage.save_rating_period(
+        1,
+        100.0,
+        [[[10, 11], [12, 13]]],
+        [Rating(1000.0 + i, 100.0, 100.0).to_dict(1, i) for i in range(10, 14)],
+    )
+    storage.save_rating_period(
+        1, 200.0, [[[12, 13], [10, 11]]], [Rating(1200.0, 90.0, 200.0).to_dict(1, 12)]
+    )
+    storage.save_rating_period(
+        2, 150.0, [[[10], [11]]], [Rating(500.0, 90.0, 150.0).to_dict(2, 10)]
+    )
+
+    lobby = list(range(10, 22))
+    loaded = {
+        data["player_id"]: Rating.from_dict(data)
+        for data in storage.load_ratings(1, lobby)
+    }
+    assert loaded == {
+        10: Rating(1010.0, 100.0, 100.0),
+        11: Rating(1011.0, 100.0, 100.0),
+        12: Rating(1200.0, 90.0, 200.0),
+        13: Rating(1013.0, 100.0, 100.0),
+    }
+    plan = storage._connection.execute(
+        "EXPLAIN QUERY PLAN SELECT player_id, rating, deviation, updated FROM ratings "
+        f"WHERE guild_id = ? AND player_id IN ({', '.join('?' * len(lobby))})",
+        (1, *lobby),
+    ).fetchall()
+    assert len(plan) == 1 and "USING INDEX" in plan[0][-1]
+
+    assert storage.load_rating_history(1) == [
+        (100.0, [[[10, 11], [12, 13]]]),
+        (200.0, [[[12, 13], [10, 11]]]),
+    ]
+    storage.replace_ratings(1, [Rating(900.0, 80.0, 200.0).to_dict(1, 11)])
+    assert [data["player_id"] for data in storage.load_ratings(1, lobby)] == [11]
+    assert len(storage.load_ratings(2, [10])) == 1
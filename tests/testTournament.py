@@ -1,6 +1,21 @@
+import random
 import pytest
 from unittest.mock import patch
-from src.tournament import teamCreator, InvalidTournamentException
+from src.tournament import (
+    teamCreator,
+    balanceTeams,
+    teamSizes,
+    teamSpread,
+    tournamentGenerator,
+    avoidRepeats,
+    addTeammates,
+    replayTeams,
+    sessionRng,
+    lobbySizes,
+    splitLobbies,
+    createLobbies,
+    InvalidTournamentException,
+)
 
 
 @patch("src.tournament.random.shuffle", lambda x: x)
@@ -87,17 +102,185 @@ def testLessThanEightPlayersTeamCreatorFails():
 
 
 @pytest.mark.parametrize(
-    "players",
+    "playerCount,expectedSizes",
+    [
+        (9, [3, 3, 3]),
+        (11, [3, 3, 3, 2]),
+        (15, [3, 3, 3, 3, 3]),
+        (16, [3, 3, 3, 3, 2, 2]),
+    ],
+)
+@patch("src.tournament.random.shuffle", lambda x: x)
+def testOtherComboTeamCreator(playerCount, expectedSizes):
+    players = ["Player" + str(i) for i in range(1, playerCount + 1)]
+    teams = teamCreator(players)
+    assert [len(team) for team in teams] == expectedSizes
+    assert [player for team in teams for player in team] == players
+
+
+@pytest.mark.parametrize(
+    "teamSize,expectedSizes",
     [
-        (["Player" + str(i) for i in range(1, 10)]),  # 9 players
-        (["Player" + str(i) for i in range(1, 12)]),  # 11 players
-        (["Player" + str(i) for i in range(1, 16)]),  # 15 players
+        (1, [1] * 8),
+        (2, [2, 2, 2, 2]),
+        (3, [3, 3, 2]),
+        (4, [4, 4]),
+        (5, [4, 4]),
     ],
 )
 @patch("src.tournament.random.shuffle", lambda x: x)
-def testOtherComboTeamCreatorFails(players):
+def testExplicitTeamSizeTeamCreator(teamSize, expectedSizes):
+    players = ["Player" + str(i) for i in range(1, 9)]
+    assert [len(team) for team in teamCreator(players, teamSize)] == expectedSizes
+
+
+def testLargeLobbyTeamCreator():
+    players = ["Player" + str(i) for i in range(1, 401)]
+    teams = teamCreator(players, 3)
+    assert len(teams) == 134
+    assert {len(team) for team in teams} == {2, 3}
+    assert sorted(player for team in teams for player in team) == sorted(players)
+
+
+@pytest.mark.parametrize("teamSize", [0, -1, 8, 20])
+def testUnsupportedTeamSizeTeamCreatorFails(teamSize):
+    players = ["Player" + str(i) for i in range(1, 9)]
     try:
-        teamCreator(players)
+        teamCreator(players, teamSize)
         assert False, "Expected InvalidTournamentException"
     except InvalidTournamentException as e:
         assert str(e) == "Tournament size not supported"
+
+
+def testBalancedTeamCreatorEvensOutRatings():
+    players = ["Player" + str(i) for i in range(1, 13)]
+    ratings = {player: 100.0 * i for i, player in enumerate(players)}
+    teams = teamCreator(list(players), 3, ratings)
+    assert sorted(player for team in teams for player in team) == sorted(players)
+    assert [len(team) for team in teams] == [3, 3, 3, 3]
+    # Team averages should be within one rating step of each other, while a
+    # straight split of the sorted players would be 900 apart
+    assert teamSpread(teams, ratings) <= 100
+
+
+def testBalancedTeamCreatorMixedSizes():
+    players = ["Player" + str(i) for i in range(1, 11)]
+    ratings = {player: float(i * i) for i, player in enumerate(players)}
+    teams = teamCreator(list(players), 3, ratings)
+    assert sorted(len(team) for team in teams) == [2, 2, 3, 3]
+    assert teamSpread(teams, ratings) < teamSpread(
+        [players[0:3], players[3:6], players[6:8], players[8:10]], ratings
+    )
+
+
+def testBalanceTeamsRefinesForAFixedNumberOfPasses():
+    rng = random.Random(0)
+    players = ["Player" + str(i) for i in range(200)]
+    ratings = {player: rng.gauss(1000, 300) for player in players}
+    sizes = teamSizes(len(players), 3)
+    teams = balanceTeams(players, ratings, sizes)
+    assert teamSpread(teams, ratings) < 50
+    assert teamSpread(balanceTeams(players, ratings, sizes, passes=5), ratings) > (
+        teamSpread(teams, ratings)
+    )
+
+
+def testBalanceTeamsWithoutPassesOnlySeeds():
+    players = list(range(6))
+    ratings = {player: 6.0 - player for player in players}
+    # Every player is still placed, into the weakest team with room
+    assert balanceTeams(players, ratings, [2, 2, 2], passes=0) == [
+        [0, 5],
+        [1, 4],
+        [2, 3],
+    ]
+    assert balanceTeams(players, ratings, [3, 2, 1], passes=0) == [
+        [0, 3, 5],
+        [1, 4],
+        [2],
+    ]
+
+
+def testTeamCreatorDoesNotMutatePlayers():
+    players = ["Player" + str(i) for i in range(1, 13)]
+    original = list(players)
+    teamCreator(players, rng=random.Random(1))
+    assert players == original
+    teams = [["A"], ["B"], ["C"]]
+    tournamentGenerator(teams, random.Random(1))
+    assert teams == [["A"], ["B"], ["C"]]
+
+
+def testSeededTeamsReplay():
+    players = ["Player" + str(i) for i in range(1, 13)]
+    first = teamCreator(players, 3, rng=sessionRng(1234, 0))
+    assert replayTeams(players, 1234, 0, 3) == first
+    assert replayTeams(players, 1234, 0, 3) == first
+    # Each reroll is a separate, reproducible draw that avoids the previous teams
+    assert replayTeams(players, 1234, 1, 3) == teamCreator(
+        players, 3, rng=sessionRng(1234, 1), pairCounts=addTeammates({}, first)
+    )
+    assert replayTeams(players, 1234, 1, 3) != first
+    assert replayTeams(players, 4321, 0, 3) != first
+
+
+def testBalancedTeamsReplay():
+    players = list(range(12))
+    ratings = {player: 1000.0 + 25 * player for player in players}
+    first = teamCreator(players, 3, ratings, sessionRng(1234, 0))
+    assert replayTeams(players, 1234, 0, 3, ratings=ratings) == first
+    # Rerolls of a balanced tournament are random
+    assert replayTeams(players, 1234, 1, 3, ratings=ratings) == teamCreator(
+        players, 3, rng=sessionRng(1234, 1), pairCounts=addTeammates({}, first)
+    )
+
+
+def testAvoidRepeatsSplitsRecentTeammates():
+    teams = [["A", "B"], ["C", "D"], ["E", "F"], ["G", "H"]]
+    pairCounts = addTeammates({}, teams)
+    assert pairCounts[("A", "B")] == 1.0
+    rearranged = avoidRepeats(teams, pairCounts)
+    assert teams == [["A", "B"], ["C", "D"], ["E", "F"], ["G", "H"]]
+    assert [len(team) for team in rearranged] == [2, 2, 2, 2]
+    assert sorted(player for team in rearranged for player in team) == list("ABCDEFGH")
+    assert all(pairCounts.get(tuple(sorted(team)), 0) == 0 for team in rearranged)
+
+
+def testRerollsAvoidPreviousTeammates():
+    players = ["Player" + str(i) for i in range(1, 13)]
+    for seed in range(20):
+        first = replayTeams(players, seed, 0, 2)
+        second = replayTeams(players, seed, 1, 2)
+        assert not {tuple(sorted(team)) for team in first} & {
+            tuple(sorted(team)) for team in second
+        }
+
+
+def testLobbySizes():
+    assert lobbySizes(20) == [20]
+    assert lobbySizes(25) == [13, 12]
+    assert lobbySizes(60) == [20, 20, 20]
+    assert lobbySizes(60, 16) == [15, 15, 15, 15]
+    with pytest.raises(InvalidTournamentException):
+        lobbySizes(60, 4)
+
+
+def testSplitLobbiesByRatingTier():
+    players = list(range(30))
+    ratings = {player: float(player) for player in players}
+    lobbies = splitLobbies(players, 16, ratings)
+    assert lobbies == [list(range(29, 14, -1)), list(range(14, -1, -1))]
+    shuffled = splitLobbies(players, 16, rng=random.Random(0))
+    assert sorted(player for lobby in shuffled for player in lobby) == players
+    assert players == list(range(30))
+
+
+def testCreateLobbiesReplaysPerLobby():
+    players = list(range(60))
+    lobbies = createLobbies(players, [11, 12, 13], 3)
+    assert len(lobbies) == 3
+    for seed, (lobby, teams) in zip([11, 12, 13], lobbies):
+        assert len(lobby) == 20
+        assert [len(team) for team in teams] == [3, 3, 3, 3, 3, 3, 2]
+        assert replayTeams(lobby, seed, 0, 3) == teams
+    assert sorted(player for lobby, _ in lobbies for player in lobby) == players
@@ -1,8 +1,15 @@
+import asyncio
+import time
 import pytest
 import pytest_asyncio
 import discord
 from unittest.mock import Mock, AsyncMock, patch
-from src.tourneyBot import DudeBot
+from src.compute import InlineCompute
+from src.tourneyBot import DudeBot, TournamentControls
+from src.sessionRegistry import TournamentSession
+from src.player import Player
+from src.tournament import InvalidTournamentException, replayTeams
+from src.pairingHistory import pairKey
 
 
 @pytest_asyncio.fixture
@@ -26,8 +33,9 @@ def mock_message():
 
     # Add 8 players to the voice channel
     message.author.voice.channel.members = []
-    for letter in "ABCDEFGH":
+    for member_id, letter in enumerate("ABCDEFGH", start=1000):
         member = Mock(spec=discord.Member)
+        member.id = member_id
         member.name = letter
         message.author.voice.channel.members.append(member)
 
@@ -35,12 +43,26 @@ def mock_message():
 
 
 @pytest.fixture
-def mock_reaction(mock_message):
-    reaction = Mock(spec=discord.Reaction)
-    reaction.message = Mock(spec=discord.Message)
-    reaction.message.id = "789"
-    reaction.message.channel = AsyncMock()
-    return reaction
+def team_message():
+    message = Mock(spec=discord.Message)
+    message.id = "789"
+    message.channel = AsyncMock()
+    return message
+
+
+async def react(client, message, emoji, user_id):
+    """
+    Deliver a reaction to a message the client has not cached.
+    """
+    message.channel.get_partial_message = Mock(return_value=message)
+    client.get_partial_messageable = Mock(return_value=message.channel)
+    payload = Mock(spec=discord.RawReactionActionEvent)
+    payload.guild_id = 1
+    payload.channel_id = 2
+    payload.message_id = message.id
+    payload.user_id = user_id
+    payload.emoji = discord.PartialEmoji(name=emoji)
+    await client.on_raw_reaction_add(payload)
 
 
 @pytest.fixture
@@ -52,7 +74,7 @@ def mock_user():
 
 @pytest.mark.asyncio
 @pytest.mark.parametrize(
-    "emoji,user_id,should_send",
+    "emoji,user_id,should_respond",
     [
         ("🔁", "456", True),  # Tournament creator can reroll
         ("🔁", "789", False),  # Other user cannot reroll
@@ -60,24 +82,29 @@ def mock_user():
         ("✅", "789", False),  # Other user cannot confirm
     ],
 )
-async def test_reaction_handling(client, mock_reaction, emoji, user_id, should_send):
+async def test_reaction_handling(client, team_message, emoji, user_id, should_respond):
     # Setup
-    client.current_team_message = mock_reaction.message
-    client.tournament_creator = "456"  # Original creator's ID
-    client.players = [f"Player{i}" for i in range(1, 9)]
-
-    mock_reaction.emoji = emoji
-    test_user = Mock(spec=discord.Member)
-    test_user.id = user_id
+    players = [Player(i, f"Player{i}") for i in range(1, 9)]
+    client.sessions.add(
+        TournamentSession(
+            guild_id=1,
+            channel_id=2,
+            message_id=team_message.id,
+            creator_id="456",  # Original creator's ID
+            players=players,
+            teams=[[1, 2], [3, 4], [5, 6], [7, 8]],
+        )
+    )
 
     # Test
-    await client.on_reaction_add(mock_reaction, test_user)
+    await react(client, team_message, emoji, user_id)
 
-    # Verify
-    if should_send:
-        mock_reaction.message.channel.send.assert_called_once()
+    # Verify: rerolls edit the team message, confirmations post the matches
+    response = team_message.edit if emoji == "🔁" else team_message.channel.send
+    if should_respond:
+        response.assert_called_once()
     else:
-        mock_reaction.message.channel.send.assert_not_called()
+        response.assert_not_called()
 
 
 @pytest.mark.asyncio
@@ -85,36 +112,643 @@ async def test_end_to_end_workflow(client, mock_message, mock_user, subtests):
     with subtests.test(msg="Initial team creation"):
         # Test initial creation
         await client.on_message(mock_message)
-        assert client.tournament_creator == "456"
-        assert client.current_team_message is not None
-        assert len(client.teams) == 4
+        team_message = mock_message.channel.send.return_value
+        session = client.sessions.get(team_message.id)
+        assert session is not None
+        assert session.creator_id == "456"
+        assert len(session.teams) == 4
 
     with subtests.test(msg="Tournament creator can reroll"):
         # Test reroll by creator
-        reroll = Mock(spec=discord.Reaction)
-        reroll.emoji = "🔁"
-        reroll.message = client.current_team_message
-        reroll.message.channel = AsyncMock()
-        await client.on_reaction_add(reroll, mock_user)
-        reroll.message.channel.send.assert_called_once()
+        team_message.channel = AsyncMock()
+        await react(client, team_message, "🔁", mock_user.id)
+        team_message.edit.assert_called_once()
+        emoji, user = team_message.remove_reaction.call_args.args
+        assert (emoji, user.id) == ("🔁", int(mock_user.id))
+        team_message.channel.send.assert_not_called()
+        assert client.sessions.get(team_message.id) is session
 
     with subtests.test(msg="Other user cannot reroll"):
         # Test reroll by other user (should fail)
-        other_user = Mock(spec=discord.Member)
-        other_user.id = "789"
-        other_reroll = Mock(spec=discord.Reaction)
-        other_reroll.emoji = "🔁"
-        other_reroll.message = client.current_team_message
-        other_reroll.message.channel = AsyncMock()
-        await client.on_reaction_add(other_reroll, other_user)
-        other_reroll.message.channel.send.assert_not_called()
+        team_message.edit.reset_mock()
+        await react(client, team_message, "🔁", "789")
+        team_message.edit.assert_not_called()
 
     with subtests.test(msg="Tournament creator can confirm"):
         # Test confirmation
-        confirm = Mock(spec=discord.Reaction)
-        confirm.emoji = "✅"
-        confirm.message = client.current_team_message
-        confirm.message.channel = AsyncMock()
-        await client.on_reaction_add(confirm, mock_user)
-        confirm.message.channel.send.assert_called_once()
-        assert client.current_team_message is None
+        await react(client, team_message, "✅", mock_user.id)
+        team_message.channel.send.assert_called_once()
+        assert session.bracket is not None
+        assert len(session.bracket.pending_matches()) == 2
+
+    with subtests.test(msg="Confirmed tournament ignores further reactions"):
+        team_message.channel.send.reset_mock()
+        await react(client, team_message, "✅", mock_user.id)
+        team_message.channel.send.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_reroll_without_manage_messages(client, team_message):
+    players = [Player(i, f"Player{i}") for i in range(1, 9)]
+    client.sessions.add(
+        TournamentSession(
+            guild_id=1,
+            channel_id=2,
+            message_id=team_message.id,
+            creator_id="456",
+            players=players,
+            teams=[[1, 2], [3, 4], [5, 6], [7, 8]],
+        )
+    )
+    response = Mock(status=403, reason="Forbidden")
+    team_message.remove_reaction.side_effect = discord.Forbidden(response, "")
+
+    await react(client, team_message, "🔁", "456")
+
+    # The teams are still rerolled, and no error is posted
+    team_message.edit.assert_called_once()
+    team_message.channel.send.assert_not_called()
+
+
+class YieldingCompute(InlineCompute):
+    """
+    Lets other tasks run before each computation, as a pool would.
+    """
+
+    async def run(self, func, *args, **kwargs):
+        await asyncio.sleep(0)
+        return await super().run(func, *args, **kwargs)
+
+
+def twelve_player_session():
+    players = [Player(i, f"Player{i}") for i in range(1, 13)]
+    teams = [[1, 2, 3], [4, 5, 6], [7, 8, 9], [10, 11, 12]]
+    return TournamentSession(1, 2, "789", "456", players, teams, seed=1234)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_rerolls_use_consecutive_draws(client):
+    client.compute = YieldingCompute()
+    expected = twelve_player_session()
+    await client.reroll_session(expected)
+    await client.reroll_session(expected)
+
+    session = twelve_player_session()
+    await asyncio.gather(client.reroll_session(session), client.reroll_session(session))
+
+    assert session.draw == expected.draw == 2
+    assert session.teams == expected.teams
+
+
+@pytest.mark.asyncio
+async def test_start_waits_for_a_running_reroll(client):
+    client.compute = YieldingCompute()
+    session = twelve_player_session()
+    original = session.teams
+
+    await asyncio.gather(client.reroll_session(session), client.start_session(session))
+
+    assert session.draw == 1
+    assert session.teams != original
+    assert session.bracket.teams == session.teams
+    with pytest.raises(InvalidTournamentException, match="already started"):
+        await client.reroll_session(session)
+
+
+@pytest.mark.asyncio
+async def test_sessions_are_isolated_per_message(client, team_message):
+    players = [Player(i, f"Player{i}") for i in range(1, 9)]
+    for message_id, creator_id in (("789", "456"), ("790", "457")):
+        client.sessions.add(
+            TournamentSession(
+                guild_id=message_id,
+                channel_id=2,
+                message_id=message_id,
+                creator_id=creator_id,
+                players=players,
+                teams=[[1, 2], [3, 4], [5, 6], [7, 8]],
+            )
+        )
+
+    # The creator of the other tournament cannot confirm this one
+    await react(client, team_message, "✅", "457")
+
+    team_message.channel.send.assert_not_called()
+    assert len(client.sessions) == 2
+
+
+ROUND_TRIP = 0.05
+
+
+async def round_trip(*args, **kwargs):
+    await asyncio.sleep(ROUND_TRIP)
+
+
+@pytest.mark.asyncio
+async def test_reroll_round_trips(client):
+    players = [Player(i, f"Player{i}") for i in range(1, 9)]
+    message = Mock(spec=discord.Message)
+    message.id = "789"
+    message.channel = AsyncMock()
+    message.edit = AsyncMock(side_effect=round_trip)
+    message.channel.send = AsyncMock(side_effect=round_trip)
+    message.add_reaction = AsyncMock(side_effect=round_trip)
+    client.sessions.add(
+        TournamentSession(
+            guild_id=1,
+            channel_id=2,
+            message_id=message.id,
+            creator_id="456",
+            players=players,
+            teams=[[1, 2], [3, 4], [5, 6], [7, 8]],
+        )
+    )
+    message.remove_reaction = AsyncMock(side_effect=round_trip)
+
+    start = time.perf_counter()
+    await react(client, message, "🔁", "456")
+    elapsed = time.perf_counter() - start
+
+    # Previously: delete, send and one add_reaction per emoji, all sequential
+    api_calls = (
+        message.edit.call_count
+        + message.remove_reaction.call_count
+        + message.channel.send.call_count
+        + message.add_reaction.call_count
+    )
+    assert api_calls == 2
+    assert elapsed < 2 * ROUND_TRIP
+
+
+@pytest.mark.asyncio
+async def test_reactions_added_concurrently(client):
+    message = Mock(spec=discord.Message)
+    message.add_reaction = AsyncMock(side_effect=round_trip)
+
+    start = time.perf_counter()
+    await client.add_tournament_reactions(message)
+    elapsed = time.perf_counter() - start
+
+    assert [call.args[0] for call in message.add_reaction.call_args_list] == ["🔁", "✅"]
+    assert elapsed < 2 * ROUND_TRIP
+
+
+@pytest.mark.asyncio
+async def test_create_command_arguments(client, mock_message):
+    mock_message.content = "@TourneyBot create 4 extra"
+    await client.on_message(mock_message)
+    mock_message.channel.send.assert_called_once_with(
+        "```Error: Usage: create [team size]```"
+    )
+
+    mock_message.channel.send.reset_mock()
+    mock_message.content = "@TourneyBot new 4"
+    await client.on_message(mock_message)
+    team_message = mock_message.channel.send.return_value
+    assert len(client.sessions.get(team_message.id).teams) == 2
+
+    # A second create straight away is refused
+    mock_message.channel.send.reset_mock()
+    await client.on_message(mock_message)
+    assert "Slow down" in mock_message.channel.send.call_args.args[0]
+
+
+@pytest.mark.asyncio
+async def test_failed_create_does_not_start_cooldown(client, mock_message):
+    voice = mock_message.author.voice
+    mock_message.author.voice = None
+    await client.on_message(mock_message)
+    mock_message.channel.send.assert_called_once_with(
+        "```Error: You must be in a voice channel to use this command.```"
+    )
+
+    mock_message.author.voice = voice
+    await client.on_message(mock_message)
+    team_message = mock_message.channel.send.return_value
+    assert client.sessions.get(team_message.id) is not None
+
+
+@pytest.mark.asyncio
+async def test_messages_not_addressed_to_bot_are_ignored(client, mock_message):
+    mock_message.mentions = []
+    mock_message.content = Mock()
+    await client.on_message(mock_message)
+    # The content is never touched
+    mock_message.content.split.assert_not_called()
+    mock_message.channel.send.assert_not_called()
+
+
+def tourney_command(client, name):
+    return client.tree.get_command("tourney").get_command(name)
+
+
+@pytest.fixture
+def mock_interaction(mock_message):
+    interaction = Mock(spec=discord.Interaction)
+    interaction.id = 1
+    interaction.user = mock_message.author
+    interaction.user.guild = Mock(id=1)
+    interaction.guild_id = 1
+    interaction.channel = Mock(id=2)
+    interaction.channel_id = 2
+    interaction.response = AsyncMock()
+    interaction.followup = AsyncMock()
+    interaction.followup.send.return_value = Mock(id=789)
+    return interaction
+
+
+@pytest.mark.asyncio
+async def test_tourney_slash_commands(client, mock_interaction, subtests):
+    client.edit_message = AsyncMock()
+
+    with subtests.test(msg="create defers before creating teams"):
+        await tourney_command(client, "create").callback(mock_interaction, None)
+        mock_interaction.response.defer.assert_awaited_once_with(thinking=True)
+        embeds = mock_interaction.followup.send.call_args.kwargs["embeds"]
+        assert embeds[0].title == "Teams"
+        assert embeds[0].description.count("Team") == 4
+        assert isinstance(
+            mock_interaction.followup.send.call_args.kwargs["view"],
+            TournamentControls,
+        )
+        session = client.sessions.get(789)
+        assert session.creator_id == "456"
+
+    with subtests.test(msg="only the creator can reroll"):
+        other = Mock(spec=discord.Interaction)
+        other.id = 2
+        other.user = Mock(id="999")
+        other.guild_id = 1
+        other.channel_id = 2
+        other.response = AsyncMock()
+        await tourney_command(client, "reroll").callback(other)
+        other.response.send_message.assert_awaited_once_with(
+            "Only the tournament creator can do that.", ephemeral=True
+        )
+        other.response.defer.assert_not_called()
+
+    with subtests.test(msg="reroll edits the team message"):
+        await tourney_command(client, "reroll").callback(mock_interaction)
+        edited, kwargs = client.edit_message.call_args
+        assert edited[0].id == 789
+        assert kwargs["embeds"][0].description.count("Team") == 4
+        # The new teams can be replayed from the session's seed
+        assert session.draw == 1
+        assert session.teams == replayTeams(
+            session.player_ids, session.seed, 1, None, session.pair_counts
+        )
+
+    with subtests.test(msg="start posts the matches and removes the buttons"):
+        await tourney_command(client, "start").callback(mock_interaction)
+        assert session.bracket is not None
+        # The confirmed teams are kept apart in the guild's next tournament
+        a, b = session.teams[0]
+        assert client.pairings.pair_counts(1, [a, b]) == {
+            pairKey(a, b): pytest.approx(1.0)
+        }
+        client.edit_message.assert_called_with(
+            client.edit_message.call_args.args[0], view=None
+        )
+        embeds = mock_interaction.followup.send.call_args.kwargs["embeds"]
+        assert embeds[0].title == "Matches"
+        assert "Match 1" in embeds[0].description
+        await tourney_command(client, "start").callback(mock_interaction)
+        mock_interaction.response.send_message.assert_awaited_with(
+            "This tournament has already started.", ephemeral=True
+        )
+
+
+@pytest.mark.asyncio
+async def test_players_with_the_same_name_are_kept_apart(client, mock_message):
+    for member in mock_message.author.voice.channel.members:
+        member.name = "Sam"
+    await client.on_message(mock_message)
+    session = client.sessions.get(mock_message.channel.send.return_value.id)
+    assert sorted(player for team in session.teams for player in team) == list(
+        range(1000, 1008)
+    )
+    embeds = mock_message.channel.send.call_args.kwargs["embeds"]
+    assert embeds[0].description.count("Sam") == 8
+
+
+@pytest.mark.asyncio
+async def test_create_reads_the_voice_roster_index(client, mock_message):
+    guild = Mock(spec=discord.Guild)
+    guild.id = 1
+    voice_channel = mock_message.author.voice.channel
+    voice_channel.id = 10
+    voice_channel.guild = guild
+    guild.voice_channels = [voice_channel]
+    guild.stage_channels = []
+    members = voice_channel.members
+    voice_channel.members = members[:2]
+    await client.on_guild_available(guild)
+
+    # The rest join after the guild loaded, and the member cache never sees them
+    joined = Mock(channel=voice_channel)
+    for member in members[2:]:
+        member.guild = guild
+        await client.on_voice_state_update(member, Mock(channel=None), joined)
+    assert len(client.voice_rosters.snapshot(1, 10)) == 8
+
+    await client.on_message(mock_message)
+    session = client.sessions.get(mock_message.channel.send.return_value.id)
+    assert [player.id for player in session.players] == list(range(1000, 1008))
+
+    # Once one leaves, the next tournament is too small
+    await client.on_voice_state_update(members[-1], joined, Mock(channel=None))
+    mock_message.author.id = "457"
+    await client.on_message(mock_message)
+    assert "Error" in mock_message.channel.send.call_args.args[0]
+
+
+@pytest.mark.asyncio
+async def test_large_rosters_are_split_into_lobbies(client, mock_message):
+    members = []
+    for member_id in range(60):
+        member = Mock(spec=discord.Member)
+        member.id = member_id
+        member.name = f"Player{member_id}"
+        members.append(member)
+    mock_message.author.voice.channel.members = members
+    sent = [Mock(id=message_id, add_reaction=AsyncMock()) for message_id in (1, 2, 3)]
+    mock_message.channel.send.side_effect = sent
+
+    await client.on_message(mock_message)
+
+    titles = [
+        call.kwargs["embeds"][0].title
+        for call in mock_message.channel.send.call_args_list
+    ]
+    assert sorted(titles) == [
+        "Lobby 1 of 3: Teams",
+        "Lobby 2 of 3: Teams",
+        "Lobby 3 of 3: Teams",
+    ]
+    sessions = [client.sessions.get(message.id) for message in sent]
+    assert sorted(session.lobby for session in sessions) == [0, 1, 2]
+    assert sorted(
+        player.id for session in sessions for player in session.players
+    ) == list(range(60))
+    for message in sent:
+        assert message.add_reaction.await_count == len(client.tournament_emojis)
+
+
+@pytest.mark.asyncio
+async def test_lobbies_in_one_channel_are_controlled_separately(
+    client, mock_interaction
+):
+    client.edit_message = AsyncMock()
+    members = []
+    for member_id in range(60):
+        member = Mock(spec=discord.Member)
+        member.id = member_id
+        member.name = f"Player{member_id}"
+        members.append(member)
+    mock_interaction.user.voice.channel.members = members
+    mock_interaction.followup.send.side_effect = [
+        Mock(id=message_id) for message_id in (1, 2, 3)
+    ]
+    await tourney_command(client, "create").callback(mock_interaction, None)
+    lobbies = sorted(
+        (client.sessions.get(message_id) for message_id in (1, 2, 3)),
+        key=lambda session: session.lobby,
+    )
+    mock_interaction.followup.send.side_effect = None
+    start = tourney_command(client, "start")
+
+    # Without a lobby the command is ambiguous
+    await start.callback(mock_interaction)
+    mock_interaction.response.send_message.assert_awaited_with(
+        "You are organising 3 tournaments here; choose a lobby.", ephemeral=True
+    )
+    assert all(session.bracket is None for session in lobbies)
+
+    await tourney_command(client, "reroll").callback(mock_interaction, 2)
+    assert [session.draw for session in lobbies] == [0, 1, 0]
+    await start.callback(mock_interaction, 1)
+    assert lobbies[0].bracket is not None
+    for lobby in (2, 3):
+        await start.callback(mock_interaction, lobby)
+    assert all(session.bracket is not None for session in lobbies)
+
+    # Results go to the lobby the winner is playing in, not the newest one
+    report = client.tree.get_command("report")
+    for session in lobbies:
+        match = session.bracket.pending_matches()[0]
+        winner = Mock(id=session.bracket.teams[match.sides[0]][0])
+        await report.callback(mock_interaction, match.id + 1, winner, None, None)
+        assert match.done
+    for update in client._leaderboard_tasks:
+        update.cancel()
+
+
+@pytest.mark.asyncio
+async def test_tourney_buttons(client, mock_message, mock_interaction):
+    mock_message.content = "@TourneyBot create"
+    client.use_buttons = True
+    await client.on_message(mock_message)
+    team_message = mock_message.channel.send.return_value
+    controls = mock_message.channel.send.call_args.kwargs["view"]
+    team_message.add_reaction.assert_not_called()
+
+    mock_interaction.message = team_message
+    await controls.reroll.callback(mock_interaction)
+    mock_interaction.response.defer.assert_awaited_once_with()
+    team_message.edit.assert_called_once()
+
+    await controls.start.callback(mock_interaction)
+    team_message.edit.assert_called_with(view=None)
+    assert client.sessions.get(team_message.id).bracket is not None
+
+
+@pytest.mark.asyncio
+async def test_queued_reroll_and_start_edits_are_merged(
+    client, mock_message, mock_interaction
+):
+    mock_message.content = "@TourneyBot create"
+    client.use_buttons = True
+    await client.on_message(mock_message)
+    team_message = mock_message.channel.send.return_value
+    controls = mock_message.channel.send.call_args.kwargs["view"]
+    mock_interaction.message = team_message
+
+    # Hold the message bucket so both edits are still queued together
+    client.outbound.bucket_concurrency = 1
+    release = asyncio.Event()
+    blocker = asyncio.ensure_future(
+        client.outbound.submit(("messages", team_message.channel.id), release.wait)
+    )
+    reroll = asyncio.ensure_future(controls.reroll.callback(mock_interaction))
+    while client.outbound.queue_depth() == 0:
+        await asyncio.sleep(0.01)
+    start = asyncio.ensure_future(controls.start.callback(mock_interaction))
+    while client.outbound.stats.coalesced == 0:
+        await asyncio.sleep(0.01)
+    release.set()
+    await asyncio.gather(blocker, reroll, start)
+
+    # One request that both shows the rerolled teams and removes the buttons
+    team_message.edit.assert_called_once()
+    kwargs = team_message.edit.call_args.kwargs
+    assert kwargs["view"] is None
+    assert kwargs["embeds"][0].description.count("Team") == 4
+
+
+def test_button_mode_drops_message_intents():
+    client = DudeBot(use_buttons=True)
+    assert not client.intents.message_content
+    assert not client.intents.reactions
+    # Still needed to list and look up members for /setup_bulk
+    assert client.intents.members
+
+
+@pytest.mark.asyncio
+async def test_report_updates_standings_and_debounces_the_leaderboard(
+    client, mock_interaction
+):
+    client.edit_message = AsyncMock()
+    client.leaderboard_delay = 0.01
+    await tourney_command(client, "create").callback(mock_interaction, 2)
+    await tourney_command(client, "start").callback(mock_interaction)
+    session = client.sessions.get(789)
+    client.send_message = AsyncMock(return_value=Mock(id=900))
+    client.edit_message.reset_mock()
+    report = client.tree.get_command("report")
+
+    # A burst of reports results in a single standings message
+    first, second = session.bracket.pending_matches()
+    for match in (first, second):
+        winner = Mock(id=session.bracket.teams[match.sides[0]][0])
+        await report.callback(mock_interaction, match.id + 1, winner, 3, 1)
+    await asyncio.sleep(0.05)
+    client.send_message.assert_awaited_once()
+    embeds = client.send_message.call_args.kwargs["embeds"]
+    assert embeds[0].title == "Standings"
+    assert embeds[0].description.count("(1-0)") == 2
+    # The final became playable and is announced with the standings
+    final = session.bracket.pending_matches()[0]
+    assert f"Up next\nMatch {final.id + 1}: " in embeds[0].description
+    assert session.leaderboard_id == 900
+    assert first.scores == (3, 1)
+    for player_id in session.bracket.teams[first.winner]:
+        record = client.standings.get(1, player_id)
+        assert (record.wins, record.losses) == (1, 0)
+    for player_id in session.bracket.teams[first.loser]:
+        record = client.standings.get(1, player_id)
+        assert (record.wins, record.losses) == (0, 1)
+
+    # Later reports edit it in place
+    winner = Mock(id=session.bracket.teams[final.sides[1]][0])
+    await report.callback(mock_interaction, final.id + 1, winner, None, None)
+    await asyncio.sleep(0.05)
+    client.send_message.assert_awaited_once()
+    edited, kwargs = client.edit_message.call_args
+    assert edited[0].id == 900
+    assert kwargs["embeds"][0].description.startswith(
+        f"```\nChampion: Team {final.sides[1] + 1}"
+    )
+    assert "Up next" not in kwargs["embeds"][0].description
+
+    # Reporting a decided match is refused
+    await report.callback(mock_interaction, first.id + 1, winner, None, None)
+    mock_interaction.response.send_message.assert_awaited_with(
+        "```Error: Match is not awaiting a result```", ephemeral=True
+    )
+
+
+@pytest.mark.asyncio
+async def test_leaderboard_update_failures(client, mock_interaction, caplog):
+    client.edit_message = AsyncMock()
+    client.leaderboard_delay = 0
+    await tourney_command(client, "create").callback(mock_interaction, 2)
+    await tourney_command(client, "start").callback(mock_interaction)
+    session = client.sessions.get(789)
+    session.leaderboard_id = 900
+    response = Mock(status=404, reason="Not Found")
+    client.edit_message.side_effect = discord.NotFound(response, "")
+    client.send_message = AsyncMock(return_value=Mock(id=901))
+
+    # A deleted standings message is replaced
+    client.schedule_leaderboard(session)
+    await asyncio.gather(*client._leaderboard_tasks)
+    client.send_message.assert_awaited_once()
+    assert session.leaderboard_id == 901
+
+    # Other failures are logged rather than lost with the task
+    response = Mock(status=403, reason="Forbidden")
+    client.edit_message.side_effect = discord.Forbidden(response, "")
+    client.schedule_leaderboard(session)
+    await asyncio.gather(*client._leaderboard_tasks)
+    assert "Could not update the standings" in caplog.text
+    assert session.leaderboard_id == 901
+    assert not client._leaderboard_tasks
+
+
+@pytest.mark.asyncio
+async def test_report_checks_the_reporter_and_scores(client, mock_interaction):
+    client.edit_message = AsyncMock()
+    report = client.tree.get_command("report")
+    await tourney_command(client, "create").callback(mock_interaction, 2)
+    await report.callback(mock_interaction, 1, Mock(id=1000), None, None)
+    mock_interaction.response.send_message.assert_awaited_with(
+        "This tournament has not started yet.", ephemeral=True
+    )
+
+    await tourney_command(client, "start").callback(mock_interaction)
+    session = client.sessions.get(789)
+    match = session.bracket.pending_matches()[0]
+    winner = Mock(id=session.bracket.teams[match.sides[0]][0])
+    await report.callback(mock_interaction, match.id + 1, winner, 1, 3)
+    mock_interaction.response.send_message.assert_awaited_with(
+        "```Error: The winner must have the higher score```", ephemeral=True
+    )
+
+    other = Mock(spec=discord.Interaction)
+    other.id = 2
+    other.user = Mock(spec=discord.Member, id="999")
+    other.user.guild = Mock(id=1)
+    other.user.roles = []
+    other.guild_id = 1
+    other.channel_id = 2
+    other.response = AsyncMock()
+    await report.callback(other, match.id + 1, winner, None, None)
+    other.response.send_message.assert_awaited_once_with(
+        "Only the tournament creator or an admin can report results.", ephemeral=True
+    )
+    assert not match.done
+
+
+@pytest.mark.asyncio
+async def test_finished_tournaments_rate_players_and_balance_the_next(
+    client, mock_interaction
+):
+    client.edit_message = AsyncMock()
+    client.send_message = AsyncMock(return_value=Mock(id=900))
+    client.leaderboard_delay = 0.01
+    await tourney_command(client, "create").callback(mock_interaction, 2)
+    session = client.sessions.get(789)
+    assert not session.balanced
+    await tourney_command(client, "start").callback(mock_interaction)
+    report = client.tree.get_command("report")
+    while not session.bracket.finished:
+        match = session.bracket.pending_matches()[0]
+        winner = Mock(id=session.bracket.teams[match.sides[0]][0])
+        await report.callback(mock_interaction, match.id + 1, winner, None, None)
+    await asyncio.sleep(0.05)
+
+    champions = session.bracket.teams[session.bracket.champion]
+    ratings = client.ratings.ratings(1, session.player_ids)
+    assert len(ratings) == 8
+    assert all(ratings[player] == max(ratings.values()) for player in champions)
+
+    mock_interaction.followup.send.return_value = Mock(id=790)
+    await tourney_command(client, "create").callback(mock_interaction, 2)
+    rated = client.sessions.get(790)
+    assert rated.balanced
+    assert {player.id: player.rating for player in rated.players} == ratings
+    assert rated.teams == replayTeams(
+        rated.player_ids, rated.seed, 0, 2, rated.pair_counts, rated.ratings
+    )
+    # The champions are the two strongest players, so they are split up
+    assert not any(set(champions) <= set(team) for team in rated.teams)
@@ -0,0 +1,79 @@
+import random
+
+from src.player import Player
+from src.voiceRoster import VoiceRosterIndex
+
+GUILD = 1
+
+
+def ids(snapshot):
+    return [player.id for player in snapshot]
+
+
+def testRostersNeedTheGuildLoaded():
+    index = VoiceRosterIndex()
+    index.update(GUILD, Player(1, "A"), 10)
+    assert index.snapshot(GUILD, 10) is None
+    index.load_guild(GUILD, {10: [Player(1, "A"), Player(2, "B")]})
+    assert ids(index.snapshot(GUILD, 10)) == [1, 2]
+    assert index.snapshot(GUILD, 11) == ()
+
+
+def testJoinLeaveAndMove():
+    index = VoiceRosterIndex()
+    index.load_guild(GUILD, {})
+    index.update(GUILD, Player(1, "A"), 10)
+    index.update(GUILD, Player(2, "B"), 10)
+    index.update(GUILD, Player(3, "C"), 11)
+    first = index.snapshot(GUILD, 10)
+    assert ids(first) == [1, 2]
+    # Unchanged rosters return the same snapshot
+    index.update(GUILD, Player(2, "B"), 10)
+    assert index.snapshot(GUILD, 10) is first
+
+    index.update(GUILD, Player(1, "A"), 11)
+    assert ids(index.snapshot(GUILD, 10)) == [2]
+    assert ids(index.snapshot(GUILD, 11)) == [3, 1]
+    index.update(GUILD, Player(3, "C"), None)
+    assert ids(index.snapshot(GUILD, 11)) == [1]
+    assert len(index) == 2
+
+    # A rename is picked up from the next voice state update
+    index.update(GUILD, Player(1, "Alice"), 11)
+    assert [player.name for player in index.snapshot(GUILD, 11)] == ["Alice"]
+
+
+def testForgettingChannelsAndGuilds():
+    index = VoiceRosterIndex()
+    index.load_guild(GUILD, {10: [Player(1, "A")], 11: [Player(2, "B")]})
+    index.load_guild(2, {20: [Player(1, "A")]})
+    index.forget_channel(10)
+    assert index.snapshot(GUILD, 10) == ()
+    assert len(index) == 2
+    assert ids(index.snapshot(2, 20)) == [1]
+    index.forget_guild(GUILD)
+    assert index.snapshot(GUILD, 11) is None
+    assert len(index) == 1
+
+
+def testReplayedEventStreamMatchesModel():
+    rng = random.Random(0)
+    index = VoiceRosterIndex()
+    index.load_guild(GUILD, {})
+    channels = [10, 11, 12, None]
+    model = {}
+    for _ in range(5000):
+        member = rng.randrange(50)
+        channel = rng.choice(channels)
+        index.update(GUILD, Player(member, f"Player{member}"), channel)
+        if channel is None:
+            model.pop(member, None)
+        elif model.get(member) != channel:
+            # Moving to a new channel puts the member at the end of its roster
+            model.pop(member, None)
+            model[member] = channel
+        if rng.random() < 0.1:
+            for channel_id in channels[:-1]:
+                expected = [m for m, c in model.items() if c == channel_id]
+                assert ids(index.snapshot(GUILD, channel_id)) == expected
+    assert len(index) == len(model)